@@ -33,10 +33,13 @@ def cli():
     """
 
 # Add the commands:
+cli.add_command(dev.bench)
 cli.add_command(dev.format)
 cli.add_command(dev.generate)
 cli.add_command(dev.lint)
+cli.add_command(dev.serve)
 cli.add_command(dev.setup)
+cli.add_command(dev.watch)
 
 if __name__ == '__main__':
     # Configure logging:
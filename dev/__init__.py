@@ -14,8 +14,11 @@
 # the License.
 #
 
+from .bench import *
 from .format import *
 from .formatter import *
 from .generate import *
 from .lint import *
+from .server import *
 from .setup import *
+from .watch import *
@@ -0,0 +1,828 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Benchmarks that help to decide how to design the API.
+"""
+
+import datetime
+import itertools
+import json
+import logging
+import pathlib
+import random
+import time
+import typing
+import uuid
+
+import click
+from google.protobuf import descriptor_pool
+from google.protobuf import duration_pb2
+from google.protobuf import message_factory
+from google.protobuf import struct_pb2
+from google.protobuf import timestamp_pb2
+from google.protobuf import wrappers_pb2
+
+from . import dirs
+from . import python
+
+@click.group()
+def bench() -> None:
+    """
+    Run benchmarks.
+    """
+
+@bench.command()
+@click.option(
+    "--orders",
+    type=int,
+    default=10000,
+    show_default=True,
+    help="Number of orders.",
+)
+@click.option(
+    "--parameters",
+    type=int,
+    default=20,
+    show_default=True,
+    help="Number of template parameters of each order.",
+)
+@click.option(
+    "--repeat",
+    type=int,
+    default=5,
+    show_default=True,
+    help="Number of times that each measurement is repeated, only the best is reported.",
+)
+def parameters(orders: int, parameters: int, repeat: int) -> None:
+    """
+    Compares the encodings of the template parameters of orders.
+
+    Measures the size, the encoding time and the decoding time of the orders using the 'template_parameters' field,
+    where values are 'google.protobuf.Any', and using the 'template_parameter_values' field, where values are
+    'ParameterValue'. Decoding includes extracting the Python value of each parameter, which for 'Any' requires finding
+    the message type that corresponds to the type URL.
+    """
+    python.load()
+    from fulfillment.v1 import cluster_order_type_pb2
+
+    # Generate the values once, so that both encodings contain exactly the same data:
+    rng = random.Random(0)
+    values = [
+        [_random_value(rng, index) for index in range(parameters)]
+        for _ in range(orders)
+    ]
+    logging.info(f"Encoding {orders} orders with {parameters} parameters each")
+    any_orders = []
+    typed_orders = []
+    for order_values in values:
+        any_order = _random_order(cluster_order_type_pb2.ClusterOrder, rng)
+        typed_order = cluster_order_type_pb2.ClusterOrder()
+        typed_order.CopyFrom(any_order)
+        for index, (kind, value) in enumerate(order_values):
+            name = f"parameter_{index}"
+            _pack_any(any_order.spec.template_parameters[name], kind, value)
+            _pack_typed(typed_order.spec.template_parameter_values[name], kind, value)
+        any_orders.append(any_order)
+        typed_orders.append(typed_order)
+
+    results = [
+        _measure("Any", cluster_order_type_pb2.ClusterOrder, any_orders, _decode_any, repeat),
+        _measure("ParameterValue", cluster_order_type_pb2.ClusterOrder, typed_orders, _decode_typed, repeat),
+    ]
+
+    # Check that both encodings decode to the same values, otherwise the comparison would be meaningless:
+    for any_order, typed_order in zip(any_orders, typed_orders):
+        if _decode_any(any_order) != _decode_typed(typed_order):
+            raise Exception(f"Decoded values of order '{any_order.id}' are different")
+
+    click.echo(f"{'Encoding':<16} {'Total size':>12} {'Per order':>10} {'Encode':>10} {'Decode':>10}")
+    for name, size, encode, decode in results:
+        click.echo(
+            f"{name:<16} {size:>10} B {size / orders:>8.1f} B {encode * 1000:>7.1f} ms {decode * 1000:>7.1f} ms"
+        )
+    any_size = results[0][1]
+    typed_size = results[1][1]
+    click.echo(f"The 'ParameterValue' encoding is {100 * (1 - typed_size / any_size):.1f}% smaller")
+
+@bench.command(name="filter")
+@click.option(
+    "--orders",
+    type=int,
+    default=100000,
+    show_default=True,
+    help="Number of orders.",
+)
+@click.option(
+    "--limit",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Size of the first page of results.",
+)
+@click.option(
+    "--repeat",
+    type=int,
+    default=5,
+    show_default=True,
+    help="Number of times that each measurement is repeated, only the best is reported.",
+)
+def filters(orders: int, limit: int, repeat: int) -> None:
+    """
+    Measures the filter and order expressions of the reference server.
+
+    Creates the orders in the in-memory store of the reference server, and then, for a set of filters and orders,
+    measures the time to compile them, with and without the cache, and the time to count the matching orders and to
+    retrieve the first page, using the indexes and scanning all the orders. It also checks that both ways return the
+    same results. The first page is retrieved with a query that hasn't been used before, and the next page with the
+    query that retrieved the first, like the requests of a listing that use the page token.
+    """
+    python.load()
+    from fulfillment.v1 import cluster_order_type_pb2
+    from .server import query
+    from .server import store
+
+    logging.info(f"Creating {orders} orders")
+    rng = random.Random(0)
+    db = store.Database(retention=1, queue_size=1)
+    collection = db.cluster_orders
+    states = [
+        cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING,
+        cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED,
+        cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED,
+    ]
+    for _ in range(orders):
+        order = _random_order(cluster_order_type_pb2.ClusterOrder, rng)
+        order.status.state = rng.choices(states, weights=[2, 7, 1])[0]
+        collection.put(order)
+
+    # Use the creation time of the order in the middle, so that range filters select half of the orders:
+    middle = list(collection.scan())[orders // 2].metadata.creation_timestamp.ToJsonString()
+    cases = [
+        ("state = 'FULFILLED'", ""),
+        ("state = 'FAILED'", ""),
+        ("template_id = 'ocp_4_17_small' and state = 'FAILED'", ""),
+        ("state in ('FAILED', 'PROGRESSING')", ""),
+        (f"metadata.creation_timestamp >= '{middle}'", ""),
+        ("template_id like '%large' and state != 'FULFILLED'", ""),
+        ("state = 'FAILED'", "template_id, metadata.creation_timestamp desc"),
+        ("", "state desc, metadata.creation_timestamp"),
+    ]
+
+    click.echo(
+        f"{'Filter and order':<56} {'Plan':<54} {'Matches':>8} {'Compile':>9} {'Cached':>9} "
+        f"{'Count':>9} {'Scan':>9} {'Page':>9} {'Next':>9} {'Scan':>9}"
+    )
+    for filter, order in cases:
+        query.compile.cache_clear()
+        compile_time = _best(repeat, lambda: query.Query(cluster_order_type_pb2.ClusterOrder, filter, order))
+        compiled = query.compile(cluster_order_type_pb2.ClusterOrder, filter, order)
+        cached_time = _best(repeat, lambda: query.compile(cluster_order_type_pb2.ClusterOrder, filter, order))
+
+        # The naive way evaluates the complete predicate for all the orders, and then sorts all the matches:
+        predicate = compiled.predicate or (lambda object: True)
+        def naive_count() -> int:
+            return sum(1 for object in collection.scan() if predicate(object))
+        def naive_page() -> list:
+            matches = [object for object in collection.scan() if predicate(object)]
+            matches.sort(key=compiled.sort_key)
+            return matches[:limit]
+        def planned_page() -> list:
+            fresh = query.Query(cluster_order_type_pb2.ClusterOrder, filter, order)
+            return list(itertools.islice(fresh.select(collection), limit))
+
+        count = compiled.count(collection)
+        if count != naive_count():
+            raise Exception(f"Count of '{filter}' is {count} but scanning gives {naive_count()}")
+        if [object.id for object in planned_page()] != [object.id for object in naive_page()]:
+            raise Exception(f"First page of '{filter}' ordered by '{order}' is different when scanning")
+        count_time = _best(repeat, lambda: compiled.count(collection))
+        scan_count_time = _best(repeat, naive_count)
+        page_time = _best(repeat, planned_page)
+        first = list(itertools.islice(compiled.select(collection), limit))
+        after = compiled.key(first[-1]) if len(first) > 0 else None
+        next_time = _best(repeat, lambda: list(itertools.islice(compiled.select(collection, after=after), limit)))
+        scan_page_time = _best(repeat, naive_page)
+
+        description = filter if order == "" else f"{filter} order by {order}" if filter != "" else f"order by {order}"
+        click.echo(
+            f"{description[:56]:<56} {compiled.plan(collection):<54} {count:>8} "
+            f"{compile_time * 1e6:>6.1f} us {cached_time * 1e6:>6.2f} us "
+            f"{count_time * 1000:>6.2f} ms {scan_count_time * 1000:>6.2f} ms "
+            f"{page_time * 1000:>6.2f} ms {next_time * 1000:>6.2f} ms {scan_page_time * 1000:>6.2f} ms"
+        )
+
+@bench.command()
+@click.option(
+    "--transport",
+    type=click.Choice(["grpc", "http", "both"]),
+    default="both",
+    show_default=True,
+    help="Transport used to send the requests. When 'both' is used the transports are measured one after the other.",
+)
+@click.option(
+    "--grpc-address",
+    default="localhost:8000",
+    show_default=True,
+    help="Address of the gRPC server.",
+)
+@click.option(
+    "--http-address",
+    default="localhost:8001",
+    show_default=True,
+    help="Address of the HTTP+JSON gateway.",
+)
+@click.option(
+    "--token",
+    help="Bearer token sent with the requests.",
+)
+@click.option(
+    "--concurrency",
+    type=int,
+    default=10,
+    show_default=True,
+    help="Number of requests sent concurrently.",
+)
+@click.option(
+    "--duration",
+    type=float,
+    default=10,
+    show_default=True,
+    help="Seconds that the load is measured for each transport.",
+)
+@click.option(
+    "--warmup",
+    type=float,
+    default=1,
+    show_default=True,
+    help="Seconds that the load is sent before starting to measure.",
+)
+@click.option(
+    "--mix",
+    default="list=20,get=70,create=10",
+    show_default=True,
+    help="Relative weights of the 'list', 'get' and 'create' operations.",
+)
+@click.option(
+    "--watchers",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of clients watching events during the run.",
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    help="Filter used by the 'list' operations, chosen randomly if repeated. The default is a mix of common filters.",
+)
+@click.option(
+    "--page-size",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Maximum number of items requested by the 'list' operations.",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=10,
+    show_default=True,
+    help="Deadline of each request in seconds.",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(["identity", "gzip", "zstd"]),
+    default="identity",
+    show_default=True,
+    help="Encoding accepted for the responses. The 'zstd' encoding is only supported by the HTTP+JSON gateway.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    help="File where the results are written in JSON format. The default is 'bench_output.txt' in the project dir.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Results of a previous run to compare with.",
+)
+def load(
+    transport: str,
+    grpc_address: str,
+    http_address: str,
+    token: str | None,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    mix: str,
+    watchers: int,
+    filters: tuple[str, ...],
+    page_size: int,
+    timeout: float,
+    compression: str,
+    output: str | None,
+    baseline: str | None,
+) -> None:
+    """
+    Measures the latency and throughput of a server under load.
+
+    Sends a mix of 'List', 'Get' and 'Create' requests for orders to a server that implements the API, like the one
+    started with './dev.py serve --seed 10000', using gRPC, the HTTP+JSON routes of the gateway, or both. The orders
+    created are generated from the message definitions, with parameters of the types that the templates of the server
+    require. The watchers receive all the events, and the latency reported for them is the time from the start of the
+    creation of an order to the arrival of its event.
+
+    The results, including the percentiles of the latency, the throughput and the average sizes of the payloads, are
+    written in JSON format, so that they can be compared with the results of other runs using the '--baseline' option.
+    """
+    python.load()
+    from . import traffic
+
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in traffic.OPERATIONS or not weight.strip().isdigit():
+            raise click.BadParameter(
+                f"Item '{item}' should be the name of an operation and a weight, like 'get=70'",
+                param_hint="--mix",
+            )
+        weights[name] = int(weight)
+    if len(filters) == 0:
+        filters = (
+            "",
+            "state = 'FULFILLED'",
+            "state = 'FAILED' and template_id = 'ocp_4_17_small'",
+            "state in ('PROGRESSING', 'FAILED')",
+        )
+
+    transports = ["grpc", "http"] if transport == "both" else [transport]
+    if compression == "zstd" and "grpc" in transports:
+        raise click.BadParameter(
+            "The 'zstd' encoding is only supported by the HTTP+JSON gateway, use '--transport http'",
+            param_hint="--compression",
+        )
+    addresses = {"grpc": grpc_address, "http": http_address}
+    results = {}
+    for name in transports:
+        logging.info(f"Sending load using '{name}' to '{addresses[name]}'")
+        results[name] = traffic.run(
+            transport=name,
+            address=addresses[name],
+            token=token,
+            concurrency=concurrency,
+            duration=duration,
+            warmup=warmup,
+            mix=weights,
+            watchers=watchers,
+            filters=list(filters),
+            page_size=page_size,
+            timeout=timeout,
+            compression=compression,
+        )
+    report = {
+        "benchmark": "load",
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "concurrency": concurrency,
+            "duration": duration,
+            "warmup": warmup,
+            "mix": weights,
+            "watchers": watchers,
+            "filters": list(filters),
+            "page_size": page_size,
+            "compression": compression,
+        },
+        "results": results,
+    }
+    path = pathlib.Path(output) if output is not None else dirs.project() / "bench_output.txt"
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    logging.info(f"Results written to '{path}'")
+
+    previous = {}
+    if baseline is not None:
+        previous = json.loads(pathlib.Path(baseline).read_text()).get("results", {})
+    click.echo(
+        f"{'Transport':<10} {'Operation':<10} {'Count':>8} {'Errors':>7} {'Ops/s':>9} {'p50':>9} {'p95':>9} "
+        f"{'p99':>9} {'Request':>9} {'Response':>10}" + (f" {'p99 diff':>9} {'Ops/s diff':>10}" if baseline else "")
+    )
+    for name, operations in results.items():
+        for operation, summary in operations.items():
+            latency = summary["latency_ms"]
+            line = (
+                f"{name:<10} {operation:<10} {summary['count']:>8} {summary['errors']:>7} "
+                f"{summary['throughput']:>9.1f} {_ms(latency['p50'])} {_ms(latency['p95'])} {_ms(latency['p99'])} "
+                f"{summary['request_bytes']:>7.0f} B {summary['response_bytes']:>8.0f} B"
+            )
+            old = previous.get(name, {}).get(operation)
+            if old is not None:
+                line += (
+                    f" {_change(old['latency_ms']['p99'], latency['p99']):>9} "
+                    f"{_change(old['throughput'], summary['throughput']):>10}"
+                )
+            click.echo(line)
+
+@bench.command()
+@click.option(
+    "--count",
+    type=int,
+    default=5000,
+    show_default=True,
+    help="Number of objects of each kind.",
+)
+@click.option(
+    "--page-size",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Number of objects in each 'List' response or 'Watch' batch. Use 1 to measure objects one by one.",
+)
+@click.option(
+    "--repeat",
+    type=int,
+    default=3,
+    show_default=True,
+    help="Number of times that each measurement is repeated, only the best is reported.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    help="File where the results are also written in JSON format.",
+)
+def codecs(count: int, page_size: int, repeat: int, output: str | None) -> None:
+    """
+    Compares the binary and JSON encodings of the messages of the API.
+
+    Generates orders, clusters and events, and groups them in pages, like the responses of the 'List' methods and the
+    batches of the 'Watch' method. For each kind of page measures the size, the encoding time and the decoding time
+    using the binary format, that is used by gRPC, and the JSON format, that is used by the gateway. The JSON format is
+    measured with the protocol buffers names of the fields, like 'template_id', that are the names used by the gateway
+    and by the OpenAPI specification because it is generated with 'json_names_for_fields=false', and with the JSON names
+    of the fields, like 'templateId'. Each format is also measured compressed with the available algorithms, and the
+    compression time is included in the encoding and decoding times. Pages are compressed one by one only when they
+    are larger than the threshold used by the server, like the responses of the 'List' methods, and also all together
+    as one stream flushed after each page, like the responses of the 'Watch' and 'ListStream' methods.
+    """
+    python.load()
+    from google.protobuf import json_format
+    from . import compressors
+
+    formats = {
+        "protobuf": (
+            lambda message: message.SerializeToString(),
+            lambda data, message_class: message_class.FromString(data),
+        ),
+        "json": (
+            lambda message: json_format.MessageToJson(message, preserving_proto_field_name=True, indent=None).encode(),
+            lambda data, message_class: json_format.Parse(data, message_class()),
+        ),
+        "json (camel)": (
+            lambda message: json_format.MessageToJson(message, indent=None).encode(),
+            lambda data, message_class: json_format.Parse(data, message_class()),
+        ),
+    }
+
+    results = []
+    for kind, message_class, pages in _corpora(count, page_size):
+        logging.info(f"Measuring {count} {kind} in pages of {page_size}")
+        baseline = None
+        for format, (encode, decode) in formats.items():
+            encode_time = _best(repeat, lambda: [encode(page) for page in pages])
+            encoded = [encode(page) for page in pages]
+            decode_time = _best(repeat, lambda: [decode(data, message_class) for data in encoded])
+
+            # Check that the encoding doesn't lose information, otherwise the comparison would be meaningless:
+            if [decode(data, message_class) for data in encoded] != pages:
+                raise Exception(f"Decoded {kind} are different when using the {format} format")
+
+            size = sum(len(data) for data in encoded)
+            if baseline is None:
+                baseline = size
+            results.append((kind, format, "none", size, encode_time, decode_time))
+            for compressor in compressors.COMPRESSORS.values():
+                def compress() -> list[tuple[bool, bytes]]:
+                    return [
+                        (True, compressor.compress(data)) if len(data) >= compressors.THRESHOLD else (False, data)
+                        for data in encoded
+                    ]
+
+                def decompress(pages: list[tuple[bool, bytes]]) -> list[bytes]:
+                    return [compressor.decompress(data) if flag else data for flag, data in pages]
+
+                compress_time = _best(repeat, compress)
+                compressed = compress()
+                decompress_time = _best(repeat, lambda: decompress(compressed))
+                if decompress(compressed) != encoded:
+                    raise Exception(f"Decompressed {kind} are different when using the {compressor.name} algorithm")
+                results.append((
+                    kind,
+                    format,
+                    compressor.name,
+                    sum(len(data) for _, data in compressed),
+                    encode_time + compress_time,
+                    decode_time + decompress_time,
+                ))
+
+                def compress_stream() -> list[bytes]:
+                    stream = compressor.stream()
+                    return [stream.compress(data) for data in encoded] + [stream.finish()]
+
+                compress_time = _best(repeat, compress_stream)
+                chunks = compress_stream()
+                decompress_time = _best(repeat, lambda: compressor.decompress(b"".join(chunks)))
+                if compressor.decompress(b"".join(chunks)) != b"".join(encoded):
+                    raise Exception(f"Decompressed {kind} are different when using the {compressor.name} stream")
+                results.append((
+                    kind,
+                    format,
+                    f"{compressor.name} (stream)",
+                    sum(len(data) for data in chunks),
+                    encode_time + compress_time,
+                    decode_time + decompress_time,
+                ))
+
+    click.echo(
+        f"{'Objects':<10} {'Format':<14} {'Compression':<13} {'Size':>12} {'Per object':>11} {'Relative':>9} "
+        f"{'Encode':>12} {'Decode':>12}"
+    )
+    sizes = {}
+    for kind, format, compression, size, encode_time, decode_time in results:
+        binary = sizes.setdefault(kind, size)
+        click.echo(
+            f"{kind:<10} {format:<14} {compression:<13} {size:>10} B {size / count:>9.1f} B "
+            f"{100 * size / binary:>8.1f}% {1e6 * encode_time / count:>7.2f} us/o "
+            f"{1e6 * decode_time / count:>7.2f} us/o"
+        )
+    if output is not None:
+        report = {
+            "benchmark": "codecs",
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "config": {
+                "count": count,
+                "page_size": page_size,
+            },
+            "results": [
+                {
+                    "objects": kind,
+                    "format": format,
+                    "compression": compression,
+                    "bytes_per_object": round(size / count, 1),
+                    "encode_us_per_object": round(1e6 * encode_time / count, 3),
+                    "decode_us_per_object": round(1e6 * decode_time / count, 3),
+                }
+                for kind, format, compression, size, encode_time, decode_time in results
+            ],
+        }
+        pathlib.Path(output).write_text(json.dumps(report, indent=2) + "\n")
+        logging.info(f"Results written to '{output}'")
+
+def _corpora(count: int, page_size: int) -> list[tuple[str, type, list]]:
+    """
+    Generates the given number of orders, clusters and events, grouped in pages of the given size, and returns the name
+    of each kind of object, the class of the pages and the pages. Values that the server controls, like the parameters
+    of orders or the URLs of clusters, are replaced by values similar to the ones that the server would return.
+    """
+    from events.v1 import event_type_pb2
+    from events.v1 import events_service_pb2
+    from fulfillment.v1 import cluster_order_type_pb2
+    from fulfillment.v1 import cluster_orders_service_pb2
+    from fulfillment.v1 import cluster_type_pb2
+    from fulfillment.v1 import clusters_service_pb2
+    from . import synthetic
+    from .server import parameters
+
+    rng = random.Random(0)
+
+    def fill_metadata(object: typing.Any) -> None:
+        # Objects that are being deleted are rare, and etags are the hexadecimal resource version:
+        object.metadata.ClearField("deletion_timestamp")
+        object.metadata.etag = f"{object.metadata.resource_version:x}"
+
+    def fill_order(order: typing.Any) -> None:
+        fill_metadata(order)
+        order.spec.template_id = rng.choice(["ocp_4_17_small", "ocp_4_17_medium", "ocp_4_17_large"])
+        order.spec.ClearField("template_parameters")
+        order.spec.ClearField("template_parameter_values")
+        values = order.spec.template_parameter_values
+        values["node_count"].int32_value = rng.randrange(3, 100)
+        values["region"].string_value = rng.choice(["us-east-1", "us-west-2", "eu-west-1", "ap-south-1"])
+        parameters.complete(order.spec.template_parameters, values)
+
+    def fill_cluster(cluster: typing.Any) -> None:
+        fill_metadata(cluster)
+        cluster.status.api_url = f"https://api.{cluster.id}.example.com:6443"
+        cluster.status.console_url = f"https://console.{cluster.id}.example.com"
+        cluster.status.kubeconfig_hash = f"{rng.getrandbits(256):064x}"
+
+    def fill_event(event: typing.Any) -> None:
+        if rng.random() < 0.5:
+            event.cluster_order.CopyFrom(synthetic.generate(cluster_order_type_pb2.ClusterOrder, rng, fill=fill_order))
+        else:
+            event.cluster.CopyFrom(synthetic.generate(cluster_type_pb2.Cluster, rng, fill=fill_cluster))
+        if event.type != event_type_pb2.EVENT_TYPE_OBJECT_UPDATED:
+            event.ClearField("changed_fields")
+
+    def paginate(objects: list, make: typing.Callable[[list], typing.Any]) -> list:
+        return [make(objects[start:start + page_size]) for start in range(0, len(objects), page_size)]
+
+    orders = [synthetic.generate(cluster_order_type_pb2.ClusterOrder, rng, fill=fill_order) for _ in range(count)]
+    clusters = [synthetic.generate(cluster_type_pb2.Cluster, rng, fill=fill_cluster) for _ in range(count)]
+    events = [synthetic.generate(event_type_pb2.Event, rng, fill=fill_event) for _ in range(count)]
+    return [
+        (
+            "orders",
+            cluster_orders_service_pb2.ClusterOrdersListResponse,
+            paginate(orders, lambda items: cluster_orders_service_pb2.ClusterOrdersListResponse(
+                size=len(items), total=count, items=items,
+            )),
+        ),
+        (
+            "clusters",
+            clusters_service_pb2.ClustersListResponse,
+            paginate(clusters, lambda items: clusters_service_pb2.ClustersListResponse(
+                size=len(items), total=count, items=items,
+            )),
+        ),
+        (
+            "events",
+            events_service_pb2.EventsWatchResponse,
+            paginate(events, lambda items: events_service_pb2.EventsWatchResponse(events=items)),
+        ),
+    ]
+
+def _ms(value: float | None) -> str:
+    return f"{value:>6.1f} ms" if value is not None else f"{'-':>9}"
+
+def _change(old: float | None, new: float | None) -> str:
+    """
+    Formats the relative change from an old value to a new one, as a percentage.
+    """
+    if old is None or new is None or old == 0:
+        return "-"
+    return f"{100 * (new - old) / old:+.1f}%"
+
+def _best(repeat: int, function: typing.Callable) -> float:
+    """
+    Runs the function the given number of times and returns the best time.
+    """
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        result = elapsed if result is None else min(result, elapsed)
+    return result
+
+def _measure(
+    name: str,
+    message_class: type,
+    messages: list,
+    decode: typing.Callable,
+    repeat: int,
+) -> tuple[str, int, float, float]:
+    """
+    Measures the total size of the serialized messages, and the best time to serialize them and to parse them and
+    extract the values.
+    """
+    logging.info(f"Measuring '{name}' encoding")
+    encode_time = None
+    decode_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = [message.SerializeToString() for message in messages]
+        elapsed = time.perf_counter() - start
+        encode_time = elapsed if encode_time is None else min(encode_time, elapsed)
+        start = time.perf_counter()
+        for item in data:
+            decode(message_class.FromString(item))
+        elapsed = time.perf_counter() - start
+        decode_time = elapsed if decode_time is None else min(decode_time, elapsed)
+    size = sum(len(item) for item in data)
+    return (name, size, encode_time, decode_time)
+
+# Types of values, in the same order than in the documentation of the 'ParameterValue' type:
+_KINDS = [
+    "bool",
+    "int32",
+    "int64",
+    "float",
+    "double",
+    "string",
+    "timestamp",
+    "duration",
+    "bytes",
+    "json",
+]
+
+def _random_value(rng: random.Random, index: int) -> tuple[str, typing.Any]:
+    kind = _KINDS[index % len(_KINDS)]
+    match kind:
+        case "bool":
+            value = rng.random() < 0.5
+        case "int32":
+            value = rng.randrange(1, 1000)
+        case "int64":
+            value = rng.randrange(1, 1 << 40)
+        case "float":
+            value = rng.choice([0.5, 1.5, 2.25, 100.0])
+        case "double":
+            value = rng.random()
+        case "string":
+            value = rng.choice(["small", "medium", "large", "us-east-1", "4.18.0"])
+        case "timestamp":
+            value = rng.randrange(1700000000, 1800000000)
+        case "duration":
+            value = rng.randrange(60, 86400)
+        case "bytes":
+            value = rng.randbytes(16)
+        case "json":
+            value = {"enabled": True, "replicas": rng.randrange(1, 10)}
+    return (kind, value)
+
+def _random_order(message_class: type, rng: random.Random) -> typing.Any:
+    order = message_class()
+    order.id = str(uuid.UUID(int=rng.getrandbits(128)))
+    order.metadata.creation_timestamp.FromSeconds(rng.randrange(1700000000, 1800000000))
+    order.spec.template_id = rng.choice(["ocp_4_17_small", "ocp_4_17_medium", "ocp_4_17_large"])
+    return order
+
+def _pack_any(target: typing.Any, kind: str, value: typing.Any) -> None:
+    match kind:
+        case "bool":
+            message = wrappers_pb2.BoolValue(value=value)
+        case "int32":
+            message = wrappers_pb2.Int32Value(value=value)
+        case "int64":
+            message = wrappers_pb2.Int64Value(value=value)
+        case "float":
+            message = wrappers_pb2.FloatValue(value=value)
+        case "double":
+            message = wrappers_pb2.DoubleValue(value=value)
+        case "string":
+            message = wrappers_pb2.StringValue(value=value)
+        case "timestamp":
+            message = timestamp_pb2.Timestamp(seconds=value)
+        case "duration":
+            message = duration_pb2.Duration(seconds=value)
+        case "bytes":
+            message = wrappers_pb2.BytesValue(value=value)
+        case "json":
+            message = struct_pb2.Value()
+            message.struct_value.update(value)
+    target.Pack(message)
+
+def _pack_typed(target: typing.Any, kind: str, value: typing.Any) -> None:
+    match kind:
+        case "timestamp":
+            target.timestamp_value.seconds = value
+        case "duration":
+            target.duration_value.seconds = value
+        case "json":
+            target.json_value.struct_value.update(value)
+        case _:
+            setattr(target, f"{kind}_value", value)
+
+def _decode_any(order: typing.Any) -> dict[str, typing.Any]:
+    pool = descriptor_pool.Default()
+    result = {}
+    for name, value in order.spec.template_parameters.items():
+        # This is what a generic client needs to do: find the message type from the URL, and then parse the bytes:
+        type_name = value.type_url.split("/")[-1]
+        message_class = message_factory.GetMessageClass(pool.FindMessageTypeByName(type_name))
+        message = message_class.FromString(value.value)
+        result[name] = _python_value(type_name, message)
+    return result
+
+def _decode_typed(order: typing.Any) -> dict[str, typing.Any]:
+    result = {}
+    for name, value in order.spec.template_parameter_values.items():
+        field = value.WhichOneof("value")
+        result[name] = _python_value(field, getattr(value, field))
+    return result
+
+def _python_value(kind: str, value: typing.Any) -> typing.Any:
+    match kind:
+        case "google.protobuf.Timestamp" | "timestamp_value" | "google.protobuf.Duration" | "duration_value":
+            return value.seconds
+        case "google.protobuf.Value" | "json_value":
+            return dict(value.struct_value)
+        case "google.protobuf.BoolValue" | "google.protobuf.Int32Value" | "google.protobuf.Int64Value" | \
+             "google.protobuf.FloatValue" | "google.protobuf.DoubleValue" | "google.protobuf.StringValue" | \
+             "google.protobuf.BytesValue":
+            return value.value
+        case _:
+            return value
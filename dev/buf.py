@@ -18,11 +18,14 @@
 Functions to simplify use of the 'buf' tool.
 """
 
+import functools
 import json
 
+@functools.cache
 def gen_yaml(out_dir: str) -> str:
     """
-    Generates the content of the 'buf.gen.yaml' file.
+    Generates the content of the 'buf.gen.yaml' file. The result is cached, as it is the same for the same output
+    directory.
     """
     return json.dumps({
         "version":"v1",
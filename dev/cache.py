@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Content addressed cache for downloaded artifacts.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+
+class Cache:
+    """
+    Stores files using the SHA-256 checksum of their content as the name. When the total size of the files exceeds the
+    limit the least recently used ones are removed. The modification time of the files is used to track when they were
+    last used, because the access time isn't reliable when file systems are mounted with 'noatime'.
+
+    Files returned by the 'get' and 'put' methods are pinned, and pinned files are never removed, so that one thread
+    can't remove a file that another thread is still using. Call the 'release' method when the file isn't needed.
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        max_size: int,
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self._files_dir = directory / "sha256"
+        self._partial_dir = directory / "partial"
+        self._lock = threading.Lock()
+        self._pins: dict[str, int] = {}
+
+    def get(self, checksum: str) -> pathlib.Path | None:
+        """
+        Returns the path of the cached file that has the given checksum, or None if there is no such file. The file
+        is pinned till the 'release' method is called.
+        """
+        checksum = checksum.lower()
+        file = self._files_dir / checksum
+        with self._lock:
+            try:
+                os.utime(file)
+            except FileNotFoundError:
+                return None
+            self._pins[checksum] = self._pins.get(checksum, 0) + 1
+        return file
+
+    def release(self, checksum: str) -> None:
+        """
+        Releases a file returned by the 'get' or 'put' methods, so that it can be removed when the cache is full.
+        """
+        checksum = checksum.lower()
+        with self._lock:
+            count = self._pins.get(checksum, 0) - 1
+            if count > 0:
+                self._pins[checksum] = count
+            else:
+                self._pins.pop(checksum, None)
+
+    def partial(self, checksum: str) -> pathlib.Path:
+        """
+        Returns the path where a partially downloaded file with the given checksum should be stored, so that the
+        download can be resumed later. These files aren't part of the cache, and don't count for the size limit.
+        """
+        self._partial_dir.mkdir(parents=True, exist_ok=True)
+        return self._partial_dir / checksum.lower()
+
+    def put(self, file: pathlib.Path, checksum: str) -> pathlib.Path:
+        """
+        Moves the given file, which must have the given checksum, into the cache and returns the new path. The file
+        is pinned till the 'release' method is called.
+        """
+        checksum = checksum.lower()
+        self._files_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self._files_dir, prefix=".tmp-")
+        os.close(fd)
+        shutil.move(file, tmp_name)
+        cached_file = self._files_dir / checksum
+        with self._lock:
+            os.replace(tmp_name, cached_file)
+            self._pins[checksum] = self._pins.get(checksum, 0) + 1
+        self.evict()
+        return cached_file
+
+    def seed(self, directory: pathlib.Path) -> None:
+        """
+        Adds to the cache copies of all the files inside the given directory. This is intended to populate the cache
+        in environments that don't have network access, using files that have been downloaded by other means.
+        """
+        count = 0
+        for file in sorted(directory.rglob("*")):
+            if not file.is_file():
+                continue
+            digest = hashlib.sha256()
+            with open(file, "rb") as stream:
+                while chunk := stream.read(1 << 20):
+                    digest.update(chunk)
+            checksum = digest.hexdigest()
+            if (self._files_dir / checksum).exists():
+                continue
+            self._files_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self._files_dir, prefix=".tmp-")
+            os.close(fd)
+            shutil.copyfile(file, tmp_name)
+            os.replace(tmp_name, self._files_dir / checksum)
+            count += 1
+        logging.info(f"Added {count} files from '{directory}' to the cache")
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used files till the total size is below the limit. Pinned files are never removed,
+        even if they are larger than the limit.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for file in self._files_dir.iterdir():
+                if file.name.startswith("."):
+                    continue
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file))
+                total += stat.st_size
+            entries.sort()
+            for _, size, file in entries:
+                if total <= self.max_size:
+                    break
+                if file.name in self._pins:
+                    continue
+                logging.info(f"Removing '{file.name}' from the cache")
+                file.unlink(missing_ok=True)
+                total -= size
@@ -0,0 +1,600 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Asynchronous client for the API, that can send the requests using gRPC or the HTTP+JSON routes of the gateway. For
+example:
+
+    async with Client("localhost:8000") as client:
+        order = await client.cluster_orders.get(id)
+        async for order in client.cluster_orders.items(filter="state = 'FAILED'"):
+            ...
+
+Every call has a deadline, that is the default of the client unless the call gives a different one. Calls to methods
+that don't change anything, like 'Get' and 'List', are retried with jittered exponential backoff when they fail with
+errors that are usually transient, and optionally hedged: if the response doesn't arrive after a delay the same request
+is sent again, and the first response wins, which reduces the tail latency at the cost of some extra load. Concurrent
+calls to 'Get' methods with identical requests are coalesced into a single request to the server.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import random
+import re
+import typing
+import urllib.parse
+
+import grpc
+import httpx
+from google.api import annotations_pb2
+from google.protobuf import descriptor
+from google.protobuf import json_format
+from google.protobuf import message
+from google.protobuf import message_factory
+
+from fulfillment.v1 import cluster_orders_service_pb2
+from fulfillment.v1 import cluster_templates_service_pb2
+from fulfillment.v1 import clusters_service_pb2
+
+from .errors import Error
+
+# Methods that don't change the state of the server, and that can therefore be retried and hedged:
+_IDEMPOTENT = {"Get", "List", "BatchGet", "GetKubeconfig", "Summarize"}
+
+# Methods whose concurrent identical calls are coalesced:
+_COALESCED = {"Get", "GetKubeconfig"}
+
+# gRPC status codes for the numeric codes used in the bodies of the errors of the gateway:
+_CODES = {code.value[0]: code for code in grpc.StatusCode}
+
+# gRPC status codes for the HTTP status codes, for errors whose body doesn't contain a status:
+_HTTP_CODES = {
+    400: grpc.StatusCode.INVALID_ARGUMENT,
+    401: grpc.StatusCode.UNAUTHENTICATED,
+    403: grpc.StatusCode.PERMISSION_DENIED,
+    404: grpc.StatusCode.NOT_FOUND,
+    409: grpc.StatusCode.ABORTED,
+    429: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    499: grpc.StatusCode.CANCELLED,
+    501: grpc.StatusCode.UNIMPLEMENTED,
+    502: grpc.StatusCode.UNAVAILABLE,
+    503: grpc.StatusCode.UNAVAILABLE,
+    504: grpc.StatusCode.DEADLINE_EXCEEDED,
+}
+
+# Regular expression that matches the variables of the path templates of the 'google.api.http' annotations:
+_VARIABLE = re.compile(r"\{([^}=]+)(=[^}]*)?\}")
+
+class RetryPolicy:
+    """
+    Configuration of the retries of idempotent calls. The delay before each retry is random, between zero and the
+    initial backoff multiplied by two for each previous retry, limited to the maximum backoff, and the retries stop
+    when the deadline of the call would expire.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        initial_backoff: float = 0.1,
+        max_backoff: float = 2,
+        codes: typing.Iterable[grpc.StatusCode] = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.RESOURCE_EXHAUSTED),
+    ):
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.codes = frozenset(codes)
+
+class HedgingPolicy:
+    """
+    Configuration of the hedging of idempotent calls. If the response to a request doesn't arrive after the delay
+    the request is sent again, up to the maximum number of attempts, and the first successful response is used. A good
+    delay is the 95th percentile of the latency of the method, so that only the slowest requests are sent again.
+    Failures with the codes of the retry policy start the next attempt immediately, other failures end the call.
+    """
+
+    def __init__(self, delay: float = 0.05, max_attempts: int = 2):
+        self.delay = delay
+        self.max_attempts = max_attempts
+
+class _Transport:
+    """
+    Base class for the ways to send requests to the server.
+    """
+
+    async def call(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        timeout: float,
+    ) -> message.Message:
+        """
+        Sends the request and returns the response, or raises an 'Error'.
+        """
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        pass
+
+class _GrpcTransport(_Transport):
+    """
+    Sends the requests using a pool of gRPC channels. Each channel has its own HTTP/2 connection, that multiplexes the
+    concurrent requests sent with it, and requests are distributed among the channels in turns.
+    """
+
+    def __init__(self, address: str, channels: int, token: str | None):
+        # Channels created with the same arguments share connections by default, so each one needs its own pool:
+        options = [("grpc.use_local_subchannel_pool", 1)]
+        self._channels = [grpc.aio.insecure_channel(address, options=options) for _ in range(channels)]
+        self._next = 0
+        self._metadata = [("authorization", f"Bearer {token}")] if token is not None else None
+        self._callables = {}
+
+    async def call(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        timeout: float,
+    ) -> message.Message:
+        index = self._next
+        self._next = (index + 1) % len(self._channels)
+        key = (index, method.full_name)
+        callable = self._callables.get(key)
+        if callable is None:
+            response_class = message_factory.GetMessageClass(method.output_type)
+            callable = self._channels[index].unary_unary(
+                f"/{method.containing_service.full_name}/{method.name}",
+                request_serializer=lambda request: request.SerializeToString(),
+                response_deserializer=response_class.FromString,
+            )
+            self._callables[key] = callable
+        try:
+            return await callable(request, timeout=timeout, metadata=self._metadata)
+        except grpc.aio.AioRpcError as error:
+            raise Error(error.code(), error.details() or "")
+
+    async def close(self) -> None:
+        for channel in self._channels:
+            await channel.close()
+
+class _HttpTransport(_Transport):
+    """
+    Sends the requests to the HTTP+JSON routes of the gateway, translating them according to the 'google.api.http'
+    annotations of the methods, like the gateway does in the other direction. Connections are kept alive and reused,
+    and HTTP/2 is used when the 'h2' package is installed and the server supports it.
+    """
+
+    def __init__(self, address: str, connections: int, token: str | None):
+        http2 = importlib.util.find_spec("h2") is not None
+        headers = {"Authorization": f"Bearer {token}"} if token is not None else {}
+        self._client = httpx.AsyncClient(
+            base_url=address if "://" in address else f"http://{address}",
+            headers=headers,
+            http2=http2,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        )
+
+    async def call(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        timeout: float,
+    ) -> message.Message:
+        options = method.GetOptions()
+        if not options.HasExtension(annotations_pb2.http):
+            raise Error(grpc.StatusCode.UNIMPLEMENTED, f"Method '{method.full_name}' doesn't have an HTTP route")
+        rule = options.Extensions[annotations_pb2.http]
+        verb = rule.WhichOneof("pattern")
+        template = getattr(rule, verb)
+
+        # Replace the variables of the path with the values of the fields, which are then excluded from the query and
+        # from the body:
+        excluded = {match[1] for match in _VARIABLE.finditer(template)}
+        path = _VARIABLE.sub(
+            lambda match: urllib.parse.quote(str(_field(request, match[1])), safe=""),
+            template,
+        )
+        content = None
+        params = []
+        if rule.body == "*":
+            body = type(request)()
+            body.CopyFrom(request)
+            for name in excluded:
+                if "." not in name:
+                    body.ClearField(name)
+            content = json_format.MessageToJson(body, preserving_proto_field_name=True, indent=None)
+        else:
+            if rule.body != "":
+                excluded.add(rule.body)
+                content = json_format.MessageToJson(
+                    getattr(request, rule.body),
+                    preserving_proto_field_name=True,
+                    indent=None,
+                )
+            _query(request, excluded, "", params)
+
+        try:
+            response = await self._client.request(
+                verb.upper(),
+                path,
+                params=params,
+                content=content,
+                headers={"Content-Type": "application/json"} if content is not None else None,
+                timeout=timeout,
+            )
+        except httpx.TimeoutException:
+            raise Error(grpc.StatusCode.DEADLINE_EXCEEDED, f"Request to '{path}' timed out")
+        except httpx.TransportError as error:
+            raise Error(grpc.StatusCode.UNAVAILABLE, f"Request to '{path}' failed: {error}")
+
+        result = message_factory.GetMessageClass(method.output_type)()
+        if response.status_code == 304 and "not_modified" in result.DESCRIPTOR.fields_by_name:
+            result.not_modified = True
+            return result
+        if response.status_code >= 400:
+            raise _http_error(response)
+        target = getattr(result, rule.response_body) if rule.response_body != "" else result
+        if len(response.content) > 0:
+            json_format.Parse(response.content, target, ignore_unknown_fields=True)
+        return result
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+def _field(request: message.Message, path: str) -> typing.Any:
+    value = request
+    for name in path.split("."):
+        value = getattr(value, name)
+    return value
+
+def _query(request: message.Message, excluded: set[str], prefix: str, params: list[tuple[str, str]]) -> None:
+    """
+    Adds to the list the query parameters for the fields of the request that are set, excluding the ones that are in
+    the path or in the body. Nested messages are added with dot separated names.
+    """
+    for field, value in request.ListFields():
+        path = prefix + field.name
+        if path in excluded:
+            continue
+        values = value if field.is_repeated else [value]
+        if field.message_type is None:
+            params.extend((path, _text(field, item)) for item in values)
+            continue
+        match field.message_type.full_name:
+            case "google.protobuf.FieldMask":
+                params.append((path, ",".join(value.paths)))
+            case "google.protobuf.Timestamp" | "google.protobuf.Duration":
+                params.append((path, value.ToJsonString()))
+            case _:
+                if not field.is_repeated:
+                    _query(value, excluded, f"{path}.", params)
+
+def _text(field: descriptor.FieldDescriptor, value: typing.Any) -> str:
+    match field.type:
+        case descriptor.FieldDescriptor.TYPE_BOOL:
+            return "true" if value else "false"
+        case descriptor.FieldDescriptor.TYPE_ENUM:
+            return field.enum_type.values_by_number[value].name
+        case _:
+            return str(value)
+
+def _http_error(response: httpx.Response) -> Error:
+    try:
+        status = response.json()
+        code = _CODES.get(status.get("code"))
+        if code is not None:
+            return Error(code, status.get("message", ""))
+    except ValueError:
+        pass
+    code = _HTTP_CODES.get(response.status_code, grpc.StatusCode.UNKNOWN)
+    return Error(code, f"Server responded with status {response.status_code}")
+
+class Client:
+    """
+    Asynchronous client for the API.
+
+    The transport is 'grpc' or 'http'. For gRPC the client opens the given number of channels to the address and
+    distributes the requests among them. For HTTP it keeps up to the given number of connections alive. The timeout is
+    the default deadline of the calls, in seconds, including retries and hedged attempts.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        transport: str = "grpc",
+        token: str | None = None,
+        timeout: float = 10,
+        channels: int = 4,
+        connections: int = 100,
+        retry: RetryPolicy | None = None,
+        hedging: HedgingPolicy | None = None,
+        coalesce: bool = True,
+    ):
+        if transport == "grpc":
+            self._transport = _GrpcTransport(address, channels, token)
+        elif transport == "http":
+            self._transport = _HttpTransport(address, connections, token)
+        else:
+            raise Exception(f"Transport '{transport}' isn't supported, it should be 'grpc' or 'http'")
+        self._timeout = timeout
+        self._retry = retry if retry is not None else RetryPolicy()
+        self._hedging = hedging
+        self._coalesce = coalesce
+        self._inflight = {}
+
+        self.cluster_templates = Collection(
+            self,
+            cluster_templates_service_pb2.DESCRIPTOR.services_by_name["ClusterTemplates"],
+        )
+        self.cluster_orders = Collection(
+            self,
+            cluster_orders_service_pb2.DESCRIPTOR.services_by_name["ClusterOrders"],
+        )
+        self.clusters = Collection(
+            self,
+            clusters_service_pb2.DESCRIPTOR.services_by_name["Clusters"],
+        )
+
+    async def __aenter__(self) -> "Client":
+        return self
+
+    async def __aexit__(self, *args: typing.Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._transport.close()
+
+    async def call(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        timeout: float | None = None,
+    ) -> message.Message:
+        """
+        Calls a unary method, applying the deadline, the retries, the hedging and the coalescing of requests.
+        """
+        if not self._coalesce or method.name not in _COALESCED:
+            return await self._invoke(method, request, timeout)
+
+        # Concurrent identical calls share the same task. The task is shielded, so that cancelling one of the callers
+        # doesn't cancel the others, and each caller gets its own copy of the response, so that they can modify it.
+        key = (method.full_name, request.SerializeToString(deterministic=True), timeout)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._invoke(method, request, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda task: self._finish(key, task))
+        response = await asyncio.shield(task)
+        result = type(response)()
+        result.CopyFrom(response)
+        return result
+
+    def _finish(self, key: tuple, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+
+        # Retrieve the exception, so that it isn't reported as unhandled when all the callers were cancelled:
+        if not task.cancelled():
+            task.exception()
+
+    async def _invoke(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        timeout: float | None,
+    ) -> message.Message:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self._timeout)
+        if method.name not in _IDEMPOTENT:
+            return await self._attempt(method, request, deadline)
+        if self._hedging is not None:
+            return await self._hedge(method, request, deadline)
+        attempt = 1
+        while True:
+            try:
+                return await self._attempt(method, request, deadline)
+            except Error as error:
+                if error.code not in self._retry.codes or attempt >= self._retry.max_attempts:
+                    raise
+                backoff = min(self._retry.max_backoff, self._retry.initial_backoff * 2 ** (attempt - 1))
+                delay = random.uniform(0, backoff)
+                if loop.time() + delay >= deadline:
+                    raise
+                logging.debug(f"Call to '{method.full_name}' failed with {error.code.name}, retrying in {delay:.3f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _hedge(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        deadline: float,
+    ) -> message.Message:
+        tasks = []
+        pending = set()
+        error = None
+        try:
+            while True:
+                if len(tasks) < self._hedging.max_attempts:
+                    task = asyncio.ensure_future(self._attempt(method, request, deadline))
+                    tasks.append(task)
+                    pending.add(task)
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self._hedging.delay if len(tasks) < self._hedging.max_attempts else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    try:
+                        return task.result()
+                    except Error as failure:
+                        if failure.code not in self._retry.codes:
+                            raise
+                        error = failure
+                if len(pending) == 0 and len(tasks) >= self._hedging.max_attempts:
+                    raise error
+        finally:
+            # Cancel the attempts that are still running, and retrieve the results of the others, so that their
+            # failures aren't reported as unhandled:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    async def _attempt(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        deadline: float,
+    ) -> message.Message:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise Error(grpc.StatusCode.DEADLINE_EXCEEDED, f"Deadline of call to '{method.full_name}' expired")
+        return await self._transport.call(method, request, remaining)
+
+class Collection:
+    """
+    Methods of one collection of objects, like the orders or the clusters. Methods return the objects, instead of the
+    response messages, except 'list', that returns the response so that the caller has the total and the page token,
+    and 'get_kubeconfig', that returns it so that the caller has the hash.
+    """
+
+    def __init__(self, client: Client, service: descriptor.ServiceDescriptor):
+        self._client = client
+        self._service = service
+
+    def _method(self, name: str) -> descriptor.MethodDescriptor:
+        """
+        Returns the descriptor of the method, or raises an error if the service doesn't have it. For example, the
+        templates can't be summarized.
+        """
+        method = self._service.methods_by_name.get(name)
+        if method is None:
+            raise Error(
+                grpc.StatusCode.UNIMPLEMENTED,
+                f"Service '{self._service.full_name}' doesn't have method '{name}'",
+            )
+        return method
+
+    def _request(self, name: str, **fields: typing.Any) -> message.Message:
+        request = message_factory.GetMessageClass(self._method(name).input_type)()
+        for field, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, message.Message):
+                getattr(request, field).CopyFrom(value)
+            else:
+                setattr(request, field, value)
+        return request
+
+    async def get(self, id: str, timeout: float | None = None) -> message.Message:
+        request = self._request("Get", id=id)
+        response = await self._client.call(self._method("Get"), request, timeout)
+        return response.object
+
+    async def create(self, object: message.Message, timeout: float | None = None) -> message.Message:
+        request = self._request("Create", object=object)
+        response = await self._client.call(self._method("Create"), request, timeout)
+        return response.object
+
+    async def update(
+        self,
+        object: message.Message,
+        paths: typing.Iterable[str] | None = None,
+        timeout: float | None = None,
+    ) -> message.Message:
+        """
+        Updates the object. If paths are given only those fields are updated, otherwise the complete object is
+        replaced.
+        """
+        request = self._request("Update", object=object)
+        if paths is not None and "update_mask" in request.DESCRIPTOR.fields_by_name:
+            request.update_mask.paths.extend(paths)
+        response = await self._client.call(self._method("Update"), request, timeout)
+        return response.object
+
+    async def delete(self, id: str, timeout: float | None = None) -> None:
+        request = self._request("Delete", id=id)
+        await self._client.call(self._method("Delete"), request, timeout)
+
+    async def items(
+        self,
+        filter: str | None = None,
+        order: str | None = None,
+        page_size: int = 100,
+        timeout: float | None = None,
+    ) -> typing.AsyncIterator[message.Message]:
+        """
+        Iterates all the objects that match the filter, retrieving them in pages. The timeout applies to each page.
+        """
+        token = None
+        while True:
+            response = await self.list(
+                filter=filter,
+                order=order,
+                limit=page_size,
+                page_token=token,
+                skip_total=True,
+                timeout=timeout,
+            )
+            for item in response.items:
+                yield item
+            token = response.next_page_token
+            if token == "":
+                return
+
+    async def list(
+        self,
+        filter: str | None = None,
+        order: str | None = None,
+        limit: int | None = None,
+        page_token: str | None = None,
+        skip_total: bool | None = None,
+        timeout: float | None = None,
+    ) -> message.Message:
+        request = self._request(
+            "List",
+            filter=filter,
+            order=order,
+            limit=limit,
+            page_token=page_token,
+            skip_total=skip_total,
+        )
+        return await self._client.call(self._method("List"), request, timeout)
+
+    async def get_kubeconfig(
+        self,
+        id: str,
+        if_none_match: str | None = None,
+        timeout: float | None = None,
+    ) -> message.Message:
+        """
+        Retrieves the Kubeconfig of a cluster. If the hash of the Kubeconfig that the caller already has is given, and
+        it hasn't changed, the response only has the 'not_modified' field set.
+        """
+        request = self._request("GetKubeconfig", id=id, if_none_match=if_none_match)
+        return await self._client.call(self._method("GetKubeconfig"), request, timeout)
+
+    async def summarize(
+        self,
+        filter: str | None = None,
+        group_by: typing.Iterable[str] | None = None,
+        timeout: float | None = None,
+    ) -> message.Message:
+        request = self._request("Summarize", filter=filter)
+        if group_by is not None:
+            request.group_by.extend(group_by)
+        return await self._client.call(self._method("Summarize"), request, timeout)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Errors returned by the client.
+"""
+
+import grpc
+
+class Error(Exception):
+    """
+    Error returned by the server, or generated by the client, with the gRPC status code that describes it. Errors of
+    requests sent using HTTP+JSON are translated to the same codes.
+    """
+
+    def __init__(self, code: grpc.StatusCode, message: str):
+        super().__init__(f"{code.name}: {message}")
+        self.code = code
+        self.message = message
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Informer that keeps a local copy of the orders or the clusters, so that clients don't need to poll the 'List' methods.
+
+The informer retrieves all the objects once with the 'ListStream' method, and then keeps the copy current applying the
+events received from the 'Watch' method of the 'Events' service, starting from the version returned by the list. Reads
+are local lookups, and the only load that the informer puts on the server is one watch stream. For example:
+
+    informer = Informer(channel, "cluster_orders", filter="template_id = 'ocp_4_17_small'")
+    informer.add_handler(on_update=lambda old, new: print(f"Order '{new.id}' changed"))
+    informer.start()
+    informer.wait_for_sync()
+    failed = informer.index("status.state", cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED)
+"""
+
+import logging
+import random
+import threading
+import typing
+
+import grpc
+from google.protobuf import field_mask_pb2
+from google.protobuf import message
+
+from events.v1 import event_type_pb2
+from events.v1 import events_service_pb2
+from events.v1 import events_service_pb2_grpc
+from fulfillment.v1 import cluster_order_type_pb2
+from fulfillment.v1 import cluster_orders_service_pb2
+from fulfillment.v1 import cluster_orders_service_pb2_grpc
+from fulfillment.v1 import cluster_type_pb2
+from fulfillment.v1 import clusters_service_pb2
+from fulfillment.v1 import clusters_service_pb2_grpc
+
+from .. import expressions
+
+class _Kind:
+    """
+    Description of a kind of object that an informer can keep: the class of the objects, the way to list them, the
+    name of the payload of the events that contain them and the default indexes.
+    """
+
+    def __init__(
+        self,
+        message_class: type[message.Message],
+        stub_class: type,
+        request_class: type[message.Message],
+        payload: str,
+        indexes: list[str],
+    ):
+        self.message_class = message_class
+        self.stub_class = stub_class
+        self.request_class = request_class
+        self.payload = payload
+        self.indexes = indexes
+
+_KINDS = {
+    "cluster_orders": _Kind(
+        message_class=cluster_order_type_pb2.ClusterOrder,
+        stub_class=cluster_orders_service_pb2_grpc.ClusterOrdersStub,
+        request_class=cluster_orders_service_pb2.ClusterOrdersListStreamRequest,
+        payload="cluster_order",
+        indexes=["status.state", "spec.template_id"],
+    ),
+    "clusters": _Kind(
+        message_class=cluster_type_pb2.Cluster,
+        stub_class=clusters_service_pb2_grpc.ClustersStub,
+        request_class=clusters_service_pb2.ClustersListStreamRequest,
+        payload="cluster",
+        indexes=["status.state"],
+    ),
+}
+
+class _Relist(Exception):
+    """
+    Raised when the cache is found to be inconsistent with the events, so that the objects are listed again.
+    """
+
+class _Handler:
+    """
+    Functions called when objects are added to the cache, updated or deleted. Any of them can be 'None'.
+    """
+
+    def __init__(
+        self,
+        on_add: typing.Callable[[message.Message], None] | None,
+        on_update: typing.Callable[[message.Message, message.Message], None] | None,
+        on_delete: typing.Callable[[message.Message], None] | None,
+    ):
+        self.on_add = on_add
+        self.on_update = on_update
+        self.on_delete = on_delete
+
+class Informer:
+    """
+    Local copy of the orders or the clusters that match a filter, kept current with the events of the server.
+
+    The objects are indexed by identifier, and by the values of the fields given in the 'indexes' parameter, which are
+    'status.state' and 'spec.template_id' for orders and 'status.state' for clusters by default. Values of enumerated
+    types are indexed by number. The objects returned by the methods of the informer are shared with the cache, so they
+    must not be modified.
+
+    The optional filter uses the syntax of the 'filter' parameter of the 'List' methods. The server applies it to the
+    initial list, and the informer applies it to the objects received in events, so objects that stop matching it are
+    removed from the cache as if they had been deleted.
+
+    Memory is bounded in three ways: the filter selects the objects, the optional 'fields' parameter selects the fields
+    that are kept for each object, in addition to the identifier, the metadata and the indexed fields, and the optional
+    'max_objects' parameter limits the number of objects. Exceeding that limit stops the informer with an error instead
+    of silently dropping objects, because an incomplete cache would give wrong answers. The informer processes each
+    event completely, including the calls to the handlers, before reading the next one, so slow handlers don't
+    accumulate events in memory: the server keeps them, and if it can't keep more it terminates the watch, and the
+    informer lists the objects again.
+
+    The handlers are called from the thread of the informer, one at a time, in the order of the events. When the watch
+    can't be resumed, for example because the server no longer retains the events after the last version seen, the
+    informer lists the objects again and calls the handlers for the differences. When a resync period is given the
+    'on_update' function of the handlers is also called periodically for all the objects, with the same object as the
+    old and the new version, so that controllers can check again the objects that they failed to process.
+    """
+
+    def __init__(
+        self,
+        channel: grpc.Channel,
+        kind: str,
+        filter: str | None = None,
+        indexes: list[str] | None = None,
+        fields: list[str] | None = None,
+        max_objects: int | None = None,
+        resync_period: float | None = None,
+        batch_window: float | None = None,
+        backoff: float = 1,
+        max_backoff: float = 30,
+    ):
+        if kind not in _KINDS:
+            raise Exception(f"Kind '{kind}' isn't supported, it should be one of {', '.join(_KINDS)}")
+        self._kind = _KINDS[kind]
+        self._list_stream = self._kind.stub_class(channel).ListStream
+        self._watch_method = events_service_pb2_grpc.EventsStub(channel).Watch
+        self._filter = filter or ""
+        self._predicate = expressions.predicate(self._kind.message_class, self._filter)
+        self._max_objects = max_objects
+        self._resync_period = resync_period
+        self._batch_window = batch_window
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+
+        # The indexes use the same field accessors than the compiled filters, so that timestamps are indexed by their
+        # number of nanoseconds and enumerated types by their numbers:
+        self._indexes = {}
+        for path in indexes if indexes is not None else self._kind.indexes:
+            self._indexes[path] = (expressions.getter(self._kind.message_class, path, "index"), {})
+
+        # The indexed fields are always kept, even if they aren't in the list of fields:
+        self._mask = None
+        if fields is not None:
+            paths = ["id", "metadata", *fields, *(path for path in self._indexes if path not in fields)]
+            self._mask = field_mask_pb2.FieldMask(paths=paths)
+
+        self._lock = threading.RLock()
+        self._objects = {}
+        self._version = 0
+        self._handlers = []
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._resync_thread = None
+        self._call = None
+        self._error = None
+
+    def add_handler(
+        self,
+        on_add: typing.Callable[[message.Message], None] | None = None,
+        on_update: typing.Callable[[message.Message, message.Message], None] | None = None,
+        on_delete: typing.Callable[[message.Message], None] | None = None,
+    ) -> None:
+        """
+        Adds functions that will be called when objects are added, updated or deleted. If the cache already contains
+        objects the 'on_add' function is called for each of them before returning.
+        """
+        handler = _Handler(on_add, on_update, on_delete)
+        with self._lock:
+            self._handlers.append(handler)
+            if on_add is not None:
+                for object in self._objects.values():
+                    self._call_handler(on_add, object)
+
+    def start(self) -> None:
+        """
+        Starts the thread that lists and watches the objects.
+        """
+        self._thread = threading.Thread(target=self._run, name=f"informer-{self._kind.payload}", daemon=True)
+        self._thread.start()
+        if self._resync_period is not None:
+            self._resync_thread = threading.Thread(target=self._resync, name="informer-resync", daemon=True)
+            self._resync_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the informer and waits for its threads to finish. The cache keeps the objects that it had.
+        """
+        self._stopped.set()
+        call = self._call
+        if call is not None:
+            call.cancel()
+        for thread in [self._thread, self._resync_thread]:
+            if thread is not None:
+                thread.join()
+
+    def wait_for_sync(self, timeout: float | None = None) -> bool:
+        """
+        Waits till the initial list has been loaded into the cache. Returns 'False' if the timeout expires before that.
+        Raises an exception if the informer stopped because of an error.
+        """
+        result = self._synced.wait(timeout)
+        if self._error is not None:
+            raise self._error
+        return result
+
+    @property
+    def synced(self) -> bool:
+        return self._synced.is_set()
+
+    @property
+    def resource_version(self) -> int:
+        """
+        Version of the server state that the cache reflects.
+        """
+        return self._version
+
+    def get(self, id: str) -> message.Message | None:
+        """
+        Returns the object with the given identifier, or 'None' if it isn't in the cache.
+        """
+        return self._objects.get(id)
+
+    def objects(self) -> list[message.Message]:
+        """
+        Returns all the objects of the cache.
+        """
+        with self._lock:
+            return list(self._objects.values())
+
+    def index(self, path: str, value: typing.Any) -> list[message.Message]:
+        """
+        Returns the objects that have the given value in the given indexed field.
+        """
+        _, index = self._index(path)
+        with self._lock:
+            return [self._objects[id] for id in index.get(value, ())]
+
+    def counts(self, path: str) -> dict[typing.Any, int]:
+        """
+        Returns the number of objects for each value of the given indexed field.
+        """
+        _, index = self._index(path)
+        with self._lock:
+            return {value: len(ids) for value, ids in index.items()}
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def _index(self, path: str) -> tuple[typing.Callable, dict]:
+        entry = self._indexes.get(path)
+        if entry is None:
+            raise Exception(f"Field '{path}' isn't indexed, indexed fields are {', '.join(self._indexes)}")
+        return entry
+
+    def _run(self) -> None:
+        backoff = self._backoff
+        relist = True
+        while not self._stopped.is_set():
+            try:
+                if relist:
+                    self._relist()
+                    relist = False
+                self._watch()
+                backoff = self._backoff
+            except _Relist as error:
+                logging.warning(f"{error}, listing again")
+                relist = True
+            except grpc.RpcError as error:
+                if self._stopped.is_set():
+                    break
+                code = error.code()
+                if code in (grpc.StatusCode.OUT_OF_RANGE, grpc.StatusCode.RESOURCE_EXHAUSTED):
+                    # The server no longer has all the events after the last version, or it discarded them because
+                    # they weren't consumed fast enough, so the only way to recover is to list again:
+                    logging.info(f"Watch of {self._kind.payload} objects can't be resumed ({code.name}), listing again")
+                    relist = True
+                    continue
+                logging.warning(
+                    f"Watch of {self._kind.payload} objects failed ({code.name}: {error.details()}), retrying in "
+                    f"{backoff:.1f} seconds"
+                )
+                self._stopped.wait(backoff * random.uniform(0.5, 1.5))
+                backoff = min(2 * backoff, self._max_backoff)
+            except Exception as error:
+                logging.error(f"Informer of {self._kind.payload} objects failed: {error}")
+                self._error = error
+                self._synced.set()
+                return
+
+    def _relist(self) -> None:
+        request = self._kind.request_class()
+        if self._filter != "":
+            request.filter = self._filter
+        if self._mask is not None:
+            request.read_mask.CopyFrom(self._mask)
+        self._call = self._list_stream(request)
+        objects = {}
+        version = 0
+        for response in self._call:
+            version = response.resource_version
+            for item in response.items:
+                objects[item.id] = item
+            self._check_size(len(objects))
+        with self._lock:
+            for id in list(self._objects):
+                if id not in objects:
+                    self._delete(id)
+            for object in objects.values():
+                self._put(object, check=False)
+            self._version = version
+        self._synced.set()
+        logging.debug(f"Listed {len(objects)} {self._kind.payload} objects at version {version}")
+
+    def _watch(self) -> None:
+        # When there is a filter the events need to contain the complete objects, because an update may make an object
+        # that wasn't in the cache match the filter. Otherwise only the changed fields are requested, to save bandwidth.
+        request = events_service_pb2.EventsWatchRequest(
+            filter=f'event.{self._kind.payload}.id != ""',
+            since_resource_version=self._version,
+            changed_fields_only=self._predicate is None,
+        )
+        if self._batch_window is not None:
+            request.batch_window.FromNanoseconds(int(self._batch_window * 1e9))
+        self._call = self._watch_method(request)
+        for response in self._call:
+            events = list(response.events)
+            if response.HasField("event"):
+                events.append(response.event)
+            with self._lock:
+                for event in events:
+                    self._apply(event)
+
+    def _apply(self, event: event_type_pb2.Event) -> None:
+        object = getattr(event, self._kind.payload)
+        if event.type == event_type_pb2.EVENT_TYPE_OBJECT_DELETED:
+            if object.id in self._objects:
+                self._delete(object.id)
+        elif event.type == event_type_pb2.EVENT_TYPE_OBJECT_UPDATED and len(event.changed_fields.paths) > 0:
+            # The event contains only the fields that changed, so they are applied to a copy of the cached object. The
+            # object should always be in the cache, as these events are only requested when there is no filter.
+            current = self._objects.get(object.id)
+            if current is None:
+                raise _Relist(f"Received changes for {self._kind.payload} object '{object.id}' that isn't in the cache")
+            updated = self._kind.message_class()
+            updated.CopyFrom(current)
+            event.changed_fields.MergeMessage(object, updated, replace_message_field=True, replace_repeated_field=True)
+            updated.metadata.CopyFrom(object.metadata)
+            self._put(updated)
+        else:
+            self._put(object)
+        self._version = max(self._version, event.resource_version)
+
+    def _put(self, object: message.Message, check: bool = True) -> None:
+        """
+        Adds the object to the cache or replaces the existing one, and calls the handlers. Objects that don't match the
+        filter are removed. The check of the filter is skipped for objects returned by the server for the list, as the
+        server already applied the filter, and they may not contain the fields that it uses.
+        """
+        if check and self._predicate is not None and not self._predicate(object):
+            if object.id in self._objects:
+                self._delete(object.id)
+            return
+        if self._mask is not None:
+            projected = self._kind.message_class()
+            self._mask.MergeMessage(object, projected)
+            object = projected
+        old = self._objects.get(object.id)
+        if old is not None and old.metadata.resource_version == object.metadata.resource_version:
+            return
+        if old is None:
+            self._check_size(len(self._objects) + 1)
+        else:
+            self._unindex(old)
+        self._objects[object.id] = object
+        for function, index in self._indexes.values():
+            index.setdefault(function(object), set()).add(object.id)
+        for handler in self._handlers:
+            if old is None and handler.on_add is not None:
+                self._call_handler(handler.on_add, object)
+            elif old is not None and handler.on_update is not None:
+                self._call_handler(handler.on_update, old, object)
+
+    def _delete(self, id: str) -> None:
+        object = self._objects.pop(id)
+        self._unindex(object)
+        for handler in self._handlers:
+            if handler.on_delete is not None:
+                self._call_handler(handler.on_delete, object)
+
+    def _unindex(self, object: message.Message) -> None:
+        for function, index in self._indexes.values():
+            value = function(object)
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(object.id)
+                if len(ids) == 0:
+                    del index[value]
+
+    def _check_size(self, size: int) -> None:
+        if self._max_objects is not None and size > self._max_objects:
+            raise Exception(
+                f"Number of {self._kind.payload} objects exceeds the limit of {self._max_objects}, use a more "
+                f"selective filter or increase the limit"
+            )
+
+    def _resync(self) -> None:
+        while not self._stopped.wait(self._resync_period):
+            if not self._synced.is_set():
+                continue
+            with self._lock:
+                for object in list(self._objects.values()):
+                    for handler in self._handlers:
+                        if handler.on_update is not None:
+                            self._call_handler(handler.on_update, object, object)
+
+    def _call_handler(self, function: typing.Callable, *args: message.Message) -> None:
+        try:
+            function(*args)
+        except Exception as error:
+            logging.error(f"Handler of {self._kind.payload} objects failed: {error}")
@@ -18,9 +18,28 @@
 Funcions to run and evaluate commands.
 """
 
+import contextlib
 import logging
 import shlex
 import subprocess
+import threading
+
+# Per thread flag that indicates if the output of the commands should be captured and sent to the log:
+_local = threading.local()
+
+@contextlib.contextmanager
+def capture():
+    """
+    Captures the output of the commands that are run by the current thread and sends it to the log instead of writing
+    it directly to the terminal. This is intended for commands that run concurrently, so that their output isn't
+    mixed.
+    """
+    saved = getattr(_local, "capture", False)
+    _local.capture = True
+    try:
+        yield
+    finally:
+        _local.capture = saved
 
 def run(
     args: list[str],
@@ -31,8 +50,20 @@ def run(
     """
     cmd = ' '.join(map(shlex.quote, args))
     logging.debug(f"Running command '{cmd}'")
-    result = subprocess.run(args=args, **kwargs)
+    if not getattr(_local, "capture", False) or "stdout" in kwargs or "capture_output" in kwargs:
+        result = subprocess.run(args=args, **kwargs)
+        logging.debug(f"Exit code of '{cmd}' is {result.returncode}")
+        return
+
+    # Capture the output and send it to the log before checking the exit code, so that the output is available
+    # also when the command fails:
+    check = kwargs.pop("check", False)
+    result = subprocess.run(args=args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **kwargs)
+    for line in result.stdout.decode("utf-8", errors="replace").splitlines():
+        logging.debug(line)
     logging.debug(f"Exit code of '{cmd}' is {result.returncode}")
+    if check:
+        result.check_returncode()
 
 def eval(
     args: list[str],
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Compression algorithms used by the reference server and by the benchmarks. The 'gzip' algorithm is always available.
+The 'zstd' algorithm is available when the Python version includes the 'compression.zstd' module, or when the
+'zstandard' package is installed.
+"""
+
+import gzip
+import typing
+import zlib
+
+# Size in bytes of the smallest message that is compressed. Smaller messages save few bytes, sometimes they even grow,
+# and the time spent compressing them is better spent elsewhere. This is the threshold documented in the specification.
+THRESHOLD = 1024
+
+class Stream:
+    """
+    Compresses a sequence of messages as one single stream, so that repeated content is compressed also across
+    messages. The output of each message is flushed, so that the receiver can decompress it without waiting for the
+    next one.
+    """
+
+    def __init__(self, compress: typing.Callable[[bytes], bytes], finish: typing.Callable[[], bytes]):
+        self.compress = compress
+        self.finish = finish
+
+class Compressor:
+    """
+    Compression algorithm, with the name used in the HTTP 'Content-Encoding' header.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compress: typing.Callable[[bytes], bytes],
+        decompress: typing.Callable[[bytes], bytes],
+        stream: typing.Callable[[], Stream],
+    ):
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+        self.stream = stream
+
+def _gzip() -> Compressor:
+    # Level 6 is the default of the 'gzip' command and of most HTTP servers, the Python default is 9:
+    def stream() -> Stream:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return Stream(
+            compress=lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            finish=lambda: compressor.flush(zlib.Z_FINISH),
+        )
+
+    return Compressor(
+        name="gzip",
+        compress=lambda data: gzip.compress(data, compresslevel=6, mtime=0),
+        decompress=gzip.decompress,
+        stream=stream,
+    )
+
+def _zstd() -> Compressor | None:
+    try:
+        from compression import zstd
+
+        def stream() -> Stream:
+            compressor = zstd.ZstdCompressor()
+            return Stream(
+                compress=lambda data: compressor.compress(data, mode=zstd.ZstdCompressor.FLUSH_BLOCK),
+                finish=lambda: compressor.flush(mode=zstd.ZstdCompressor.FLUSH_FRAME),
+            )
+
+        return Compressor(name="zstd", compress=zstd.compress, decompress=zstd.decompress, stream=stream)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        return None
+
+    # The compressor and decompressor objects of this package can't be used by several threads at the same time, so a
+    # new one is used for each call, or for each stream:
+    def stream() -> Stream:
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        return Stream(
+            compress=lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            finish=lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH),
+        )
+
+    return Compressor(
+        name="zstd",
+        compress=lambda data: zstandard.compress(data, 3),
+        decompress=lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+        stream=stream,
+    )
+
+# Available algorithms, indexed by name, in order of preference:
+COMPRESSORS = {
+    compressor.name: compressor
+    for compressor in [_zstd(), _gzip()]
+    if compressor is not None
+}
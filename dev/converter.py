@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions to convert OpenAPI version 2 specifications to version 3.
+
+The result is intended to be identical to what the 'swagger-codegen-cli' tool generates with the 'openapi-yaml'
+language, including the order of the fields and the YAML formatting, so that the tools can be used interchangeably.
+"""
+
+import re
+import typing
+
+import yaml
+
+# Order of the fields of the objects, as written by the Java tool:
+_INFO_FIELDS = ["title", "description", "termsOfService", "contact", "license", "version"]
+_TAG_FIELDS = ["name", "description", "externalDocs"]
+_METHODS = ["get", "put", "post", "delete", "options", "head", "patch"]
+_OPERATION_FIELDS = ["tags", "summary", "description", "externalDocs", "operationId"]
+_SCHEMA_FIELDS = [
+    "title", "multipleOf", "maximum", "exclusiveMaximum", "minimum", "exclusiveMinimum", "maxLength", "minLength",
+    "pattern", "maxItems", "minItems", "uniqueItems", "maxProperties", "minProperties", "required", "type", "not",
+    "properties", "additionalProperties", "description", "format", "$ref", "nullable", "readOnly", "writeOnly",
+    "example", "externalDocs", "deprecated", "xml", "default", "enum", "items",
+]
+_PARAMETER_SCHEMA_FIELDS = [
+    "type", "format", "items", "default", "enum", "maximum", "exclusiveMaximum", "minimum", "exclusiveMinimum",
+    "maxLength", "minLength", "pattern", "maxItems", "minItems", "uniqueItems", "multipleOf",
+]
+
+# Pattern added to the schemas of strings that contain base64 encoded bytes:
+_BYTE_PATTERN = "^(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$"
+
+def convert(v2: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """
+    Converts the given OpenAPI version 2 specification, parsed from JSON, to version 3.
+    """
+    return _Converter(v2).convert()
+
+def dump(v3: dict[str, typing.Any]) -> str:
+    """
+    Writes the given OpenAPI version 3 specification as YAML, using the same style than the Java tool.
+    """
+    return yaml.dump(
+        v3,
+        Dumper=_Dumper,
+        allow_unicode=True,
+        default_flow_style=False,
+        sort_keys=False,
+        width=80,
+        indent=2,
+    )
+
+class _Converter:
+    """
+    Converts one specification. Inline object schemas used in request and response bodies are moved to the
+    components section, in the order that they are found.
+    """
+
+    def __init__(self, v2: dict[str, typing.Any]):
+        self._v2 = v2
+        self._schemas = {}
+        self._extracted = {}
+
+    def convert(self) -> dict[str, typing.Any]:
+        v2 = self._v2
+        v3 = {
+            "openapi": "3.0.1",
+        }
+        info = v2.get("info")
+        if info is not None:
+            v3["info"] = _pick(info, _INFO_FIELDS)
+        v3["servers"] = self._servers()
+        tags = v2.get("tags")
+        if tags is not None:
+            v3["tags"] = [_pick(tag, _TAG_FIELDS) for tag in tags]
+
+        # Convert the definitions first, so that the names of the extracted schemas can be checked for conflicts:
+        for name, schema in v2.get("definitions", {}).items():
+            self._schemas[name] = self._schema(schema)
+        paths = {}
+        for path, item in v2.get("paths", {}).items():
+            paths[path] = self._path(path, item)
+        v3["paths"] = paths
+        schemas = dict(self._schemas)
+        schemas.update(self._extracted)
+        if len(schemas) > 0:
+            v3["components"] = {
+                "schemas": schemas,
+            }
+        v3.update(_extensions(v2))
+        v3["x-original-swagger-version"] = v2.get("swagger", "2.0")
+        return v3
+
+    def _servers(self) -> list[dict[str, typing.Any]]:
+        v2 = self._v2
+        host = v2.get("host")
+        base_path = v2.get("basePath", "/")
+        if host is None:
+            return [{"url": base_path}]
+        schemes = v2.get("schemes", ["http"])
+        return [{"url": f"{scheme}://{host}{base_path}"} for scheme in schemes]
+
+    def _path(self, path: str, item: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        result = {}
+        for method in _METHODS:
+            operation = item.get(method)
+            if operation is not None:
+                result[method] = self._operation(path, operation, item.get("parameters", []))
+        return result
+
+    def _operation(
+        self,
+        path: str,
+        operation: dict[str, typing.Any],
+        common_parameters: list[dict[str, typing.Any]],
+    ) -> dict[str, typing.Any]:
+        result = _pick(operation, _OPERATION_FIELDS)
+
+        # Separate the body parameter from the rest:
+        body = None
+        parameters = []
+        for parameter in common_parameters + operation.get("parameters", []):
+            if parameter.get("in") == "body":
+                body = parameter
+            else:
+                parameters.append(self._parameter(parameter))
+        if len(parameters) > 0:
+            result["parameters"] = parameters
+        if body is not None:
+            result["requestBody"] = self._request_body(path, operation, body)
+
+        # Convert the responses:
+        produces = operation.get("produces", self._v2.get("produces", ["application/json"]))
+        responses = {}
+        for code, response in operation.get("responses", {}).items():
+            responses[code] = self._response(code, response, produces)
+        result["responses"] = responses
+        if operation.get("deprecated"):
+            result["deprecated"] = True
+        result.update(_extensions(operation))
+        if body is not None:
+            result["x-codegen-request-body-name"] = body["name"]
+        return result
+
+    def _parameter(self, parameter: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        location = parameter["in"]
+        result = {
+            "name": parameter["name"],
+            "in": location,
+        }
+        if "description" in parameter:
+            result["description"] = parameter["description"]
+        result["required"] = parameter.get("required", False)
+        if location == "query":
+            collection_format = parameter.get("collectionFormat", "csv")
+            result["style"] = "form"
+            result["explode"] = parameter.get("type") != "array" or collection_format == "multi"
+        else:
+            result["style"] = "simple"
+            result["explode"] = False
+        result["schema"] = self._schema(_pick(parameter, _PARAMETER_SCHEMA_FIELDS))
+        return result
+
+    def _request_body(
+        self,
+        path: str,
+        operation: dict[str, typing.Any],
+        body: dict[str, typing.Any],
+    ) -> dict[str, typing.Any]:
+        schema = self._schema(body["schema"])
+        if _is_inline_object(schema):
+            segments = [segment for segment in path.split("/") if segment != ""][-2:]
+            name = "_".join(segments)
+            name = re.sub(r"[{}]", "", name)
+            name = re.sub(r"[^A-Za-z0-9]", "_", name)
+            schema = self._extract(f"{name}_body", schema)
+        consumes = operation.get("consumes", self._v2.get("consumes", ["application/json"]))
+        result = {}
+        if "description" in body:
+            result["description"] = body["description"]
+        result["content"] = {
+            media_type: {"schema": schema}
+            for media_type in consumes
+        }
+        result["required"] = body.get("required", False)
+        return result
+
+    def _response(
+        self,
+        code: str,
+        response: dict[str, typing.Any],
+        produces: list[str],
+    ) -> dict[str, typing.Any]:
+        result = {
+            "description": response.get("description", ""),
+        }
+        headers = response.get("headers")
+        if headers is not None:
+            result["headers"] = {
+                name: self._header(header)
+                for name, header in headers.items()
+            }
+        if "schema" in response:
+            schema = self._schema(response["schema"])
+            if _is_inline_object(schema):
+                schema = self._extract(schema.get("title", f"inline_response_{code}"), schema)
+            result["content"] = {
+                media_type: {"schema": schema}
+                for media_type in produces
+            }
+        result.update(_extensions(response))
+        return result
+
+    def _header(self, header: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        result = {}
+        if "description" in header:
+            result["description"] = header["description"]
+        result["style"] = "simple"
+        result["explode"] = False
+        result["schema"] = self._schema(_pick(header, _PARAMETER_SCHEMA_FIELDS))
+        return result
+
+    def _extract(self, name: str, schema: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        """
+        Adds the given schema to the components section, and returns a reference to it. If there is already an
+        identical schema it is reused, and if there is a different schema with the same name a numeric suffix is added.
+        """
+        for existing_name, existing_schema in self._extracted.items():
+            if existing_schema == schema:
+                return {"$ref": f"#/components/schemas/{existing_name}"}
+        unique_name = name
+        count = 0
+        while unique_name in self._schemas or unique_name in self._extracted:
+            count += 1
+            unique_name = f"{name}_{count}"
+        self._extracted[unique_name] = schema
+        return {"$ref": f"#/components/schemas/{unique_name}"}
+
+    def _schema(self, schema: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        # References can't have other fields:
+        ref = schema.get("$ref")
+        if ref is not None:
+            return {"$ref": ref.replace("#/definitions/", "#/components/schemas/")}
+
+        # Convert the nested schemas:
+        result = dict(schema)
+        if "properties" in result:
+            result["properties"] = {
+                name: self._schema(value)
+                for name, value in result["properties"].items()
+            }
+        if "items" in result:
+            result["items"] = self._schema(result["items"])
+        if "not" in result:
+            result["not"] = self._schema(result["not"])
+        additional = result.get("additionalProperties")
+        if isinstance(additional, dict):
+            if len(additional) == 0:
+                result["additionalProperties"] = {"type": "object"}
+            else:
+                result["additionalProperties"] = self._schema(additional)
+        if "allOf" in result:
+            result["allOf"] = [self._schema(value) for value in result["allOf"]]
+        if result.get("type") == "string" and result.get("format") == "byte" and "pattern" not in result:
+            result["pattern"] = _BYTE_PATTERN
+        if "x-nullable" in result:
+            result["nullable"] = result.pop("x-nullable")
+        return _pick(result, _SCHEMA_FIELDS, extra=True)
+
+def _pick(
+    value: dict[str, typing.Any],
+    fields: list[str],
+    extra: bool = False,
+) -> dict[str, typing.Any]:
+    """
+    Returns a copy of the given object containing the given fields, in that order, followed by the specification
+    extensions. If the 'extra' parameter is true any other field is also copied, after the known ones.
+    """
+    result = {}
+    for field in fields:
+        if field in value:
+            result[field] = value[field]
+    if extra:
+        for field, field_value in value.items():
+            if field not in result and not field.startswith("x-"):
+                result[field] = field_value
+    result.update(_extensions(value))
+    return result
+
+def _extensions(value: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """
+    Returns the specification extensions, the fields whose names start with 'x-'.
+    """
+    return {
+        field: field_value
+        for field, field_value in value.items()
+        if field.startswith("x-")
+    }
+
+def _is_inline_object(schema: dict[str, typing.Any]) -> bool:
+    """
+    Checks if the given schema is an object defined inline, as those are moved to the components section.
+    """
+    return "$ref" not in schema and schema.get("type") == "object" and "properties" in schema
+
+# Values that need to be quoted because otherwise they would be interpreted as booleans or nulls:
+_RESERVED = {
+    "~",
+    "true", "True", "TRUE", "false", "False", "FALSE",
+    "yes", "Yes", "YES", "no", "No", "NO",
+    "y", "Y", "n", "N",
+    "on", "On", "ON", "off", "Off", "OFF",
+    "null", "Null", "NULL",
+}
+
+# Values that need to be quoted because otherwise they would be interpreted as numbers:
+_NUMBER = re.compile(r"[0-9]*(\.[0-9]*)?")
+
+class _Dumper(yaml.SafeDumper):
+    """
+    Writes keys and strings with the quoting style that the Java tool uses: literal blocks for multiple lines, double
+    quotes for values that could be confused with other types or that contain flow indicators, and plain otherwise.
+    When the plain style isn't possible the emitter falls back to single quotes.
+    """
+
+    def represent_str(self, data: str) -> yaml.ScalarNode:
+        if "\n" in data:
+            style = "|"
+        elif _needs_quotes(data):
+            style = '"'
+        else:
+            style = None
+        return self.represent_scalar("tag:yaml.org,2002:str", data, style=style)
+
+    def represent_dict(self, data: dict[str, typing.Any]) -> yaml.MappingNode:
+        node = yaml.MappingNode("tag:yaml.org,2002:map", [], flow_style=False)
+        for key, value in data.items():
+            style = '"' if key in _RESERVED or _looks_like_number(key) else None
+            key_node = yaml.ScalarNode("tag:yaml.org,2002:str", key, style=style)
+            node.value.append((key_node, self.represent_data(value)))
+        return node
+
+    def ignore_aliases(self, data: typing.Any) -> bool:
+        return True
+
+_Dumper.add_representer(str, _Dumper.represent_str)
+_Dumper.add_representer(dict, _Dumper.represent_dict)
+
+def _needs_quotes(value: str) -> bool:
+    if value in _RESERVED or _NUMBER.fullmatch(value):
+        return True
+    for i, c in enumerate(value):
+        if c in "[]{},":
+            return True
+        if c == "#" and (i == 0 or value[i - 1] in " \t"):
+            return True
+        if c == ":" and (i == len(value) - 1 or value[i + 1] in " \t"):
+            return True
+    return False
+
+def _looks_like_number(value: str) -> bool:
+    if value == "":
+        return False
+    first = value[0]
+    if first.isdigit():
+        return True
+    return first in "-+." and len(value) > 1 and value[1].isdigit()
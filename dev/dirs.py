@@ -31,6 +31,12 @@ def bin() -> pathlib.Path:
     """
     return project() / "bin"
 
+def build() -> pathlib.Path:
+    """
+    Returns the build directory of the project, where generated files that aren't part of the source are placed.
+    """
+    return project() / "build"
+
 def dev() -> pathlib.Path:
     """
     Returns the 'dev' directory of the project, where the development tools (build scripts, etc) are placed.
@@ -69,3 +75,14 @@ def local_lib() -> pathlib.Path:
     Returns the local directory for installation of tool libraries.
     """
     return local() / "lib"
+
+@functools.cache
+def cache() -> pathlib.Path:
+    """
+    Returns the directory where downloaded artifacts are cached. This is shared by all the copies of the project, so it
+    is inside the user cache directory, and not inside the project.
+    """
+    base = os.getenv("XDG_CACHE_HOME")
+    if base is None or base == "":
+        base = pathlib.Path.home() / ".cache"
+    return pathlib.Path(base) / "fulfillment-api"
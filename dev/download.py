@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions to download and verify artifacts.
+"""
+
+import hashlib
+import logging
+import pathlib
+import threading
+
+import requests
+import requests.adapters
+
+from . import cache
+
+# Size of the chunks used to read the responses and partially downloaded files:
+_CHUNK_SIZE = 1 << 20
+
+# Seconds to wait for the connection to the server, and for each read of the response. The read timeout applies to each
+# read and not to the complete download, so large artifacts aren't affected, but a stalled server fails the download,
+# leaving the partial file so that the next attempt resumes it:
+_CONNECT_TIMEOUT = 10
+_READ_TIMEOUT = 60
+
+class Downloader:
+    """
+    Downloads artifacts and verifies their checksums, keeping them in a cache so that they don't need to be downloaded
+    again. When offline artifacts are only taken from the cache.
+
+    All the downloads use the same HTTP session, so connections to the same server are reused. The session is safe to
+    use from multiple threads, and the size of the connection pool is given by the 'connections' parameter.
+    """
+
+    def __init__(
+        self,
+        cache: cache.Cache,
+        offline: bool = False,
+        connections: int = 10,
+    ):
+        self.cache = cache
+        self.offline = offline
+        self._local = threading.local()
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=connections,
+            pool_maxsize=connections,
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def download(self, url: str, checksum: str) -> pathlib.Path:
+        """
+        Returns the path of a local copy of the artifact with the given URL and checksum, downloading it if it isn't
+        already in the cache. The returned file is owned by the cache, so it should be copied and not modified. It
+        is pinned in the cache till the thread that downloaded it calls the 'release' method.
+
+        The checksum is calculated while the data is received, so the file is written once and never read again. If
+        a previous download was interrupted it is resumed, requesting only the missing bytes.
+        """
+        # Try the cache first:
+        checksum = checksum.lower()
+        cached_file = self.cache.get(checksum)
+        if cached_file is not None:
+            logging.info(f"Using cached copy of '{url}'")
+            self._pinned().append(checksum)
+            return cached_file
+        if self.offline:
+            raise Exception(f"Artifact '{url}' with checksum '{checksum}' isn't cached and downloads are disabled")
+
+        # If there is a partial download then hash what we already have, as we need to include it in the checksum,
+        # and ask the server only for the rest:
+        partial_file = self.cache.partial(checksum)
+        digest = hashlib.sha256()
+        offset = 0
+        if partial_file.exists():
+            with open(partial_file, "rb") as stream:
+                while chunk := stream.read(_CHUNK_SIZE):
+                    digest.update(chunk)
+                    offset += len(chunk)
+        headers = {}
+        if offset > 0:
+            logging.info(f"Resuming download of '{url}' from byte {offset}")
+            headers["Range"] = f"bytes={offset}-"
+        else:
+            logging.info(f"Downloading '{url}'")
+
+        # Download the rest of the artifact. Note that servers that don't support ranges will send the complete file,
+        # so in that case we need to discard what we had.
+        with self._session.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=(_CONNECT_TIMEOUT, _READ_TIMEOUT),
+        ) as response:
+            if response.status_code == 416:
+                logging.info(f"Server rejected range for '{url}', downloading it again")
+                partial_file.unlink()
+                return self.download(url, checksum)
+            response.raise_for_status()
+            if offset > 0 and response.status_code != 206:
+                digest = hashlib.sha256()
+                offset = 0
+            mode = "ab" if offset > 0 else "wb"
+            with open(partial_file, mode) as stream:
+                for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                    digest.update(chunk)
+                    stream.write(chunk)
+
+        # Verify the checksum, and discard the file if it doesn't match, as otherwise the next attempt would try to
+        # resume it:
+        actual_checksum = digest.hexdigest()
+        if actual_checksum != checksum:
+            partial_file.unlink()
+            raise Exception(
+                f"Failed to verify checksum of '{url}', expected '{checksum}' but got '{actual_checksum}'"
+            )
+        logging.info(f"Verified checksum of '{url}'")
+        cached_file = self.cache.put(partial_file, checksum)
+        self._pinned().append(checksum)
+        return cached_file
+
+    def release(self) -> None:
+        """
+        Releases the files that the current thread obtained with the 'download' method, so that the cache can remove
+        them when it is full.
+        """
+        pinned = self._pinned()
+        while pinned:
+            self.cache.release(pinned.pop())
+
+    def _pinned(self) -> list[str]:
+        pinned = getattr(self._local, "pinned", None)
+        if pinned is None:
+            pinned = []
+            self._local.pinned = pinned
+        return pinned
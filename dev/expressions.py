@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Compiler of the 'filter' and 'order' expressions of the API, shared by the reference server and by the clients. The
+grammars are documented in the specification. Expressions are parsed and checked against the descriptor of the message
+type, and translated into Python functions that extract the values of the fields and evaluate the conditions.
+"""
+
+import functools
+import operator
+import re
+import typing
+
+from google.protobuf import descriptor
+from google.protobuf import message
+from google.protobuf import timestamp_pb2
+
+# A filter is first parsed into a tree of tuples, where the first element is the kind of node:
+#
+#   ("or", [node, ...])
+#   ("and", [node, ...])
+#   ("not", node)
+#   ("compare", operator, path, literal)
+#   ("in", path, [literal, ...], negated)
+#   ("like", path, pattern, negated)
+#   ("field", path)
+#
+# Literals are tuples containing the kind and the value, for example ("string", "FULFILLED") or ("number", "42").
+Node = tuple
+
+Predicate = typing.Callable[[message.Message], bool]
+
+# Dialects of the expressions. The 'sql' dialect is used by the 'List' methods and the 'cel' dialect by the 'Watch'
+# method. They differ in the spelling of the operators and in the syntax of strings and lists.
+SQL = "sql"
+CEL = "cel"
+
+_LEXERS = {
+    SQL: re.compile(r"""
+        (?P<space>\s+)
+        | (?P<string>'(?:[^']|'')*')
+        | (?P<number>-?[0-9]+(?:\.[0-9]+)?)
+        | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+        | (?P<symbol><=|>=|!=|<>|[=<>(),.])
+    """, re.VERBOSE),
+    CEL: re.compile(r"""
+        (?P<space>\s+)
+        | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+        | (?P<number>-?[0-9]+(?:\.[0-9]+)?)
+        | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+        | (?P<symbol>==|!=|<=|>=|&&|\|\||[<>!()\[\],.])
+    """, re.VERBOSE),
+}
+
+# Spelling of the comparison operators in each dialect, and the name used for them in the tree:
+_OPERATORS = {
+    SQL: {"=": "==", "!=": "!=", "<>": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="},
+    CEL: {"==": "==", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="},
+}
+
+_FUNCTIONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# Types of fields that contain integer numbers:
+_INTEGERS = {
+    descriptor.FieldDescriptor.TYPE_INT32,
+    descriptor.FieldDescriptor.TYPE_INT64,
+    descriptor.FieldDescriptor.TYPE_UINT32,
+    descriptor.FieldDescriptor.TYPE_UINT64,
+    descriptor.FieldDescriptor.TYPE_SINT32,
+    descriptor.FieldDescriptor.TYPE_SINT64,
+    descriptor.FieldDescriptor.TYPE_FIXED32,
+    descriptor.FieldDescriptor.TYPE_FIXED64,
+    descriptor.FieldDescriptor.TYPE_SFIXED32,
+    descriptor.FieldDescriptor.TYPE_SFIXED64,
+}
+
+_FLOATS = {
+    descriptor.FieldDescriptor.TYPE_FLOAT,
+    descriptor.FieldDescriptor.TYPE_DOUBLE,
+}
+
+# Prefixes that are tried, in order, for names of fields that aren't top level fields in the 'sql' dialect:
+SHORTCUTS = ["spec.", "status."]
+
+class Error(Exception):
+    """
+    Error raised when an expression isn't valid, or uses fields or values that don't exist in the message type.
+    """
+
+class Parser:
+    """
+    Recursive descent parser for the filter and order expressions.
+    """
+
+    def __init__(self, text: str, dialect: str, what: str):
+        self._text = text
+        self._dialect = dialect
+        self._what = what
+        self._tokens = self._tokenize()
+        self._position = 0
+
+    def filter(self) -> Node:
+        node = self._or()
+        self._expect_end()
+        return node
+
+    def order(self) -> list[tuple[str, bool]]:
+        keys = []
+        while True:
+            path = self._field()
+            descending = False
+            if self._keyword("desc"):
+                descending = True
+            else:
+                self._keyword("asc")
+            keys.append((path, descending))
+            if not self._symbol(","):
+                break
+        self._expect_end()
+        return keys
+
+    def _tokenize(self) -> list[tuple[str, str, int]]:
+        lexer = _LEXERS[self._dialect]
+        tokens = []
+        position = 0
+        while position < len(self._text):
+            match = lexer.match(self._text, position)
+            if match is None:
+                raise self._error(f"unexpected character '{self._text[position]}'", position)
+            if match.lastgroup != "space":
+                tokens.append((match.lastgroup, match.group(), position))
+            position = match.end()
+        tokens.append(("end", "", len(self._text)))
+        return tokens
+
+    def _or(self) -> Node:
+        nodes = [self._and()]
+        while self._keyword("or") if self._dialect == SQL else self._symbol("||"):
+            nodes.append(self._and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def _and(self) -> Node:
+        nodes = [self._not()]
+        while self._keyword("and") if self._dialect == SQL else self._symbol("&&"):
+            nodes.append(self._not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def _not(self) -> Node:
+        if self._keyword("not") if self._dialect == SQL else self._symbol("!"):
+            return ("not", self._not())
+        return self._term()
+
+    def _term(self) -> Node:
+        if self._symbol("("):
+            node = self._or()
+            self._expect_symbol(")")
+            return node
+        path = self._field()
+        if self._dialect == SQL:
+            negated = self._keyword("not")
+            if self._keyword("in"):
+                return ("in", path, self._list("(", ")"), negated)
+            if self._keyword("like"):
+                kind, text, position = self._next()
+                if kind != "string":
+                    raise self._error("expected a string after 'like'", position)
+                return ("like", path, self._unquote(text), negated)
+            if negated:
+                raise self._error("expected 'in' or 'like' after 'not'", self._peek()[2])
+        elif self._keyword("in", case_sensitive=True):
+            return ("in", path, self._list("[", "]"), False)
+        kind, text, position = self._peek()
+        name = _OPERATORS[self._dialect].get(text) if kind == "symbol" else None
+        if name is None:
+            if self._dialect == CEL:
+                return ("field", path)
+            raise self._error("expected a comparison operator", position)
+        self._position += 1
+        return ("compare", name, path, self._literal())
+
+    def _field(self) -> str:
+        names = [self._name()]
+        while self._symbol("."):
+            names.append(self._name())
+        if self._dialect == CEL:
+            if names[0] != "event" or len(names) < 2:
+                raise self._error("fields must start with 'event.'", self._peek()[2])
+            names = names[1:]
+        return ".".join(names)
+
+    def _name(self) -> str:
+        kind, text, position = self._next()
+        if kind != "name":
+            raise self._error("expected a field name", position)
+        return text
+
+    def _list(self, start: str, end: str) -> list[tuple[str, typing.Any]]:
+        self._expect_symbol(start)
+        values = [self._literal()]
+        while self._symbol(","):
+            values.append(self._literal())
+        self._expect_symbol(end)
+        return values
+
+    def _literal(self) -> tuple[str, typing.Any]:
+        kind, text, position = self._next()
+        if kind == "string":
+            return ("string", self._unquote(text))
+        if kind == "number":
+            return ("number", text)
+        if kind == "name":
+            if text.lower() in ("true", "false") and (self._dialect == SQL or text in ("true", "false")):
+                return ("bool", text.lower() == "true")
+            if self._dialect == CEL:
+                return ("name", text)
+        raise self._error("expected a value", position)
+
+    def _unquote(self, text: str) -> str:
+        if self._dialect == SQL:
+            return text[1:-1].replace("''", "'")
+        return re.sub(r"\\(.)", r"\1", text[1:-1])
+
+    def _peek(self) -> tuple[str, str, int]:
+        return self._tokens[self._position]
+
+    def _next(self) -> tuple[str, str, int]:
+        token = self._tokens[self._position]
+        if token[0] != "end":
+            self._position += 1
+        return token
+
+    def _keyword(self, keyword: str, case_sensitive: bool = False) -> bool:
+        kind, text, _ = self._peek()
+        if kind == "name" and (text == keyword if case_sensitive else text.lower() == keyword):
+            self._position += 1
+            return True
+        return False
+
+    def _symbol(self, symbol: str) -> bool:
+        kind, text, _ = self._peek()
+        if kind == "symbol" and text == symbol:
+            self._position += 1
+            return True
+        return False
+
+    def _expect_symbol(self, symbol: str) -> None:
+        if not self._symbol(symbol):
+            raise self._error(f"expected '{symbol}'", self._peek()[2])
+
+    def _expect_end(self) -> None:
+        kind, _, position = self._peek()
+        if kind != "end":
+            raise self._error("unexpected text", position)
+
+    def _error(self, problem: str, position: int) -> Error:
+        return Error(f"{self._what.capitalize()} '{self._text}' isn't valid: {problem} at position {position}")
+
+class Field:
+    """
+    Field of a message type, resolved from a path, with a function that extracts its value from the messages.
+    Timestamps are extracted as integer numbers of nanoseconds, like in the indexes of the store.
+    """
+
+    def __init__(self, path: str, descriptor: descriptor.FieldDescriptor):
+        self.path = path
+        self.descriptor = descriptor
+        self.timestamp = descriptor.message_type is not None
+        getter = operator.attrgetter(path)
+        if self.timestamp:
+            self.get = lambda object: getter(object).ToNanoseconds()
+        else:
+            self.get = getter
+
+def resolve(message_class: type, path: str, shortcuts: list[str], what: str) -> Field:
+    """
+    Finds the field that corresponds to a path, and checks that it is a field whose values can be compared.
+    """
+    candidates = [path]
+    if path.split(".")[0] not in message_class.DESCRIPTOR.fields_by_name:
+        candidates.extend(prefix + path for prefix in shortcuts)
+    for candidate in candidates:
+        field = _lookup(message_class.DESCRIPTOR, candidate)
+        if field is None:
+            continue
+        comparable = (
+            not field.is_repeated and
+            field.type != descriptor.FieldDescriptor.TYPE_BYTES and
+            (field.message_type is None or field.message_type.full_name == "google.protobuf.Timestamp")
+        )
+        if not comparable:
+            raise Error(f"Field '{path}' used in {what} can't be compared")
+        return Field(candidate, field)
+    raise Error(f"Field '{path}' used in {what} doesn't exist")
+
+def _lookup(message_descriptor: descriptor.Descriptor, path: str) -> descriptor.FieldDescriptor | None:
+    field = None
+    for name in path.split("."):
+        if message_descriptor is None:
+            return None
+        field = message_descriptor.fields_by_name.get(name)
+        if field is None:
+            return None
+        if field.message_type is not None and not field.is_repeated:
+            message_descriptor = field.message_type
+        else:
+            message_descriptor = None
+    return field
+
+def literal_value(field: Field, literal: tuple[str, typing.Any], what: str) -> typing.Any:
+    """
+    Converts a literal to the Python value that is compared with the values of the field.
+    """
+    kind, text = literal
+    type = field.descriptor.type
+    result = None
+    if field.timestamp:
+        if kind == "string":
+            timestamp = timestamp_pb2.Timestamp()
+            try:
+                timestamp.FromJsonString(text)
+                result = timestamp.ToNanoseconds()
+            except ValueError:
+                pass
+    elif type == descriptor.FieldDescriptor.TYPE_ENUM:
+        enum = field.descriptor.enum_type
+        if kind in ("string", "name"):
+            value = enum.values_by_name.get(text) or enum.values_by_name.get(_enum_prefix(enum) + text)
+            if value is not None:
+                result = value.number
+        elif kind == "number" and text.lstrip("-").isdigit():
+            result = int(text)
+    elif type == descriptor.FieldDescriptor.TYPE_BOOL:
+        if kind == "bool":
+            result = text
+    elif type == descriptor.FieldDescriptor.TYPE_STRING:
+        if kind == "string":
+            result = text
+    elif type in _INTEGERS:
+        if kind == "number" and text.lstrip("-").isdigit():
+            result = int(text)
+    elif type in _FLOATS:
+        if kind == "number":
+            result = float(text)
+    if result is None:
+        raise Error(f"Value '{text}' used in {what} isn't valid for field '{field.path}'")
+    return result
+
+@functools.cache
+def _enum_prefix(enum: descriptor.EnumDescriptor) -> str:
+    """
+    Returns the prefix of the names of the values of an enumerated type, for example 'CLUSTER_ORDER_STATE_' for the
+    'ClusterOrderState' type.
+    """
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", enum.name).upper() + "_"
+
+def _like(pattern: str, what: str) -> re.Pattern:
+    """
+    Translates a 'like' pattern into a regular expression. The '%' character matches any sequence of characters and
+    '_' matches any single character, unless they are preceded by a backslash, which also escapes itself.
+    """
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    if escaped:
+        raise Error(f"Pattern '{pattern}' used in {what} ends with an escape character")
+    return re.compile("".join(parts), re.DOTALL)
+
+class Compiler:
+    """
+    Translates the nodes of a parsed filter into Python functions.
+    """
+
+    def __init__(self, message_class: type, shortcuts: list[str], what: str):
+        self._message_class = message_class
+        self._shortcuts = shortcuts
+        self._what = what
+
+    def field(self, path: str) -> Field:
+        return resolve(self._message_class, path, self._shortcuts, self._what)
+
+    def compile(self, node: Node) -> Predicate:
+        match node[0]:
+            case "or":
+                predicates = [self.compile(child) for child in node[1]]
+                return lambda object: any(predicate(object) for predicate in predicates)
+            case "and":
+                predicates = [self.compile(child) for child in node[1]]
+                return lambda object: all(predicate(object) for predicate in predicates)
+            case "not":
+                predicate = self.compile(node[1])
+                return lambda object: not predicate(object)
+            case "compare":
+                _, name, path, literal = node
+                field = self.field(path)
+                get = field.get
+                value = literal_value(field, literal, self._what)
+                if name == "==":
+                    return lambda object: get(object) == value
+                function = _FUNCTIONS[name]
+                return lambda object: function(get(object), value)
+            case "in":
+                _, path, literals, negated = node
+                field = self.field(path)
+                get = field.get
+                values = frozenset(literal_value(field, literal, self._what) for literal in literals)
+                if negated:
+                    return lambda object: get(object) not in values
+                return lambda object: get(object) in values
+            case "like":
+                _, path, pattern, negated = node
+                field = self.field(path)
+                if field.descriptor.type != descriptor.FieldDescriptor.TYPE_STRING:
+                    raise Error(
+                        f"Field '{path}' used in {self._what} isn't a string, so it can't be used with 'like'"
+                    )
+                get = field.get
+                match = _like(pattern, self._what).fullmatch
+                if negated:
+                    return lambda object: match(get(object)) is None
+                return lambda object: match(get(object)) is not None
+            case "field":
+                field = self.field(node[1])
+                if field.descriptor.type != descriptor.FieldDescriptor.TYPE_BOOL:
+                    raise Error(f"Field '{node[1]}' used alone in {self._what} isn't a boolean")
+                return field.get
+
+@functools.lru_cache(maxsize=1024)
+def predicate(message_class: type, filter: str, dialect: str = SQL) -> Predicate | None:
+    """
+    Compiles a filter, written in the given dialect, into a function that checks the messages of the given type.
+    Returns 'None' if the filter is empty. Results are cached.
+    """
+    if filter.strip() == "":
+        return None
+    node = Parser(filter, dialect, "filter").filter()
+    return Compiler(message_class, SHORTCUTS if dialect == SQL else [], "filter").compile(node)
+
+@functools.lru_cache(maxsize=1024)
+def getter(message_class: type, path: str, what: str = "order") -> typing.Callable[[message.Message], typing.Any]:
+    """
+    Returns the function that extracts from the messages of the given type the value of the field with the given path,
+    as it is compared by the filters and sorted by the orders. Results are cached.
+    """
+    return resolve(message_class, path, SHORTCUTS, what).get
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions to calculate fingerprints of the inputs and outputs of build stages, so that stages can be skipped when
+nothing has changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+from . import dirs
+
+class Fingerprint:
+    """
+    Accumulates the content of files and strings into a SHA-256 digest.
+    """
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+
+    def text(self, *values: str) -> "Fingerprint":
+        """
+        Adds the given strings.
+        """
+        for value in values:
+            data = value.encode("utf-8")
+            self._digest.update(f"{len(data)}:".encode("utf-8"))
+            self._digest.update(data)
+        return self
+
+    def file(self, file: pathlib.Path, name: str | None = None) -> "Fingerprint":
+        """
+        Adds the name and content of the given file. The name defaults to the path of the file, but it can be
+        replaced with a relative path so that the result doesn't depend on where the project is.
+        """
+        if name is None:
+            name = str(file)
+        self.text(name)
+        try:
+            self.text(file.read_bytes().decode("utf-8", errors="surrogateescape"))
+        except FileNotFoundError:
+            self.text("")
+        return self
+
+    def tree(self, directory: pathlib.Path, pattern: str = "*") -> "Fingerprint":
+        """
+        Adds the names, relative to the project directory, and the content of all the files inside the given
+        directory that match the given pattern.
+        """
+        project_dir = dirs.project()
+        for file in sorted(directory.rglob(pattern)):
+            if file.is_file():
+                self.file(file, name=str(file.relative_to(project_dir)))
+        return self
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+def output(*files: pathlib.Path) -> str | None:
+    """
+    Returns the fingerprint of the given output files, or None if any of them doesn't exist.
+    """
+    result = Fingerprint()
+    for file in files:
+        if not file.exists():
+            return None
+        result.file(file, name=file.name)
+    return result.hexdigest()
+
+class State:
+    """
+    Stores the fingerprints of the inputs and outputs of each stage the last time that it was successfully completed.
+    The state is saved inside the local directory, separately for each copy of the project.
+    """
+
+    def __init__(self, name: str):
+        self.file = dirs.local() / "state" / f"{name}.json"
+        self._key = str(dirs.project())
+        self._stages = {}
+        try:
+            with open(self.file, encoding="utf-8") as stream:
+                self._stages = json.load(stream).get(self._key, {})
+        except FileNotFoundError:
+            pass
+        except ValueError as err:
+            logging.warning(f"Ignoring invalid state file '{self.file}': {err}")
+
+    def is_fresh(self, stage: str, inputs: str, outputs: str | None) -> bool:
+        """
+        Checks if the given stage was already completed with the same inputs, and if its outputs haven't changed
+        since then.
+        """
+        saved = self._stages.get(stage)
+        if saved is None or outputs is None:
+            return False
+        return saved.get("inputs") == inputs and saved.get("outputs") == outputs
+
+    def save(self, stage: str, inputs: str, outputs: str | None) -> None:
+        """
+        Records that the given stage was completed with the given inputs and outputs.
+        """
+        self._stages[stage] = {
+            "inputs": inputs,
+            "outputs": outputs,
+        }
+        content = {}
+        try:
+            with open(self.file, encoding="utf-8") as stream:
+                content = json.load(stream)
+        except (FileNotFoundError, ValueError):
+            pass
+        content[self._key] = self._stages
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.file.with_name(f".{self.file.name}.tmp")
+        with open(tmp_file, encoding="utf-8", mode="w") as stream:
+            json.dump(content, stream, indent=2, sort_keys=True)
+            stream.write("\n")
+        os.replace(tmp_file, self.file)
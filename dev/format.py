@@ -29,7 +29,7 @@ def format(check_only: bool) -> None:
     """
     Formats the source code.
     """
-    args = [tools.BUF.name, "format"]
+    args = [tools.BUF.path, "format"]
     if check_only:
         args.extend([
             "--diff",
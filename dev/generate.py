@@ -14,87 +14,227 @@
 # the License.
 #
 
+import contextlib
+import json
+import logging
 import pathlib
 import shutil
 import tempfile
+import typing
 
 import click
 
 from . import buf
 from . import command
+from . import converter
 from . import dirs
+from . import fingerprint
+from . import python
 from . import tools
 
 @click.group(invoke_without_command=True)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Generate everything, even if the inputs haven't changed.",
+)
+@click.option(
+    "--converter",
+    "converter_name",
+    type=click.Choice(["swagger-codegen", "native"]),
+    default="native",
+    show_default=True,
+    help=(
+        "Tool used to convert OpenAPI version 2 to version 3. The 'native' converter is written in Python and "
+        "generates the same result than 'swagger-codegen' without needing Java."
+    ),
+)
 @click.pass_context
-def generate(ctx: click.Context):
+def generate(ctx: click.Context, force: bool, converter_name: str):
     """
     Generate code.
     """
     if ctx.invoked_subcommand is not None:
         return
-    ctx.invoke(openapi)
+    ctx.invoke(openapi, force=force, converter_name=converter_name)
 
-def openapi() -> None:
+@generate.command(name="python")
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Generate the code, even if the inputs haven't changed.",
+)
+def python_code(force: bool):
+    """
+    Generate the Python code used by the development tools.
+    """
+    python.generate(force=force)
+
+@generate.command(name="converter-fixtures")
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Replace the reference input with the current OpenAPI version 2 specification before converting it.",
+)
+def converter_fixtures(refresh: bool):
+    """
+    Generate the reference files used by the tests of the native converter.
+
+    The reference OpenAPI version 2 specification of the test data directory is converted to version 3 with the
+    'swagger-codegen-cli' tool, so that the tests compare the native converter with the Java tool.
+    """
+    project_dir = dirs.project()
+    data_dir = project_dir / "tests" / "data" / "converter"
+    input_file = data_dir / "swagger-codegen-input.json"
+    output_file = data_dir / "swagger-codegen-output.yaml"
+    if refresh:
+        shutil.copyfile(project_dir / "openapi" / "v2" / "openapi.json", input_file)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_file = pathlib.Path(tmp_dir) / "v3" / "openapi.yaml"
+        openapi_v3(input_file, tmp_file)
+        shutil.move(tmp_file, output_file)
+
+def openapi(
+    force: bool = False,
+    converter_name: str = "native",
+    state: fingerprint.State | None = None,
+    work_dir: pathlib.Path | None = None,
+) -> None:
     """
     Generate the OpenAPI specification.
+
+    Each stage is skipped when the fingerprint of its inputs is the same that it was the last time that it ran, and
+    its output hasn't been modified since then.
+
+    Long running commands can pass the state and a work directory, so that they are reused between runs.
     """
-    # Remove previously generated files:
+    if state is None:
+        state = fingerprint.State("generate")
     project_dir = dirs.project()
     openapi_dir = project_dir / "openapi"
-    v2_dir = openapi_dir / "v2"
+    v2_file = openapi_dir / "v2" / "openapi.json"
+    v3_file = openapi_dir / "v3" / "openapi.yaml"
+
+    # Generate version 2 from the protocol buffers specification:
+    v2_inputs = (
+        fingerprint.Fingerprint()
+        .tree(project_dir / "proto")
+        .file(project_dir / "buf.yaml", name="buf.yaml")
+        .file(project_dir / "buf.lock", name="buf.lock")
+        .text(buf.gen_yaml(out_dir="${out}"))
+        .text(tools.BUF.name, tools.BUF.version)
+        .text(tools.PROTOC_GEN_OPENAPIV2.name, tools.PROTOC_GEN_OPENAPIV2.version)
+        .hexdigest()
+    )
+    if force or not state.is_fresh("openapi-v2", v2_inputs, fingerprint.output(v2_file)):
+        openapi_v2(v2_file, work_dir=work_dir)
+        state.save("openapi-v2", v2_inputs, fingerprint.output(v2_file))
+    else:
+        logging.info(f"Skipping generation of '{v2_file.relative_to(project_dir)}' because inputs haven't changed")
+
+    # Generate version 3 from version 2, with the version of the selected converter as an additional input:
+    v3_inputs = fingerprint.Fingerprint().file(v2_file, name=v2_file.name)
+    if converter_name == "native":
+        v3_inputs.file(pathlib.Path(converter.__file__), name="dev/converter.py")
+    else:
+        v3_inputs.text(tools.SWAGGER_CODEGEN_CLI.name, tools.SWAGGER_CODEGEN_CLI.version)
+    v3_inputs = v3_inputs.hexdigest()
+    if force or not state.is_fresh("openapi-v3", v3_inputs, fingerprint.output(v3_file)):
+        if converter_name == "native":
+            openapi_v3_native(v2_file, v3_file)
+        else:
+            openapi_v3(v2_file, v3_file, work_dir=work_dir)
+        state.save("openapi-v3", v3_inputs, fingerprint.output(v3_file))
+    else:
+        logging.info(f"Skipping generation of '{v3_file.relative_to(project_dir)}' because inputs haven't changed")
+
+def openapi_v2(v2_file: pathlib.Path, work_dir: pathlib.Path | None = None) -> None:
+    """
+    Generates the OpenAPI version 2 specification from the protocol buffers specification.
+    """
+    # Remove previously generated files:
+    v2_dir = v2_file.parent
     if v2_dir.exists():
         shutil.rmtree(v2_dir)
-    v3_dir = openapi_dir / "v3"
-    if v3_dir.exists():
-        shutil.rmtree(v3_dir)
 
-    # Create a temporary directory for the downloaded files:
-    tmp_dir = pathlib.Path(tempfile.mkdtemp())
-    try:
+    # Create a temporary directory for the generated files:
+    with _scratch(work_dir, "v2") as tmp_dir:
         # Use the 'buf' tool to generate OpenAPI version 2. Note that we need some Go settings even if we are not going
         # to generate Go code. That is a side efect of using the gRPC gateway tool to generate the OpenAPI.
-        v2_tmp_dir = tmp_dir / "v2"
-        v2_tmp_dir.mkdir()
         command.run(
             args=[
-                tools.BUF.name, "generate",
-                "--template", buf.gen_yaml(out_dir=v2_tmp_dir),
+                tools.BUF.path, "generate",
+                "--template", buf.gen_yaml(out_dir=tmp_dir),
             ],
             check=True,
         )
 
         # Find the generated version 2 file and move it to the destination directory:
-        v2_tmp_files = list(v2_tmp_dir.glob("*.json"))
-        if len(v2_tmp_files) != 1:
-            raise Exception(f"Expected exactly one generated OpenAPI file, but found {len(v2_tmp_files)}")
-        v2_tmp_file = v2_tmp_files[0]
-        v2_file = v2_dir / "openapi.json"
-        if not v2_dir.exists():
-            v2_dir.mkdir(parents=True)
-        shutil.move(v2_tmp_file, v2_file)
+        tmp_files = list(tmp_dir.glob("*.json"))
+        if len(tmp_files) != 1:
+            raise Exception(f"Expected exactly one generated OpenAPI file, but found {len(tmp_files)}")
+        tmp_file = tmp_files[0]
+        v2_dir.mkdir(parents=True)
+        shutil.move(tmp_file, v2_file)
 
+def openapi_v3(v2_file: pathlib.Path, v3_file: pathlib.Path, work_dir: pathlib.Path | None = None) -> None:
+    """
+    Generates the OpenAPI version 3 specification from version 2.
+    """
+    # Remove previously generated files:
+    v3_dir = v3_file.parent
+    if v3_dir.exists():
+        shutil.rmtree(v3_dir)
+
+    # Create a temporary directory for the generated files:
+    with _scratch(work_dir, "v3") as tmp_dir:
         # Use the 'swagger-codegen-cli' tool to read the generated version 2 and write version 3:
-        v3_tmp_dir = tmp_dir / "v3"
-        v3_tmp_dir.mkdir()
         command.run(
             args=[
-                "swagger-codegen-cli", "generate",
+                tools.SWAGGER_CODEGEN_CLI.path, "generate",
                 "--lang", "openapi-yaml",
                 "--input-spec", str(v2_file),
-                "--output", str(v3_tmp_dir),
+                "--output", str(tmp_dir),
             ],
             check=True,
         )
 
         # Find the generated version 3 file and move it to the destination directory:
-        v3_tmp_files = list(v3_tmp_dir.glob("*.yaml"))
-        if len(v3_tmp_files) != 1:
-            raise Exception(f"Expected exactly one generated OpenAPI file, but found {len(v3_tmp_files)}")
-        v3_tmp_file = v3_tmp_files[0]
-        v3_file = v3_dir / "openapi.yaml"
-        if not v3_dir.exists():
-            v3_dir.mkdir(parents=True)
-        shutil.move(v3_tmp_file, v3_file)
-    finally:
-        shutil.rmtree(tmp_dir)
+        tmp_files = list(tmp_dir.glob("*.yaml"))
+        if len(tmp_files) != 1:
+            raise Exception(f"Expected exactly one generated OpenAPI file, but found {len(tmp_files)}")
+        tmp_file = tmp_files[0]
+        v3_dir.mkdir(parents=True)
+        shutil.move(tmp_file, v3_file)
+
+def openapi_v3_native(v2_file: pathlib.Path, v3_file: pathlib.Path) -> None:
+    """
+    Generates the OpenAPI version 3 specification from version 2 using the converter written in Python.
+    """
+    logging.info(f"Converting '{v2_file.name}' to OpenAPI version 3")
+    with open(v2_file, encoding="utf-8") as stream:
+        v2 = json.load(stream)
+    v3 = converter.convert(v2)
+    v3_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(v3_file, encoding="utf-8", mode="w") as stream:
+        stream.write(converter.dump(v3))
+
+@contextlib.contextmanager
+def _scratch(work_dir: pathlib.Path | None, name: str) -> typing.Iterator[pathlib.Path]:
+    """
+    Yields an empty directory for temporary files. When a work directory is given the directory is created inside it
+    and isn't removed, so that its path, and the 'buf' template that contains it, stay the same between runs.
+    Otherwise a new temporary directory is created and removed when done.
+    """
+    if work_dir is None:
+        tmp_dir = pathlib.Path(tempfile.mkdtemp())
+        try:
+            yield tmp_dir
+        finally:
+            shutil.rmtree(tmp_dir)
+    else:
+        tmp_dir = work_dir / name
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+        yield tmp_dir
@@ -28,6 +28,6 @@ def lint() -> None:
     """
     logging.info(f"Running linter")
     command.run(
-        args=[tools.BUF.name, "lint"],
+        args=[tools.BUF.path, "lint"],
         check=True,
     )
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Manifest of installed tools.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import shutil
+import threading
+
+from . import tools
+
+class Manifest:
+    """
+    Records the version, path, size and modification time of the tools when they are installed, so that later it is
+    possible to check that they haven't changed without running them.
+    """
+
+    def __init__(self, file: pathlib.Path):
+        self.file = file
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(file, encoding="utf-8") as stream:
+                self._entries = json.load(stream).get("tools", {})
+        except FileNotFoundError:
+            pass
+        except ValueError as err:
+            logging.warning(f"Ignoring invalid manifest '{file}': {err}")
+
+    def check(self, tool: tools.Tool) -> bool:
+        """
+        Checks if the given tool is installed according to the manifest. This will be true if the tool was installed
+        with the right version, and the file found in the path has the same size and modification time that it had
+        when it was installed.
+        """
+        entry = self._entries.get(tool.name)
+        if entry is None or entry.get("version") != tool.version:
+            return False
+        path = shutil.which(tool.name)
+        if path is None or os.path.abspath(path) != entry.get("path"):
+            return False
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if stat.st_size != entry.get("size") or stat.st_mtime_ns != entry.get("mtime"):
+            return False
+        logging.info(f"Version {tool.version} of '{tool.name}' is already installed at '{path}'")
+        return True
+
+    def record(self, tool: tools.Tool) -> None:
+        """
+        Records that the given tool has been installed and saves the manifest.
+        """
+        path = shutil.which(tool.name)
+        if path is None:
+            logging.warning(f"Can't record '{tool.name}' in the manifest because it isn't in the path")
+            return
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            self._entries[tool.name] = {
+                "version": tool.version,
+                "path": path,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+            }
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.file.with_name(f".{self.file.name}.tmp")
+            with open(tmp_file, encoding="utf-8", mode="w") as stream:
+                json.dump({"tools": self._entries}, stream, indent=2, sort_keys=True)
+                stream.write("\n")
+            os.replace(tmp_file, self.file)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions to run independent tasks concurrently.
+"""
+
+import concurrent.futures
+import logging
+import threading
+import typing
+
+from . import command
+
+class _Router(logging.Handler):
+    """
+    Logging handler that collects the records generated by the threads that run tasks, and writes them as one block
+    when the task finishes, so that the log of each task isn't mixed with the log of other tasks.
+    """
+
+    def __init__(self, handlers: list[logging.Handler]):
+        super().__init__()
+        self._handlers = handlers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        records = getattr(self._local, "records", None)
+        if records is not None:
+            records.append(record)
+        else:
+            with self._lock:
+                self._forward(record)
+
+    def run(self, name: str, task: typing.Callable[[], None]) -> None:
+        """
+        Runs the given task, collecting its log records and the output of the commands that it runs. The task isn't
+        started if other task has already failed.
+        """
+        if self._failed.is_set():
+            return
+        self._local.records = []
+        try:
+            with command.capture():
+                task()
+        except Exception as err:
+            self._failed.set()
+            logging.error(f"Task '{name}' failed: {err}")
+            raise
+        finally:
+            records = self._local.records
+            self._local.records = None
+            with self._lock:
+                for record in records:
+                    self._forward(record)
+
+    def _forward(self, record: logging.LogRecord) -> None:
+        for handler in self._handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+def run(
+    tasks: dict[str, typing.Callable[[], None]],
+    jobs: int = 1,
+) -> None:
+    """
+    Runs the given tasks using up to the given number of threads. The keys of the dictionary are the names of the
+    tasks, used to report failures.
+
+    When more than one job is used the log of each task, including the output of the commands that it runs, is written
+    as one block when the task finishes.
+
+    If a task fails the tasks that haven't started yet are cancelled, the tasks that are already running are allowed
+    to finish, and then an exception is raised.
+    """
+    # Run the tasks sequentially if there is no need for concurrency:
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks.values():
+            task()
+        return
+
+    # Replace the root logging handlers with a router that keeps the log of each task separate:
+    root = logging.getLogger()
+    saved = root.handlers
+    router = _Router(saved)
+    root.handlers = [router]
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(router.run, name, task): name
+                for name, task in tasks.items()
+            }
+            _, pending = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+    finally:
+        root.handlers = saved
+    failed = [
+        name for future, name in futures.items()
+        if not future.cancelled() and future.exception() is not None
+    ]
+    if len(failed) > 0:
+        names = ", ".join(f"'{name}'" for name in failed)
+        raise Exception(f"Failed to run {names}")
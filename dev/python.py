@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions to generate the Python code for the protocol buffers specification. This code isn't part of the project, it
+is used by the development tools that need to create, send and receive messages, like the benchmarks.
+"""
+
+import importlib.metadata
+import importlib.resources
+import logging
+import pathlib
+import shutil
+import sys
+import tempfile
+
+from . import command
+from . import dirs
+from . import fingerprint
+from . import tools
+
+# Top level directories of the exported '.proto' files that don't need to be generated because the Python code is
+# already provided by the 'protobuf' and 'googleapis-common-protos' packages:
+_PROVIDED = ["google"]
+
+def generate(force: bool = False) -> pathlib.Path:
+    """
+    Generates the Python code for the messages and the gRPC services and returns the directory that contains it.
+    Generation is skipped when the specification and the version of the generator haven't changed since the last time
+    and the generated files haven't been modified.
+    """
+    project_dir = dirs.project()
+    out_dir = dirs.build() / "python"
+    state = fingerprint.State("python")
+    inputs = (
+        fingerprint.Fingerprint()
+        .tree(project_dir / "proto")
+        .file(project_dir / "buf.yaml", name="buf.yaml")
+        .file(project_dir / "buf.lock", name="buf.lock")
+        .text("grpcio-tools", importlib.metadata.version("grpcio-tools"))
+        .hexdigest()
+    )
+    if not force and state.is_fresh("python", inputs, _outputs(out_dir)):
+        logging.debug(f"Skipping generation of '{out_dir.relative_to(project_dir)}' because inputs haven't changed")
+        return out_dir
+
+    logging.info(f"Generating Python code in '{out_dir.relative_to(project_dir)}'")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = pathlib.Path(tmp)
+
+        # Export the '.proto' files of the project and of its dependencies, so that they can be passed to the compiler
+        # without having to know where 'buf' keeps the dependencies:
+        export_dir = tmp_dir / "proto"
+        command.run(
+            args=[
+                tools.BUF.path, "export", str(project_dir),
+                "--output", str(export_dir),
+            ],
+            check=True,
+        )
+        files = [
+            str(file.relative_to(export_dir))
+            for file in sorted(export_dir.rglob("*.proto"))
+            if file.relative_to(export_dir).parts[0] not in _PROVIDED
+        ]
+
+        # Run the compiler included in the 'grpcio-tools' package, so that 'protoc' and the gRPC plugin don't need
+        # to be installed separately:
+        from grpc_tools import protoc
+        gen_dir = tmp_dir / "python"
+        gen_dir.mkdir()
+        include_dir = importlib.resources.files("grpc_tools") / "_proto"
+        code = protoc.main([
+            "grpc_tools.protoc",
+            f"--proto_path={export_dir}",
+            f"--proto_path={include_dir}",
+            f"--python_out={gen_dir}",
+            f"--grpc_python_out={gen_dir}",
+            *files,
+        ])
+        if code != 0:
+            raise Exception(f"Failed to generate Python code, compiler exited with code {code}")
+
+        # Replace the previously generated files:
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+        out_dir.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(gen_dir, out_dir)
+    state.save("python", inputs, _outputs(out_dir))
+    return out_dir
+
+def load() -> None:
+    """
+    Generates the Python code if needed, and adds it to the module search path, so that it can be imported. For
+    example, after calling this the messages of the cluster orders can be imported like this:
+
+        from fulfillment.v1 import cluster_order_type_pb2
+    """
+    out_dir = str(generate())
+    if out_dir not in sys.path:
+        sys.path.insert(0, out_dir)
+
+def _outputs(out_dir: pathlib.Path) -> str | None:
+    if not out_dir.exists():
+        return None
+    return fingerprint.Fingerprint().tree(out_dir, "*.py").hexdigest()
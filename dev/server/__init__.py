@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Reference server that implements the API keeping all the objects in memory. It isn't intended for production, it is a
+stand-in that helps to check the design of the API, and to run benchmarks and clients against it.
+"""
+
+import threading
+
+import click
+
+from .. import python
+
+@click.command()
+@click.option(
+    "--grpc-address",
+    default="localhost:8000",
+    show_default=True,
+    help="Address where the server listens for gRPC requests.",
+)
+@click.option(
+    "--http-address",
+    default="localhost:8001",
+    show_default=True,
+    help="Address where the server listens for HTTP+JSON requests.",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Maximum number of gRPC requests processed concurrently, including open watches.",
+)
+@click.option(
+    "--retention",
+    type=int,
+    default=10000,
+    show_default=True,
+    help="Number of recent events retained for watches that resume from a previous version.",
+)
+@click.option(
+    "--queue-size",
+    type=int,
+    default=10000,
+    show_default=True,
+    help="Maximum number of events pending for a watch before it is terminated.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Number of synthetic orders and clusters created at startup.",
+)
+@click.option(
+    "--compression/--no-compression",
+    default=True,
+    show_default=True,
+    help="Compress the responses larger than 1 KiB for the clients that accept it.",
+)
+def serve(
+    grpc_address: str,
+    http_address: str,
+    workers: int,
+    retention: int,
+    queue_size: int,
+    seed: int,
+    compression: bool,
+) -> None:
+    """
+    Runs the in-memory reference server.
+    """
+    python.load()
+    from .app import Server
+    server = Server(
+        grpc_address=grpc_address,
+        http_address=http_address,
+        workers=workers,
+        retention=retention,
+        queue_size=queue_size,
+        count=seed,
+        compression=compression,
+    )
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
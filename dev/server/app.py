@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Assembly of the reference server: the store, the gRPC services and the HTTP gateway.
+"""
+
+import concurrent.futures
+import logging
+
+import grpc
+
+from events.v1 import events_service_pb2
+from events.v1 import events_service_pb2_grpc
+from fulfillment.v1 import cluster_orders_service_pb2
+from fulfillment.v1 import cluster_orders_service_pb2_grpc
+from fulfillment.v1 import cluster_templates_service_pb2
+from fulfillment.v1 import cluster_templates_service_pb2_grpc
+from fulfillment.v1 import clusters_service_pb2
+from fulfillment.v1 import clusters_service_pb2_grpc
+
+from . import gateway
+from . import seed
+from . import services
+from . import store
+
+# Compression level of the gRPC library, for the 'grpc.default_compression_level' option. With a level, instead of an
+# algorithm, the library selects for each call one of the algorithms that the client lists in the 'grpc-accept-encoding'
+# header, or no compression if it lists none. That header isn't part of the metadata that the services receive, so the
+# decision can't be made by them.
+_COMPRESSION_LEVEL = 1
+
+class Server:
+    """
+    Reference server that keeps all the objects in memory.
+    """
+
+    def __init__(
+        self,
+        grpc_address: str,
+        http_address: str,
+        workers: int,
+        retention: int,
+        queue_size: int,
+        count: int = 0,
+        compression: bool = True,
+    ):
+        self.db = store.Database(retention=retention, queue_size=queue_size)
+        if count > 0:
+            logging.info(f"Creating {count} orders and {count} clusters")
+            seed.seed(self.db, count)
+
+        cluster_templates = services.ClusterTemplates(self.db)
+        cluster_orders = services.ClusterOrders(self.db)
+        clusters = services.Clusters(self.db)
+        events = services.Events(self.db)
+
+        self._grpc_address = grpc_address
+        self._grpc = grpc.server(
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers),
+            options=[("grpc.default_compression_level", _COMPRESSION_LEVEL)] if compression else [],
+        )
+        cluster_templates_service_pb2_grpc.add_ClusterTemplatesServicer_to_server(cluster_templates, self._grpc)
+        cluster_orders_service_pb2_grpc.add_ClusterOrdersServicer_to_server(cluster_orders, self._grpc)
+        clusters_service_pb2_grpc.add_ClustersServicer_to_server(clusters, self._grpc)
+        events_service_pb2_grpc.add_EventsServicer_to_server(events, self._grpc)
+        self._grpc.add_insecure_port(grpc_address)
+
+        self._http_address = http_address
+        self._http = gateway.Gateway(
+            address=http_address,
+            servicers=[
+                (cluster_templates, cluster_templates_service_pb2.DESCRIPTOR.services_by_name["ClusterTemplates"]),
+                (cluster_orders, cluster_orders_service_pb2.DESCRIPTOR.services_by_name["ClusterOrders"]),
+                (clusters, clusters_service_pb2.DESCRIPTOR.services_by_name["Clusters"]),
+                (events, events_service_pb2.DESCRIPTOR.services_by_name["Events"]),
+            ],
+            compression=compression,
+        )
+
+    def start(self) -> None:
+        self._grpc.start()
+        self._http.start()
+        logging.info(f"Listening for gRPC requests in '{self._grpc_address}'")
+        logging.info(f"Listening for HTTP requests in '{self._http_address}'")
+
+    def stop(self) -> None:
+        logging.info("Stopping server")
+        self._http.stop()
+        self._grpc.stop(grace=1).wait()
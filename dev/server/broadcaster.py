@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Delivery of events to the clients that are watching them.
+"""
+
+import collections
+import threading
+
+import grpc
+from google.protobuf import field_mask_pb2
+from google.protobuf import message
+
+from events.v1 import event_type_pb2
+
+from .errors import Error
+
+# Each published event is kept together with the paths of the fields that changed, which are only known for updates:
+Change = tuple[event_type_pb2.Event, list[str] | None]
+
+class Broadcaster:
+    """
+    Sends each published event to all the subscriptions, and retains a bounded number of recent events so that new
+    subscriptions can start from a version in the past.
+    """
+
+    def __init__(self, retention: int, queue_size: int):
+        self._lock = threading.Lock()
+        self._log: collections.deque[Change] = collections.deque(maxlen=retention)
+        self._queue_size = queue_size
+        self._subscriptions: set[Subscription] = set()
+
+        # Version of the newest event that has been discarded from the log. Versions are consecutive, so all the
+        # events after this one are still in the log.
+        self._discarded = 0
+
+    def publish(self, event: event_type_pb2.Event, changed: list[str] | None) -> None:
+        """
+        Publishes an event. The broadcaster takes ownership of the event, so it must not be modified after this.
+        """
+        change = (event, changed)
+        with self._lock:
+            if len(self._log) == self._log.maxlen:
+                self._discarded = self._log[0][0].resource_version
+            self._log.append(change)
+            for subscription in self._subscriptions:
+                subscription._push(change)
+
+    def subscribe(self, since: int | None = None) -> "Subscription":
+        """
+        Creates a subscription that will receive the events published from now on. If a version is given it will first
+        receive the retained events that are newer than that version.
+        """
+        with self._lock:
+            if since is not None and since < self._discarded:
+                raise Error(
+                    grpc.StatusCode.OUT_OF_RANGE,
+                    f"Events after version {since} are no longer available, the oldest available version is "
+                    f"{self._discarded}, list the objects again and watch from the version returned",
+                )
+            subscription = Subscription(self, self._queue_size)
+            if since is not None:
+                for change in self._log:
+                    if change[0].resource_version > since:
+                        subscription._push(change)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def _remove(self, subscription: "Subscription") -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+class Subscription:
+    """
+    Queue of events for one client. If the client doesn't read the events fast enough, and the queue exceeds its
+    maximum size, the subscription fails, and the client needs to subscribe again from the last version that it
+    processed.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, queue_size: int):
+        self._broadcaster = broadcaster
+        self._queue_size = queue_size
+        self._condition = threading.Condition()
+        self._pending: collections.deque[Change] = collections.deque()
+        self._overflow = False
+        self._closed = False
+
+    def get(self, timeout: float | None, limit: int | None = None) -> list[Change]:
+        """
+        Waits till there are events, or till the timeout expires, and returns the pending events, at most the given
+        limit. The rest stay in the queue for the next call.
+        """
+        with self._condition:
+            if len(self._pending) == 0 and not self._overflow and not self._closed:
+                self._condition.wait(timeout)
+            if self._overflow:
+                raise Error(
+                    grpc.StatusCode.RESOURCE_EXHAUSTED,
+                    "Events aren't being read fast enough, watch again from the version of the last processed event",
+                )
+            if limit is None or limit >= len(self._pending):
+                result = list(self._pending)
+                self._pending.clear()
+            else:
+                result = [self._pending.popleft() for _ in range(limit)]
+            return result
+
+    def close(self) -> None:
+        self._broadcaster._remove(self)
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def _push(self, change: Change) -> None:
+        with self._condition:
+            if self._closed or self._overflow:
+                return
+            if len(self._pending) >= self._queue_size:
+                self._overflow = True
+                self._pending.clear()
+            else:
+                self._pending.append(change)
+            self._condition.notify_all()
+
+def coalesce(changes: list[Change]) -> list[Change]:
+    """
+    Replaces the changes of the same object with one single change: a creation followed by updates is replaced by a
+    creation with the last version of the object, several updates are replaced by one update with the union of the
+    changed fields, and any of them followed by a deletion is replaced by the deletion. The result is sorted by version.
+    """
+    # The last change of each object, and the changes that can't be merged with later ones because they are deletions
+    # followed by a new creation of an object with the same identifier:
+    latest: dict[tuple[str, str], Change] = {}
+    result: list[Change] = []
+    for event, changed in changes:
+        kind = event.WhichOneof("payload")
+        key = (kind, getattr(event, kind).id)
+        previous = latest.get(key)
+        if previous is None:
+            latest[key] = (event, changed)
+            continue
+        if previous[0].type == event_type_pb2.EVENT_TYPE_OBJECT_DELETED:
+            result.append(previous)
+            latest[key] = (event, changed)
+            continue
+        previous_event, previous_changed = previous
+        if event.type == event_type_pb2.EVENT_TYPE_OBJECT_UPDATED:
+            if previous_event.type == event_type_pb2.EVENT_TYPE_OBJECT_CREATED:
+                # Events are shared by all the subscriptions, so a copy is needed to change the type:
+                merged = event_type_pb2.Event()
+                merged.CopyFrom(event)
+                merged.type = event_type_pb2.EVENT_TYPE_OBJECT_CREATED
+                event, changed = merged, None
+            elif previous_changed is not None and changed is not None:
+                changed = sorted(set(previous_changed) | set(changed))
+        latest[key] = (event, changed)
+    result.extend(latest.values())
+    result.sort(key=lambda change: change[0].resource_version)
+    return result
+
+def reduce(change: Change) -> event_type_pb2.Event:
+    """
+    Returns a copy of the event that contains only the identifier, the metadata and the changed fields of the object,
+    and the paths of those fields in the 'changed_fields' field. Events that aren't updates are returned unchanged.
+    """
+    event, changed = change
+    if event.type != event_type_pb2.EVENT_TYPE_OBJECT_UPDATED or changed is None:
+        return event
+    result = event_type_pb2.Event(
+        id=event.id,
+        type=event.type,
+        resource_version=event.resource_version,
+    )
+    kind = event.WhichOneof("payload")
+    mask = field_mask_pb2.FieldMask(paths=["id", "metadata", *changed])
+    mask.MergeMessage(getattr(event, kind), getattr(result, kind))
+    result.changed_fields.paths.extend(changed)
+    return result
+
+def diff(old: message.Message, new: message.Message, prefix: str = "") -> list[str]:
+    """
+    Returns the paths of the fields that are different in the given messages. Nested messages are compared field by
+    field, except the well known types, which are compared as a whole, like repeated fields and maps.
+    """
+    result = []
+    for descriptor in new.DESCRIPTOR.fields:
+        path = prefix + descriptor.name
+        old_value = getattr(old, descriptor.name)
+        new_value = getattr(new, descriptor.name)
+        nested = (
+            descriptor.message_type is not None and
+            not descriptor.is_repeated and
+            not descriptor.message_type.full_name.startswith("google.protobuf.")
+        )
+        if nested:
+            result.extend(diff(old_value, new_value, prefix=f"{path}."))
+        elif old_value != new_value:
+            result.append(path)
+    return result
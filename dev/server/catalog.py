@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Cache of the compiled parameter definitions of the templates.
+"""
+
+from . import parameters
+from . import store
+
+class Catalog:
+    """
+    Keeps the parameter validators of the templates, so that they are compiled once for each version of each template
+    instead of once for each order. Each lookup compares the version of the validator with the resource version of
+    the template, and compiles the template again when they are different.
+
+    Lookups must be done while holding the lock of the database, so that the template doesn't change while it is
+    compiled.
+    """
+
+    def __init__(self, db: store.Database):
+        self._db = db
+        self._validators: dict[str, parameters.Validator] = {}
+
+    def get(self, id: str) -> parameters.Validator | None:
+        """
+        Returns the validator for the current version of the template with the given identifier, or 'None' if there
+        is no such template.
+        """
+        template = self._db.cluster_templates.get(id)
+        if template is None:
+            self._validators.pop(id, None)
+            return None
+        validator = self._validators.get(id)
+        if validator is None or validator.version != template.metadata.resource_version:
+            validator = parameters.Validator(template)
+            self._validators[id] = validator
+        return validator
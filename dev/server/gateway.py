@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+HTTP+JSON gateway of the reference server. It translates HTTP requests into calls to the gRPC services, using the
+'google.api.http' annotations of the specification, in the same way that the real gateway does.
+"""
+
+import base64
+import http.server
+import json
+import logging
+import re
+import select
+import socket
+import threading
+import typing
+import urllib.parse
+
+import grpc
+from google.api import annotations_pb2
+from google.protobuf import descriptor
+from google.protobuf import json_format
+from google.protobuf import message
+from google.protobuf import message_factory
+
+from .. import compressors
+from .errors import Error
+
+# HTTP status codes for the gRPC status codes, the same that the real gateway uses:
+_HTTP_STATUS = {
+    grpc.StatusCode.OK: 200,
+    grpc.StatusCode.CANCELLED: 499,
+    grpc.StatusCode.UNKNOWN: 500,
+    grpc.StatusCode.INVALID_ARGUMENT: 400,
+    grpc.StatusCode.DEADLINE_EXCEEDED: 504,
+    grpc.StatusCode.NOT_FOUND: 404,
+    grpc.StatusCode.ALREADY_EXISTS: 409,
+    grpc.StatusCode.PERMISSION_DENIED: 403,
+    grpc.StatusCode.UNAUTHENTICATED: 401,
+    grpc.StatusCode.RESOURCE_EXHAUSTED: 429,
+    grpc.StatusCode.FAILED_PRECONDITION: 400,
+    grpc.StatusCode.ABORTED: 409,
+    grpc.StatusCode.OUT_OF_RANGE: 400,
+    grpc.StatusCode.UNIMPLEMENTED: 501,
+    grpc.StatusCode.INTERNAL: 500,
+    grpc.StatusCode.UNAVAILABLE: 503,
+    grpc.StatusCode.DATA_LOSS: 500,
+}
+
+# Request fields that are populated from HTTP headers, when the request message has them:
+_HEADERS = {
+    "if_none_match": "If-None-Match",
+    "if_match": "If-Match",
+}
+
+class _Route:
+    """
+    Connects an HTTP method and path template to a method of a gRPC service.
+    """
+
+    def __init__(self, verb: str, template: str, rule: typing.Any, method: descriptor.MethodDescriptor, handler):
+        self.verb = verb.upper()
+        self.body = rule.body
+        self.response_body = rule.response_body
+        self.method = method
+        self.handler = handler
+        self.input_class = message_factory.GetMessageClass(method.input_type)
+
+        # Translate the template into a regular expression, remembering the request fields that correspond to the
+        # variables. Variables match one segment, and they can't contain colons so that custom verbs like ':stream'
+        # aren't taken as part of them.
+        self.params: list[str] = []
+        pattern = ""
+        for literal, variable in re.findall(r"([^{]*)(?:\{([^}]*)\})?", template):
+            pattern += re.escape(literal)
+            if variable:
+                self.params.append(variable)
+                pattern += "([^/:]+)"
+        self.regex = re.compile(f"^{pattern}$")
+
+def _routes(servicers: list[tuple[typing.Any, descriptor.ServiceDescriptor]]) -> list[_Route]:
+    result = []
+    for servicer, service in servicers:
+        for method in service.methods:
+            options = method.GetOptions()
+            if not options.HasExtension(annotations_pb2.http):
+                continue
+            rule = options.Extensions[annotations_pb2.http]
+            verb = rule.WhichOneof("pattern")
+            if verb == "custom":
+                continue
+            result.append(_Route(verb, getattr(rule, verb), rule, method, getattr(servicer, method.name)))
+    return result
+
+class _Context:
+    """
+    Replacement for the context of a gRPC call, for calls that arrive via HTTP.
+    """
+
+    def __init__(self, headers: typing.Any, connection: socket.socket):
+        self._headers = headers
+        self._connection = connection
+        self._callbacks: list[typing.Callable] = []
+        self._active = True
+        self.initial_metadata: list[tuple[str, str]] = []
+
+    def abort(self, code: grpc.StatusCode, details: str) -> typing.NoReturn:
+        raise Error(code, details)
+
+    def send_initial_metadata(self, metadata: typing.Iterable[tuple[str, str]]) -> None:
+        self.initial_metadata.extend(metadata)
+
+    def invocation_metadata(self) -> list[tuple[str, str]]:
+        return [(name.lower(), value) for name, value in self._headers.items()]
+
+    def add_callback(self, callback: typing.Callable) -> bool:
+        self._callbacks.append(callback)
+        return True
+
+    def time_remaining(self) -> float | None:
+        return None
+
+    def disable_next_message_compression(self) -> None:
+        # The gateway compresses the complete HTTP response instead of each message, see '_Handler._compressor'.
+        pass
+
+    def is_active(self) -> bool:
+        # The client doesn't send anything while it waits for the response, so if the connection is readable it means
+        # that it has been closed:
+        if self._active:
+            readable, _, _ = select.select([self._connection], [], [], 0)
+            if readable and self._connection.recv(1, socket.MSG_PEEK) == b"":
+                self.cancel()
+        return self._active
+
+    def cancel(self) -> None:
+        if not self._active:
+            return
+        self._active = False
+        for callback in self._callbacks:
+            callback()
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    # The output is buffered, so that the headers and the body of a response are sent with one write when the request
+    # has been handled, or when a chunk is flushed. Nagle's algorithm is disabled, otherwise in persistent connections
+    # the last segment of each response waits for the delayed acknowledgement of the previous one, about 40 ms.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def handle_expect_100(self) -> bool:
+        # The client waits for the interim response before sending the body, so it can't stay in the buffer:
+        result = super().handle_expect_100()
+        self.wfile.flush()
+        return result
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:
+        self._dispatch("PUT")
+
+    def do_PATCH(self) -> None:
+        self._dispatch("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        # Requests aren't logged, as that would slow down the load tests and fill the terminal.
+        pass
+
+    def _dispatch(self, verb: str) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        path = url.path
+        data = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        for route in self.server.routes:
+            if route.verb != verb:
+                continue
+            match = route.regex.match(path)
+            if match is not None:
+                break
+        else:
+            self._send_error(Error(grpc.StatusCode.NOT_FOUND, f"Path '{path}' doesn't exist"))
+            return
+        context = _Context(self.headers, self.connection)
+        try:
+            request = self._build(route, match, url.query, data)
+            if route.method.server_streaming:
+                self._send_stream(route, route.handler(request, context), context)
+            else:
+                self._send_unary(route, route.handler(request, context), context)
+        except Error as error:
+            self._send_error(error)
+        except (BrokenPipeError, ConnectionResetError):
+            context.cancel()
+            self.close_connection = True
+        except Exception as error:
+            logging.exception(f"Failed to process request '{verb} {path}'")
+            self._send_error(Error(grpc.StatusCode.INTERNAL, str(error)))
+
+    def _build(self, route: _Route, match: re.Match, query: str, data: bytes) -> message.Message:
+        request = route.input_class()
+        if route.body != "":
+            text = data.decode("utf-8") if len(data) > 0 else "{}"
+            target = request if route.body == "*" else getattr(request, route.body)
+            try:
+                json_format.Parse(text, target)
+            except json_format.ParseError as error:
+                raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Request body isn't valid: {error}")
+
+            # Like the real gateway, when the update mask isn't given it is calculated from the fields present in the
+            # body, so that partial updates via HTTP only change the fields sent:
+            fields = route.input_class.DESCRIPTOR.fields_by_name
+            if route.body != "*" and "update_mask" in fields and route.verb == "PATCH":
+                if "update_mask" not in urllib.parse.parse_qs(query):
+                    request.update_mask.paths.extend(_paths(json.loads(text), target.DESCRIPTOR))
+        for path, value in zip(route.params, match.groups()):
+            _set(request, path, urllib.parse.unquote(value))
+        for name, values in urllib.parse.parse_qs(query, keep_blank_values=True).items():
+            for value in values:
+                _set(request, name, value)
+        for field, header in _HEADERS.items():
+            value = self.headers.get(header)
+            if value is None:
+                continue
+            descriptor = route.input_class.DESCRIPTOR.fields_by_name.get(field)
+            if descriptor is None or descriptor.type != descriptor.TYPE_STRING or descriptor.is_repeated:
+                continue
+            setattr(request, field, _etag(value))
+        return request
+
+    def _send_unary(self, route: _Route, response: message.Message, context: _Context) -> None:
+        headers, status = self._metadata(context)
+        if status == 304:
+            self._send(status, headers, None, b"")
+            return
+        if route.method.output_type.full_name == "google.api.HttpBody":
+            self._send(status, headers, response.content_type, response.data)
+            return
+        if route.response_body != "":
+            response = getattr(response, route.response_body)
+        self._send(status, headers, "application/json", _json(response))
+
+    def _send_stream(self, route: _Route, responses: typing.Iterator[message.Message], context: _Context) -> None:
+        # Get the first response before sending the headers, so that errors detected before sending anything, like
+        # invalid parameters, are reported with the right status code:
+        try:
+            first = next(responses)
+        except StopIteration:
+            first = None
+        headers, status = self._metadata(context)
+
+        # The size of a stream isn't known in advance, so it is always compressed if the client accepts it. All the
+        # lines are compressed as one stream, which is flushed after each line so that the client doesn't have to wait
+        # for the next one:
+        stream = None
+        compressor = self._compressor()
+        if compressor is not None:
+            stream = compressor.stream()
+            headers = _encode_etags(headers, compressor.name)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        if compressor is not None:
+            self.send_header("Content-Encoding", compressor.name)
+        if self.server.compression:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+
+        def send(line: bytes) -> None:
+            # An empty chunk would end the response, so compressed output that is empty isn't sent:
+            data = stream.compress(line) if stream is not None else line
+            if len(data) > 0:
+                self._send_chunk(data)
+
+        try:
+            if first is not None:
+                send(b'{"result":' + _json(first) + b"}\n")
+                for response in responses:
+                    send(b'{"result":' + _json(response) + b"}\n")
+        except Error as error:
+            send(b'{"error":' + _error(error) + b"}\n")
+        except (BrokenPipeError, ConnectionResetError):
+            context.cancel()
+            responses.close()
+            self.close_connection = True
+            return
+        finally:
+            context.cancel()
+        if stream is not None:
+            data = stream.finish()
+            if len(data) > 0:
+                self._send_chunk(data)
+        self._send_chunk(b"")
+
+    def _send_chunk(self, data: bytes) -> None:
+        """
+        Sends a chunk of a response that uses the chunked transfer encoding. An empty chunk ends the response.
+        """
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_error(self, error: Error) -> None:
+        self._send(_HTTP_STATUS.get(error.code, 500), [], "application/json", _error(error))
+
+    def _send(self, status: int, headers: list[tuple[str, str]], content_type: str | None, body: bytes) -> None:
+        # A compressed response is a different representation than the uncompressed one, so its entity tag contains
+        # the encoding. A 304 response describes the representation that the client already has, which is the one of
+        # the tag that it sent.
+        encoding = None
+        if status == 304:
+            encoding = _split_etag(self.headers.get("If-None-Match", ""))[1]
+        else:
+            compressor = self._compressor()
+            if compressor is not None and len(body) >= compressors.THRESHOLD:
+                body = compressor.compress(body)
+                encoding = compressor.name
+        if encoding is not None:
+            headers = _encode_etags(headers, encoding)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        if encoding is not None and status != 304:
+            self.send_header("Content-Encoding", encoding)
+        if self.server.compression:
+            self.send_header("Vary", "Accept-Encoding")
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _compressor(self) -> compressors.Compressor | None:
+        """
+        Returns the algorithm that should be used to compress the response, or 'None' if it shouldn't be compressed.
+        """
+        if not self.server.compression:
+            return None
+        return _negotiate(self.headers.get("Accept-Encoding"))
+
+    def _metadata(self, context: _Context) -> tuple[list[tuple[str, str]], int]:
+        """
+        Translates the metadata sent by the service into HTTP headers and status code.
+        """
+        headers = []
+        status = 200
+        for name, value in context.initial_metadata:
+            if name == "x-http-code":
+                status = int(value)
+            elif name == "etag":
+                headers.append(("ETag", f'"{value}"'))
+            else:
+                headers.append((f"Grpc-Metadata-{name}", value))
+        return headers, status
+
+def _json(value: message.Message) -> bytes:
+    data = json_format.MessageToDict(value, preserving_proto_field_name=True)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def _error(error: Error) -> bytes:
+    data = {
+        "code": error.code.value[0],
+        "message": error.message,
+        "details": [],
+    }
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def _negotiate(header: str | None) -> compressors.Compressor | None:
+    """
+    Selects the compression algorithm from the value of the 'Accept-Encoding' header: the available algorithm with the
+    highest quality value, and when several have the same the first in the order of preference of the server. Returns
+    'None' if the client doesn't accept any of the available algorithms.
+    """
+    if header is None:
+        return None
+    qualities = {}
+    for item in header.split(","):
+        name, _, parameters = item.partition(";")
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    default = qualities.get("*", 0.0)
+    result = None
+    best = 0.0
+    for name, compressor in compressors.COMPRESSORS.items():
+        quality = qualities.get(name, default)
+        if quality > best:
+            result = compressor
+            best = quality
+    return result
+
+def _etag(value: str) -> str:
+    """
+    Extracts the entity tag from the value of an 'If-None-Match' or 'If-Match' header. Only the first tag is used, and
+    weak tags are treated like strong ones.
+    """
+    return _split_etag(value)[0]
+
+def _split_etag(value: str) -> tuple[str, str | None]:
+    """
+    Splits the first entity tag of an 'If-None-Match' or 'If-Match' header into the tag of the object and the name of
+    the encoding that was added to it when the response was compressed, or 'None' if it wasn't.
+    """
+    value = value.split(",")[0].strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    for name in compressors.COMPRESSORS:
+        suffix = f"-{name}"
+        if value.endswith(suffix):
+            return value[:-len(suffix)], name
+    return value, None
+
+def _encode_etags(headers: list[tuple[str, str]], encoding: str) -> list[tuple[str, str]]:
+    """
+    Adds the name of the encoding to the entity tags of the headers, like '"fa6"' becoming '"fa6-gzip"'.
+    """
+    result = []
+    for name, value in headers:
+        if name == "ETag":
+            value = value[:-1] + f'-{encoding}"'
+        result.append((name, value))
+    return result
+
+def _paths(data: typing.Any, message_descriptor: descriptor.Descriptor, prefix: str = "") -> list[str]:
+    """
+    Returns the paths of the fields that are present in the given JSON object, descending into nested messages, but not
+    into repeated fields, maps or well known types.
+    """
+    result = []
+    if not isinstance(data, dict):
+        return result
+    for key, value in data.items():
+        field = message_descriptor.fields_by_name.get(key) or message_descriptor.fields_by_camelcase_name.get(key)
+        if field is None:
+            continue
+        path = prefix + field.name
+        nested = (
+            isinstance(value, dict) and
+            field.message_type is not None and
+            not field.is_repeated and
+            not field.message_type.full_name.startswith("google.protobuf.")
+        )
+        if nested:
+            result.extend(_paths(value, field.message_type, f"{path}."))
+        else:
+            result.append(path)
+    return result
+
+def _set(request: message.Message, path: str, text: str) -> None:
+    """
+    Sets the field of the request that has the given dot separated path from the text of a path or query parameter.
+    """
+    target = request
+    names = path.split(".")
+    for name in names[:-1]:
+        field = target.DESCRIPTOR.fields_by_name.get(name)
+        if field is None or field.message_type is None or field.is_repeated:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Parameter '{path}' doesn't exist")
+        target = getattr(target, name)
+    name = names[-1]
+    field = target.DESCRIPTOR.fields_by_name.get(name)
+    if field is None:
+        raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Parameter '{path}' doesn't exist")
+    try:
+        if field.message_type is not None:
+            _set_message(getattr(target, name), path, text)
+            return
+        value = _scalar(field, text)
+    except ValueError:
+        raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Value '{text}' of parameter '{path}' isn't valid")
+    if field.is_repeated:
+        getattr(target, name).append(value)
+    else:
+        setattr(target, name, value)
+
+def _set_message(target: message.Message, path: str, text: str) -> None:
+    match target.DESCRIPTOR.full_name:
+        case "google.protobuf.FieldMask":
+            # The JSON parser only accepts camel case paths, but query parameters use the protocol buffers names:
+            target.paths.extend(item.strip() for item in text.split(",") if item.strip() != "")
+        case "google.protobuf.Timestamp" | "google.protobuf.Duration":
+            target.FromJsonString(text)
+        case _:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Parameter '{path}' can't be set from the query")
+
+def _scalar(field: descriptor.FieldDescriptor, text: str) -> typing.Any:
+    match field.type:
+        case descriptor.FieldDescriptor.TYPE_STRING:
+            return text
+        case descriptor.FieldDescriptor.TYPE_BOOL:
+            if text in ("true", "1"):
+                return True
+            if text in ("false", "0"):
+                return False
+            raise ValueError(text)
+        case descriptor.FieldDescriptor.TYPE_FLOAT | descriptor.FieldDescriptor.TYPE_DOUBLE:
+            return float(text)
+        case descriptor.FieldDescriptor.TYPE_ENUM:
+            value = field.enum_type.values_by_name.get(text)
+            return value.number if value is not None else int(text)
+        case descriptor.FieldDescriptor.TYPE_BYTES:
+            return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        case _:
+            return int(text)
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    routes: list[_Route]
+    compression: bool
+
+class Gateway:
+    """
+    HTTP server that receives the HTTP+JSON requests and sends them to the gRPC services.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        servicers: list[tuple[typing.Any, descriptor.ServiceDescriptor]],
+        compression: bool = True,
+    ):
+        host, port = address.rsplit(":", 1)
+        self._server = _Server((host, int(port)), _Handler)
+        self._server.routes = _routes(servicers)
+        self._server.compression = compression
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
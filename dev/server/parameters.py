@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Conversions between the two representations of template parameter values: the deprecated 'google.protobuf.Any' and the
+'ParameterValue' type. During the transition the server populates both.
+"""
+
+import typing
+
+import grpc
+from google.protobuf import any_pb2
+from google.protobuf import duration_pb2
+from google.protobuf import message as protobuf_message
+from google.protobuf import struct_pb2
+from google.protobuf import timestamp_pb2
+from google.protobuf import wrappers_pb2
+
+from fulfillment.v1 import cluster_template_type_pb2
+from fulfillment.v1 import parameter_value_type_pb2
+
+from .errors import Error
+
+# Message type and 'ParameterValue' field for each of the supported type URLs. For the wrapper types the value is in
+# the 'value' field of the message, for the rest the message itself is the value.
+_TYPES = {
+    "type.googleapis.com/google.protobuf.BoolValue": (wrappers_pb2.BoolValue, "bool_value"),
+    "type.googleapis.com/google.protobuf.Int32Value": (wrappers_pb2.Int32Value, "int32_value"),
+    "type.googleapis.com/google.protobuf.Int64Value": (wrappers_pb2.Int64Value, "int64_value"),
+    "type.googleapis.com/google.protobuf.FloatValue": (wrappers_pb2.FloatValue, "float_value"),
+    "type.googleapis.com/google.protobuf.DoubleValue": (wrappers_pb2.DoubleValue, "double_value"),
+    "type.googleapis.com/google.protobuf.StringValue": (wrappers_pb2.StringValue, "string_value"),
+    "type.googleapis.com/google.protobuf.Timestamp": (timestamp_pb2.Timestamp, "timestamp_value"),
+    "type.googleapis.com/google.protobuf.Duration": (duration_pb2.Duration, "duration_value"),
+    "type.googleapis.com/google.protobuf.BytesValue": (wrappers_pb2.BytesValue, "bytes_value"),
+    "type.googleapis.com/google.protobuf.Value": (struct_pb2.Value, "json_value"),
+}
+
+# Type URL for each of the fields of the 'ParameterValue' type:
+_URLS = {field: url for url, (_, field) in _TYPES.items()}
+
+# Fields of the 'ParameterValue' type that contain messages instead of scalar values:
+_MESSAGES = {"timestamp_value", "duration_value", "json_value"}
+
+def to_value(name: str, value: any_pb2.Any) -> parameter_value_type_pb2.ParameterValue:
+    """
+    Converts the 'Any' representation of the value of the given parameter to the 'ParameterValue' representation.
+    """
+    entry = _TYPES.get(value.type_url)
+    if entry is None:
+        raise Error(
+            grpc.StatusCode.INVALID_ARGUMENT,
+            f"Type '{value.type_url}' of parameter '{name}' isn't supported",
+        )
+    message_class, field = entry
+    return _decode(name, value, message_class, field)
+
+def _decode(name: str, value: any_pb2.Any, message_class: type, field: str) -> parameter_value_type_pb2.ParameterValue:
+    """
+    Decodes the 'Any' value of a parameter whose type has already been checked.
+    """
+    message = message_class()
+    try:
+        message.ParseFromString(value.value)
+    except protobuf_message.DecodeError:
+        raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Value of parameter '{name}' can't be decoded")
+    result = parameter_value_type_pb2.ParameterValue()
+    if field in _MESSAGES:
+        getattr(result, field).CopyFrom(message)
+    else:
+        setattr(result, field, message.value)
+    return result
+
+def to_any(name: str, value: parameter_value_type_pb2.ParameterValue) -> any_pb2.Any:
+    """
+    Converts the 'ParameterValue' representation of the value of the given parameter to the 'Any' representation.
+    """
+    field = value.WhichOneof("value")
+    if field is None:
+        raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Value of parameter '{name}' is empty")
+    message_class, _ = _TYPES[_URLS[field]]
+    if field in _MESSAGES:
+        message = getattr(value, field)
+    else:
+        message = message_class(value=getattr(value, field))
+    result = any_pb2.Any()
+    result.Pack(message)
+    return result
+
+def type_of(value: parameter_value_type_pb2.ParameterValue) -> str | None:
+    """
+    Returns the type URL that corresponds to the field that is set in the given value.
+    """
+    field = value.WhichOneof("value")
+    return _URLS.get(field) if field is not None else None
+
+def complete(
+    anys,
+    values,
+    decode: typing.Callable = to_value,
+    previous_anys=None,
+    previous_values=None,
+) -> None:
+    """
+    Fills the missing representation of a map of parameter values, so that both the map of 'Any' values and the map of
+    'ParameterValue' values contain all the parameters. When both maps are given they must contain the same values,
+    which is what happens when a client sends back an object that it retrieved from the server. The 'decode' function
+    converts each 'Any' value, and can be replaced to check the values at the same time.
+
+    In updates the previous maps can also be given. A client that knows only one of the maps sends back the other one
+    unchanged, as an unknown field, so when the maps are different the one that is the same as before is calculated
+    again from the one that the client changed.
+    """
+    if len(anys) > 0 and len(values) > 0:
+        converted = {name: decode(name, value) for name, value in anys.items()}
+        if converted == dict(values):
+            return
+        if previous_values is not None and dict(values) == dict(previous_values):
+            values.clear()
+            for name, value in converted.items():
+                values[name].CopyFrom(value)
+            return
+        if previous_anys is not None and dict(anys) == dict(previous_anys):
+            anys.clear()
+            for name, value in values.items():
+                anys[name].CopyFrom(to_any(name, value))
+            return
+        raise Error(
+            grpc.StatusCode.INVALID_ARGUMENT,
+            "Parameters sent in the 'template_parameters' field and in the 'template_parameter_values' field should "
+            "have the same values",
+        )
+    for name, value in anys.items():
+        values[name].CopyFrom(decode(name, value))
+    if len(values) > len(anys):
+        for name, value in values.items():
+            anys[name].CopyFrom(to_any(name, value))
+
+class Validator:
+    """
+    Checks the parameter values of orders against the parameter definitions of one version of a template. The
+    definitions are compiled when the validator is created, into the set of required parameters and the type and
+    decoder of each parameter, so that checking an order doesn't need to look at the template again.
+    """
+
+    def __init__(self, template: cluster_template_type_pb2.ClusterTemplate):
+        self.template_id = template.id
+        self.version = template.metadata.resource_version
+        self.required = frozenset(definition.name for definition in template.parameters if definition.required)
+        self._types: dict[str, tuple[str, type, str]] = {}
+        for definition in template.parameters:
+            entry = _TYPES.get(definition.type)
+            if entry is None:
+                raise Error(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    f"Type '{definition.type}' of parameter '{definition.name}' isn't supported",
+                )
+            message_class, field = entry
+            self._types[definition.name] = (definition.type, message_class, field)
+
+    def complete(self, anys, values, previous_anys=None, previous_values=None) -> None:
+        """
+        Checks that the parameters are defined by the template, that their values have the right types, and that the
+        required ones are present, and fills the missing representation like the 'complete' function does.
+        """
+        for name, value in values.items():
+            type_url = self._type(name)[0]
+            actual = type_of(value)
+            if actual != type_url:
+                raise self._mismatch(name, type_url, actual)
+        complete(anys, values, self._decode, previous_anys, previous_values)
+        missing = self.required.difference(values)
+        if len(missing) > 0:
+            names = ", ".join(f"'{name}'" for name in sorted(missing))
+            raise Error(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Template '{self.template_id}' requires parameters {names}, but they aren't in the order",
+            )
+
+    def _decode(self, name: str, value: any_pb2.Any) -> parameter_value_type_pb2.ParameterValue:
+        type_url, message_class, field = self._type(name)
+        if value.type_url != type_url:
+            raise self._mismatch(name, type_url, value.type_url)
+        return _decode(name, value, message_class, field)
+
+    def _type(self, name: str) -> tuple[str, type, str]:
+        entry = self._types.get(name)
+        if entry is None:
+            raise Error(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Parameter '{name}' isn't defined by template '{self.template_id}'",
+            )
+        return entry
+
+    def _mismatch(self, name: str, expected: str, actual: str | None) -> Error:
+        return Error(
+            grpc.StatusCode.INVALID_ARGUMENT,
+            f"Type of parameter '{name}' should be '{expected}', but it is '{actual}'",
+        )
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Queries of the 'List' methods, and filters of the 'Watch' method of the events service, as used by the reference
+server. Expressions are compiled with the 'expressions' module, and the results are cached, so repeated requests, like
+the pages of a listing, don't parse them again. Filters of the 'List' methods are also analyzed to find the conditions
+that can be answered with the indexes of the collection, so that they don't need to scan all the objects.
+"""
+
+import bisect
+import collections
+import functools
+import hashlib
+import operator
+import typing
+
+import grpc
+from google.protobuf import descriptor
+from google.protobuf import message
+
+from .. import expressions
+from . import store
+from .errors import Error
+
+# When a filter can use an index, but the results need to be returned in the order of the objects, using the index is
+# only worth when it selects less than this fraction of the objects. Otherwise it is faster to go through the objects
+# in order, stopping when the page is complete.
+_SELECTIVITY = 1 / 16
+
+class _Descending:
+    """
+    Wrapper that inverts the order of values that can't be negated, like strings.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: typing.Any):
+        self.value = value
+
+    def __eq__(self, other: "_Descending") -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return self.value > other.value
+
+class _Access:
+    """
+    Way to find the candidate objects for a filter using one index: the values to look up in a hash index or in the
+    identifiers of the collection, or the range to scan in a sorted index. It also remembers the conditions of the
+    filter that it satisfies, so that they don't need to be evaluated again.
+    """
+
+    def __init__(self, path: str, conjuncts: frozenset[int], values: set | None = None, start=None, stop=None):
+        self.path = path
+        self.conjuncts = conjuncts
+        self.values = values
+        self.start = start
+        self.stop = stop
+
+    def estimate(self, collection: store.Collection) -> int:
+        if self.path == "id":
+            return sum(1 for id in self.values if collection.get(id) is not None)
+        index = collection.indexes[self.path]
+        if self.values is not None:
+            return sum(len(index.lookup(value)) for value in self.values)
+        return index.count(self.start, self.stop)
+
+    def ids(self, collection: store.Collection) -> typing.Iterator[str]:
+        if self.path == "id":
+            yield from (id for id in self.values if collection.get(id) is not None)
+            return
+        index = collection.indexes[self.path]
+        if self.values is not None:
+            for value in self.values:
+                yield from index.lookup(value)
+        else:
+            for _, id in index.range(self.start, self.stop):
+                yield id
+
+    def describe(self) -> str:
+        if self.path == "id":
+            return "identifier lookup"
+        if self.values is not None:
+            return f"hash index on '{self.path}'"
+        return f"range of sorted index on '{self.path}'"
+
+class Query:
+    """
+    Compiled filter and order of a 'List' request for one type of object.
+    """
+
+    def __init__(self, message_class: type, filter: str, order: str):
+        self.filter = filter
+        self.order = order
+        self.digest = hashlib.sha256(f"{filter}\n{order}".encode("utf-8")).hexdigest()[:16]
+        compiler = expressions.Compiler(message_class, expressions.SHORTCUTS, "filter")
+
+        # The filter is split into the conditions joined by 'and' at the top level, so that the ones that can be
+        # answered with an index can be left out of the predicate evaluated for each object:
+        self._conjuncts: list[expressions.Node] = []
+        self._predicates: list[expressions.Predicate] = []
+        if filter.strip() != "":
+            node = expressions.Parser(filter, expressions.SQL, "filter").filter()
+            self._conjuncts = node[1] if node[0] == "and" else [node]
+            self._predicates = [compiler.compile(conjunct) for conjunct in self._conjuncts]
+        self._residuals: dict[frozenset[int], expressions.Predicate | None] = {}
+        self._compiler = compiler
+
+        # Find the conditions that could be answered with an index, if the collection has it:
+        self._analysis = [(self._lookup(conjunct), self._bounds(conjunct)) for conjunct in self._conjuncts]
+
+        # The identifier is always added as the last key so that the order is total. When there is no order the
+        # objects are returned in the order of the index that the store always maintains.
+        keys = []
+        if order.strip() != "":
+            for path, descending in expressions.Parser(order, expressions.SQL, "order").order():
+                field = expressions.resolve(message_class, path, expressions.SHORTCUTS, "order")
+                keys.append((field, descending))
+        if len(keys) == 0:
+            keys.append((expressions.resolve(message_class, store.Collection.ORDER, [], "order"), False))
+        self._getters = [field.get for field, _ in keys]
+        self._wrappers = [_wrapper(field, descending) for field, descending in keys]
+        self._streamable = len(keys) == 1 and keys[0][0].path == store.Collection.ORDER and not keys[0][1]
+
+        # Sorted results of the last selection that couldn't use the order of an index, together with the collection
+        # and its version, see '_sorted'. Only the last one is kept, so the memory used is at most one reference to
+        # each matching object for each cached query.
+        self._cache: tuple[store.Collection, int, list[tuple], list[message.Message]] | None = None
+
+    @property
+    def predicate(self) -> expressions.Predicate | None:
+        """
+        Function that checks if an object matches the complete filter, or 'None' if there is no filter.
+        """
+        return self._residual(frozenset())
+
+    def key(self, object: message.Message) -> list[typing.Any]:
+        """
+        Returns the values of the order keys of the object, including the identifier. This is what goes in the page
+        tokens.
+        """
+        return [get(object) for get in self._getters] + [object.id]
+
+    def sort_key(self, object: message.Message) -> tuple:
+        """
+        Returns the key that sorts the objects in the requested order.
+        """
+        return self._wrap(self.key(object))
+
+    def select(
+        self,
+        collection: store.Collection,
+        after: list[typing.Any] | None = None,
+    ) -> typing.Iterator[message.Message]:
+        """
+        Generates the objects of the collection that match the filter, in the requested order, starting after the
+        object with the given key. Must be called while holding the lock of the database.
+
+        When the order isn't the one of an index all the candidates need to be checked and sorted, so the cost grows
+        with the number of matches. The sorted results are kept till the collection changes, so the following pages of
+        the same query only need to find where they start.
+        """
+        if after is not None and len(after) != len(self._getters) + 1:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, "Page token doesn't match the order criteria")
+        access = self._access(collection)
+        ordered = self._streamable and (
+            access is None or
+            access.path == store.Collection.ORDER or
+            access.estimate(collection) > len(collection) * _SELECTIVITY
+        )
+        if ordered:
+            # Go through the index that is already in the requested order, so that only the objects needed to fill the
+            # page are checked:
+            if access is not None and access.path != store.Collection.ORDER:
+                access = None
+            residual = self._residual(access.conjuncts if access is not None else frozenset())
+            index = collection.indexes[store.Collection.ORDER]
+            start = access.start if access is not None else None
+            stop = access.stop if access is not None else None
+            for _, id in index.range(start, stop, after=tuple(after) if after is not None else None):
+                object = collection.get(id)
+                if residual is None or residual(object):
+                    yield object
+            return
+
+        keys, objects = self._sorted(collection, access)
+        position = 0
+        if after is not None:
+            try:
+                position = bisect.bisect_right(keys, self._wrap(after))
+            except TypeError:
+                raise Error(grpc.StatusCode.INVALID_ARGUMENT, "Page token doesn't match the order criteria")
+        for index in range(position, len(objects)):
+            yield objects[index]
+
+    def _sorted(
+        self,
+        collection: store.Collection,
+        access: _Access | None,
+    ) -> tuple[list[tuple], list[message.Message]]:
+        """
+        Returns the sort keys and the objects that match the filter, sorted in the requested order. The result is kept
+        till the collection changes. Queries are cached by the 'compile' function, so this is shared by all the
+        requests that use the same expressions.
+        """
+        cached = self._cache
+        if cached is not None and cached[0] is collection and cached[1] == collection.version:
+            return cached[2], cached[3]
+        objects = self._candidates(collection, access)
+        keys = list(map(self.sort_key, objects))
+        positions = sorted(range(len(objects)), key=keys.__getitem__)
+        keys = [keys[position] for position in positions]
+        objects = [objects[position] for position in positions]
+        self._cache = (collection, collection.version, keys, objects)
+        return keys, objects
+
+    def count(self, collection: store.Collection) -> int:
+        """
+        Returns the number of objects of the collection that match the filter. Must be called while holding the lock of
+        the database.
+        """
+        if len(self._predicates) == 0:
+            return len(collection)
+        access = self._access(collection)
+        if access is not None and len(access.conjuncts) == len(self._predicates):
+            return access.estimate(collection)
+        return len(self._candidates(collection, access))
+
+    def summarize(
+        self,
+        collection: store.Collection,
+        paths: list[str],
+    ) -> tuple[int, list[dict[typing.Any, int]]]:
+        """
+        Returns the number of objects of the collection that match the filter, and for each of the given paths of hash
+        indexes the number of those objects that have each value. Must be called while holding the lock of the database.
+
+        Without a filter the counts are the ones that the indexes maintain. When the filter is completely answered by a
+        hash index the counts are the sizes of the intersections of the sets of identifiers of both indexes, so the
+        objects aren't read. Otherwise the matching objects are selected and counted one by one.
+        """
+        indexes = [collection.indexes[path] for path in paths]
+        if len(self._predicates) == 0:
+            return len(collection), [index.counts() for index in indexes]
+        access = self._access(collection)
+        exact = (
+            access is not None and
+            access.path != "id" and
+            access.values is not None and
+            len(access.conjuncts) == len(self._predicates)
+        )
+        if exact:
+            selected = [collection.indexes[access.path].lookup(value) for value in access.values]
+            result = []
+            for index in indexes:
+                counts = {}
+                for key, ids in index.items():
+                    count = sum(len(ids & other) for other in selected)
+                    if count > 0:
+                        counts[key] = count
+                result.append(counts)
+            return sum(len(ids) for ids in selected), result
+        objects = self._candidates(collection, access)
+        result = []
+        for index in indexes:
+            counts = collections.Counter()
+            for object in objects:
+                counts.update(index.keys(object))
+            result.append(dict(counts))
+        return len(objects), result
+
+    def plan(self, collection: store.Collection) -> str:
+        """
+        Returns a human readable description of how the objects are selected, for the benchmarks.
+        """
+        access = self._access(collection)
+        if access is None:
+            return "full scan"
+        return access.describe()
+
+    def _candidates(self, collection: store.Collection, access: _Access | None) -> list[message.Message]:
+        """
+        Returns the objects that match the filter, in no particular order, using the index if possible.
+        """
+        if access is None:
+            residual = self._residual(frozenset())
+            objects = collection.scan()
+        else:
+            residual = self._residual(access.conjuncts)
+            objects = (collection.get(id) for id in access.ids(collection))
+        if residual is None:
+            return list(objects)
+        return [object for object in objects if residual(object)]
+
+    def _access(self, collection: store.Collection) -> _Access | None:
+        """
+        Finds the cheapest way to find the candidate objects with the indexes of the collection, or 'None' if no index
+        can be used.
+        """
+        candidates = []
+        ranges: dict[str, _Access] = {}
+        for number, (lookup, bounds) in enumerate(self._analysis):
+            path, values = lookup
+            if path == "id" or path is not None and isinstance(collection.indexes.get(path), store.HashIndex):
+                candidates.append(_Access(path, frozenset([number]), values=values))
+                continue
+            if bounds is None:
+                continue
+            path, start, stop = bounds
+            if not isinstance(collection.indexes.get(path), store.SortedIndex):
+                continue
+            conjuncts = frozenset([number])
+            previous = ranges.get(path)
+            if previous is not None:
+                if previous.start is not None:
+                    start = previous.start if start is None else max(start, previous.start)
+                if previous.stop is not None:
+                    stop = previous.stop if stop is None else min(stop, previous.stop)
+                conjuncts |= previous.conjuncts
+            ranges[path] = _Access(path, conjuncts, start=start, stop=stop)
+        candidates.extend(ranges.values())
+        if len(candidates) == 0:
+            return None
+        return min(candidates, key=lambda candidate: candidate.estimate(collection))
+
+    def _lookup(self, node: expressions.Node) -> tuple[str | None, set | None]:
+        """
+        Checks if the condition selects a set of values of one field, like 'state = 1' or 'state in (1, 2)', and
+        returns the path of the field and the values.
+        """
+        match node[0]:
+            case "compare" if node[1] == "==":
+                field = self._compiler.field(node[2])
+                return field.path, {expressions.literal_value(field, node[3], "filter")}
+            case "in" if not node[3]:
+                field = self._compiler.field(node[1])
+                return field.path, {expressions.literal_value(field, literal, "filter") for literal in node[2]}
+            case "or":
+                paths = set()
+                values = set()
+                for child in node[1]:
+                    path, child_values = self._lookup(child)
+                    if path is None:
+                        return None, None
+                    paths.add(path)
+                    values |= child_values
+                if len(paths) == 1:
+                    return paths.pop(), values
+        return None, None
+
+    def _bounds(self, node: expressions.Node) -> tuple[str, typing.Any, typing.Any] | None:
+        """
+        Checks if the condition selects a range of integer values of one field, like timestamps, and returns the path
+        of the field and the start and stop of the range.
+        """
+        if node[0] != "compare":
+            return None
+        _, name, path, literal = node
+        field = self._compiler.field(path)
+        value = expressions.literal_value(field, literal, "filter")
+        if not isinstance(value, int) or isinstance(value, bool):
+            return None
+        match name:
+            case "==":
+                return field.path, value, value + 1
+            case ">=":
+                return field.path, value, None
+            case ">":
+                return field.path, value + 1, None
+            case "<":
+                return field.path, None, value
+            case "<=":
+                return field.path, None, value + 1
+        return None
+
+    def _residual(self, excluded: frozenset[int]) -> expressions.Predicate | None:
+        """
+        Returns the predicate that checks the conditions of the filter that aren't satisfied by the index.
+        """
+        if excluded in self._residuals:
+            return self._residuals[excluded]
+        predicates = [
+            predicate for number, predicate in enumerate(self._predicates)
+            if number not in excluded
+        ]
+        if len(predicates) == 0:
+            result = None
+        elif len(predicates) == 1:
+            result = predicates[0]
+        else:
+            result = lambda object: all(predicate(object) for predicate in predicates)
+        self._residuals[excluded] = result
+        return result
+
+    def _wrap(self, key: list[typing.Any]) -> tuple:
+        return tuple(wrap(value) for wrap, value in zip(self._wrappers, key)) + (key[-1],)
+
+def _wrapper(field: expressions.Field, descending: bool) -> typing.Callable[[typing.Any], typing.Any]:
+    if not descending:
+        return lambda value: value
+    if field.descriptor.type == descriptor.FieldDescriptor.TYPE_STRING:
+        return _Descending
+    return operator.neg
+
+@functools.lru_cache(maxsize=1024)
+def compile(message_class: type, filter: str, order: str) -> Query:
+    """
+    Compiles the filter and order of a 'List' request for the given type of object. Results are cached, so requests
+    with the same expressions, like the pages of a listing, don't compile them again.
+    """
+    try:
+        return Query(message_class, filter, order)
+    except expressions.Error as error:
+        raise Error(grpc.StatusCode.INVALID_ARGUMENT, str(error))
+
+@functools.lru_cache(maxsize=1024)
+def compile_cel(message_class: type, filter: str) -> expressions.Predicate | None:
+    """
+    Compiles the filter of a 'Watch' request, written in the subset of CEL, into a function that checks the messages of
+    the given type. Returns 'None' if the filter is empty.
+    """
+    try:
+        return expressions.predicate(message_class, filter, expressions.CEL)
+    except expressions.Error as error:
+        raise Error(grpc.StatusCode.INVALID_ARGUMENT, str(error))
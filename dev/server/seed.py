@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Synthetic data for the reference server, so that it can be used for benchmarks without having to create objects first.
+"""
+
+import random
+
+from fulfillment.v1 import cluster_order_type_pb2
+from fulfillment.v1 import cluster_template_type_pb2
+from fulfillment.v1 import cluster_type_pb2
+from shared.v1 import condition_status_type_pb2
+
+from . import parameters
+from . import services
+from . import store
+
+# Templates that are always created, with the names and types of their parameters:
+_TEMPLATES = {
+    "ocp_4_17_small": [
+        ("node_count", "type.googleapis.com/google.protobuf.Int32Value"),
+        ("region", "type.googleapis.com/google.protobuf.StringValue"),
+    ],
+    "ocp_4_17_medium": [
+        ("node_count", "type.googleapis.com/google.protobuf.Int32Value"),
+        ("region", "type.googleapis.com/google.protobuf.StringValue"),
+        ("fips", "type.googleapis.com/google.protobuf.BoolValue"),
+    ],
+    "ocp_4_17_large": [
+        ("node_count", "type.googleapis.com/google.protobuf.Int32Value"),
+        ("region", "type.googleapis.com/google.protobuf.StringValue"),
+        ("fips", "type.googleapis.com/google.protobuf.BoolValue"),
+        ("max_unavailable", "type.googleapis.com/google.protobuf.DoubleValue"),
+    ],
+}
+
+_REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "ap-south-1"]
+
+# Conditions that are true for each state of the orders and of the clusters:
+_ORDER_CONDITIONS = {
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING: [
+        cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_ACCEPTED,
+    ],
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED: [
+        cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_ACCEPTED,
+        cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_FULFILLED,
+    ],
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED: [
+        cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_ACCEPTED,
+        cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_FAILED,
+    ],
+}
+_CLUSTER_CONDITIONS = {
+    cluster_type_pb2.CLUSTER_STATE_PROGRESSING: cluster_type_pb2.CLUSTER_CONDITION_TYPE_PROGRESSING,
+    cluster_type_pb2.CLUSTER_STATE_READY: cluster_type_pb2.CLUSTER_CONDITION_TYPE_READY,
+    cluster_type_pb2.CLUSTER_STATE_FAILED: cluster_type_pb2.CLUSTER_CONDITION_TYPE_FAILED,
+}
+
+def seed(db: store.Database, count: int, rng: random.Random | None = None) -> None:
+    """
+    Populates the database with the templates, and with the given number of orders and of clusters.
+    """
+    if rng is None:
+        rng = random.Random(0)
+    for id, definitions in _TEMPLATES.items():
+        template = cluster_template_type_pb2.ClusterTemplate(id=id, title=id.replace("_", " "))
+        for name, type in definitions:
+            template.parameters.add(name=name, type=type, required=name == "node_count")
+        db.create(db.cluster_templates, template)
+
+    order_states = [
+        cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING,
+        cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED,
+        cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED,
+    ]
+    cluster_states = [
+        cluster_type_pb2.CLUSTER_STATE_PROGRESSING,
+        cluster_type_pb2.CLUSTER_STATE_READY,
+        cluster_type_pb2.CLUSTER_STATE_FAILED,
+    ]
+    for _ in range(count):
+        template_id = rng.choice(list(_TEMPLATES))
+        order = cluster_order_type_pb2.ClusterOrder()
+        order.spec.template_id = template_id
+        order.status.state = rng.choices(order_states, weights=[2, 7, 1])[0]
+        for type in _ORDER_CONDITIONS[order.status.state]:
+            order.status.conditions.add(type=type, status=condition_status_type_pb2.CONDITION_STATUS_TRUE)
+        values = order.spec.template_parameter_values
+        values["node_count"].int32_value = rng.randrange(3, 100)
+        values["region"].string_value = rng.choice(_REGIONS)
+        parameters.complete(order.spec.template_parameters, values)
+        db.create(db.cluster_orders, order)
+
+        cluster = cluster_type_pb2.Cluster(id=store.new_id())
+        cluster.status.state = rng.choices(cluster_states, weights=[2, 7, 1])[0]
+        cluster.status.conditions.add(
+            type=_CLUSTER_CONDITIONS[cluster.status.state],
+            status=condition_status_type_pb2.CONDITION_STATUS_TRUE,
+        )
+        cluster.status.api_url = f"https://api.{cluster.id}.example.com:6443"
+        cluster.status.console_url = f"https://console.{cluster.id}.example.com"
+        cluster.status.kubeconfig_hash = services.kubeconfig_hash(cluster)
+        db.create(db.clusters, cluster)
@@ -0,0 +1,619 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Implementations of the gRPC services of the reference server.
+"""
+
+import base64
+import functools
+import hashlib
+import itertools
+import json
+import time
+import typing
+
+import grpc
+from google.api import httpbody_pb2
+from google.protobuf import descriptor
+from google.protobuf import field_mask_pb2
+from google.protobuf import message
+from google.rpc import status_pb2
+
+from events.v1 import event_type_pb2
+from events.v1 import events_service_pb2
+from events.v1 import events_service_pb2_grpc
+from fulfillment.v1 import cluster_order_type_pb2
+from fulfillment.v1 import cluster_orders_service_pb2
+from fulfillment.v1 import cluster_orders_service_pb2_grpc
+from fulfillment.v1 import cluster_templates_service_pb2
+from fulfillment.v1 import cluster_templates_service_pb2_grpc
+from fulfillment.v1 import cluster_type_pb2
+from fulfillment.v1 import clusters_service_pb2
+from fulfillment.v1 import clusters_service_pb2_grpc
+
+from .. import compressors
+from . import broadcaster
+from . import catalog
+from . import parameters
+from . import query
+from . import store
+from .errors import Error
+
+# Number of items or events sent in each response of a stream when the client doesn't say otherwise:
+_DEFAULT_CHUNK_SIZE = 100
+
+# Maximum time that a watch waits for new events before checking if the client is still connected:
+_POLL_INTERVAL = 1.0
+
+def _unary(method: typing.Callable) -> typing.Callable:
+    """
+    Decorates a unary method so that errors raised by it are sent to the client as the status of the call.
+    """
+    @functools.wraps(method)
+    def wrapper(self, request, context):
+        try:
+            response = method(self, request, context)
+        except Error as error:
+            context.abort(error.code, error.message)
+        _compress(context, response)
+        return response
+    return wrapper
+
+def _stream(method: typing.Callable) -> typing.Callable:
+    """
+    Decorates a server streaming method so that errors raised by it are sent to the client as the status of the call.
+    """
+    @functools.wraps(method)
+    def wrapper(self, request, context):
+        responses = method(self, request, context)
+        try:
+            for response in responses:
+                _compress(context, response)
+                yield response
+        except Error as error:
+            context.abort(error.code, error.message)
+        finally:
+            responses.close()
+    return wrapper
+
+def _compress(context, response: message.Message) -> None:
+    """
+    Disables the compression of the next message if it is so small that compressing it would waste time and probably
+    make it larger.
+    """
+    if response.ByteSize() < compressors.THRESHOLD:
+        context.disable_next_message_compression()
+
+def _status(error: Error | None = None) -> status_pb2.Status:
+    """
+    Returns the status that describes the result of one item of a batch.
+    """
+    if error is None:
+        return status_pb2.Status(code=grpc.StatusCode.OK.value[0])
+    return status_pb2.Status(code=error.code.value[0], message=error.message)
+
+def _optional(request: message.Message, name: str, default: typing.Any = None) -> typing.Any:
+    """
+    Returns the value of an optional field of the request, or the default if the field isn't present.
+    """
+    return getattr(request, name) if request.HasField(name) else default
+
+def _labeler(message_descriptor: descriptor.Descriptor, path: str) -> typing.Callable[[typing.Any], str]:
+    """
+    Returns a function that converts the values of the field with the given path, as stored in the indexes, to the
+    strings used in responses: the names of the values of enumerated types, and the text of the rest.
+    """
+    for name in path.split("."):
+        field = message_descriptor.fields_by_name[name]
+        message_descriptor = field.message_type
+    if field.enum_type is not None:
+        values = field.enum_type.values_by_number
+        return lambda value: values[value].name if value in values else str(value)
+    if field.type == descriptor.FieldDescriptor.TYPE_BOOL:
+        return lambda value: "true" if value else "false"
+    return str
+
+class _Objects:
+    """
+    Implementation of the methods that are common to all the collections. Each subclass gives the collection, the module
+    that contains the request and response types, and the prefix of their names, and can add validations and defaults
+    to the objects before they are saved.
+    """
+
+    def __init__(self, db: store.Database, collection: store.Collection, module: typing.Any, prefix: str):
+        self._db = db
+        self._collection = collection
+        self._module = module
+        self._prefix = prefix
+
+    @_unary
+    def List(self, request, context):
+        selection = self._query(request)
+        offset = _optional(request, "offset", 0)
+        limit = _optional(request, "limit")
+        if offset < 0:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Offset must be zero or positive, but it is {offset}")
+        if limit is not None and limit < 0:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Limit must be zero or positive, but it is {limit}")
+        token = _optional(request, "page_token", "")
+        if token != "" and offset > 0:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, "Page token and offset can't be used together")
+        after = self._decode_token(token, selection)
+        mask = self._mask(request.read_mask)
+
+        # Select the page while holding the lock, so that the results and the version are consistent. Objects are
+        # never modified in place, so they can be copied to the response after releasing the lock.
+        with self._db.lock:
+            version = self._db.version
+            items = itertools.islice(selection.select(self._collection, after=after), offset, None)
+            if limit is not None:
+                page = list(itertools.islice(items, limit + 1))
+            else:
+                page = list(items)
+            total = None if request.skip_total else selection.count(self._collection)
+
+        response = self._response("List")
+        more = limit is not None and len(page) > limit
+        if more:
+            page = page[:limit]
+        self._copy(page, response.items, mask)
+        response.size = len(page)
+        if total is not None:
+            response.total = total
+        if more and len(page) > 0:
+            response.next_page_token = self._encode_token(page[-1], selection)
+        response.resource_version = version
+        return response
+
+    @_stream
+    def ListStream(self, request, context):
+        selection = self._query(request)
+        chunk_size = _optional(request, "chunk_size", _DEFAULT_CHUNK_SIZE)
+        if chunk_size <= 0:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Chunk size must be positive, but it is {chunk_size}")
+        mask = self._mask(request.read_mask)
+
+        # Select one chunk at a time, holding the lock only while selecting it, and continue after the key of the last
+        # object sent, like the page tokens of the 'List' method do. The version is the one of the first chunk, so that
+        # watching from it delivers all the changes made while the stream is being sent.
+        with self._db.lock:
+            version = self._db.version
+            chunk = list(itertools.islice(selection.select(self._collection), chunk_size))
+        while len(chunk) > 0:
+            response = self._response("ListStream")
+            self._copy(chunk, response.items, mask)
+            response.resource_version = version
+            yield response
+            if len(chunk) < chunk_size:
+                break
+            after = selection.key(chunk[-1])
+            with self._db.lock:
+                chunk = list(itertools.islice(selection.select(self._collection, after=after), chunk_size))
+
+    @_unary
+    def Summarize(self, request, context):
+        selection = query.compile(self._collection.message_class, _optional(request, "filter", ""), "")
+        groupable = [path for path, index in self._collection.indexes.items() if isinstance(index, store.HashIndex)]
+        paths = list(request.group_by) if len(request.group_by) > 0 else groupable
+        for path in paths:
+            if path not in groupable:
+                supported = ", ".join(f"'{path}'" for path in groupable)
+                raise Error(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    f"Objects can't be grouped by '{path}', the supported fields are {supported}",
+                )
+        with self._db.lock:
+            version = self._db.version
+            total, counts = selection.summarize(self._collection, paths)
+        response = self._response("Summarize")
+        response.total = total
+        for path, values in zip(paths, counts):
+            group = response.groups.add(field=path)
+            label = _labeler(self._collection.message_class.DESCRIPTOR, path)
+            for value, count in values.items():
+                group.counts[label(value)] = count
+        response.resource_version = version
+        return response
+
+    @_unary
+    def Get(self, request, context):
+        object = self._get(request.id)
+        mask = self._mask(request.read_mask)
+        response = self._response("Get")
+        etag = object.metadata.etag
+        if _optional(request, "if_none_match") == etag:
+            context.send_initial_metadata((("etag", etag), ("x-http-code", "304")))
+            response.not_modified = True
+            return response
+        context.send_initial_metadata((("etag", etag),))
+        self._copy([object], None, mask, response.object)
+        return response
+
+    @_unary
+    def Create(self, request, context):
+        response = self._response("Create")
+        response.object.CopyFrom(self._create(request.object))
+        return response
+
+    @_unary
+    def Update(self, request, context):
+        mask = request.update_mask if "update_mask" in request.DESCRIPTOR.fields_by_name else None
+        if mask is not None and len(mask.paths) > 0:
+            self._check_mask(mask)
+        else:
+            mask = None
+        with self._db.lock:
+            previous = self._get(request.object.id)
+            if_match = _optional(request, "if_match")
+            if if_match is not None and if_match != previous.metadata.etag:
+                raise Error(
+                    grpc.StatusCode.ABORTED,
+                    f"Object '{previous.id}' has been modified, its entity tag is '{previous.metadata.etag}' but "
+                    f"'{if_match}' was expected",
+                )
+            object = self._collection.message_class()
+            if mask is not None:
+                object.CopyFrom(previous)
+                mask.MergeMessage(request.object, object, replace_message_field=True, replace_repeated_field=True)
+            else:
+                object.CopyFrom(request.object)
+            self._prepare(object, request.object, previous)
+            object = self._db.update(self._collection, object)
+        response = self._response("Update")
+        response.object.CopyFrom(object)
+        return response
+
+    @_unary
+    def Delete(self, request, context):
+        self._db.delete(self._collection, request.id)
+        return self._response("Delete")
+
+    @_unary
+    def BatchGet(self, request, context):
+        mask = self._mask(request.read_mask)
+        response = self._response("BatchGet")
+        for id in request.ids:
+            result = response.results.add()
+            object = self._collection.get(id)
+            if object is None:
+                result.status.CopyFrom(_status(self._not_found(id)))
+                continue
+            result.status.CopyFrom(_status())
+            self._copy([object], None, mask, result.object)
+        return response
+
+    @_unary
+    def BatchCreate(self, request, context):
+        response = self._response("BatchCreate")
+        for object in request.objects:
+            result = response.results.add()
+            try:
+                result.object.CopyFrom(self._create(object))
+                result.status.CopyFrom(_status())
+            except Error as error:
+                result.status.CopyFrom(_status(error))
+        return response
+
+    @_unary
+    def BatchDelete(self, request, context):
+        response = self._response("BatchDelete")
+        for id in request.ids:
+            result = response.results.add()
+            result.id = id
+            try:
+                self._db.delete(self._collection, id)
+                result.status.CopyFrom(_status())
+            except Error as error:
+                result.status.CopyFrom(_status(error))
+        return response
+
+    def _prepare(self, object: message.Message, sent: message.Message, previous: message.Message | None) -> None:
+        """
+        Validates an object that is going to be created or updated and fills the fields calculated by the server. The
+        'sent' parameter is the object as sent by the client, and 'previous' is the current version of the object, or
+        'None' for creations. Subclasses override this.
+        """
+
+    def _create(self, sent: message.Message) -> message.Message:
+        object = self._collection.message_class()
+        object.CopyFrom(sent)
+        object.ClearField("metadata")
+        with self._db.lock:
+            self._prepare(object, sent, None)
+            return self._db.create(self._collection, object)
+
+    def _get(self, id: str) -> message.Message:
+        object = self._collection.get(id)
+        if object is None:
+            raise self._not_found(id)
+        return object
+
+    def _not_found(self, id: str) -> Error:
+        return Error(grpc.StatusCode.NOT_FOUND, f"Object '{id}' doesn't exist")
+
+    def _response(self, method: str) -> message.Message:
+        return getattr(self._module, f"{self._prefix}{method}Response")()
+
+    def _query(self, request: message.Message) -> query.Query:
+        return query.compile(
+            self._collection.message_class,
+            _optional(request, "filter", ""),
+            _optional(request, "order", ""),
+        )
+
+    def _encode_token(self, object: message.Message, selection: query.Query) -> str:
+        """
+        Creates the token of the page that starts after the given object. It contains the values of the order keys of
+        the object, and a digest of the filter and order criteria, so that it can't be used with different criteria.
+        """
+        data = {
+            "k": selection.key(object),
+            "q": selection.digest,
+        }
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+    def _decode_token(self, token: str, selection: query.Query) -> list[typing.Any] | None:
+        if token == "":
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            key = list(data["k"])
+            digest = data["q"]
+        except Exception:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Page token '{token}' isn't valid")
+        if digest != selection.digest:
+            raise Error(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "Page token was created with different filter or order criteria",
+            )
+        return key
+
+    def _mask(self, mask: field_mask_pb2.FieldMask) -> field_mask_pb2.FieldMask | None:
+        if len(mask.paths) == 0:
+            return None
+        self._check_mask(mask)
+        return mask
+
+    def _check_mask(self, mask: field_mask_pb2.FieldMask) -> None:
+        if not mask.IsValidForDescriptor(self._collection.message_class.DESCRIPTOR):
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Field mask '{','.join(mask.paths)}' isn't valid")
+
+    def _copy(
+        self,
+        objects: list[message.Message],
+        items: typing.Any,
+        mask: field_mask_pb2.FieldMask | None,
+        target: message.Message | None = None,
+    ) -> None:
+        """
+        Copies the given objects to a repeated field, or to the given target message, keeping only the fields included
+        in the mask.
+        """
+        for object in objects:
+            item = target if target is not None else items.add()
+            if mask is None:
+                item.CopyFrom(object)
+            else:
+                mask.MergeMessage(object, item)
+
+class ClusterTemplates(_Objects, cluster_templates_service_pb2_grpc.ClusterTemplatesServicer):
+
+    def __init__(self, db: store.Database):
+        super().__init__(db, db.cluster_templates, cluster_templates_service_pb2, "ClusterTemplates")
+
+    def _prepare(self, object, sent, previous):
+        for definition in object.parameters:
+            if definition.name == "":
+                raise Error(grpc.StatusCode.INVALID_ARGUMENT, "Parameter name is mandatory")
+            has_default = definition.HasField("default")
+            has_default_value = definition.HasField("default_value")
+            if has_default and has_default_value:
+                if parameters.to_value(definition.name, definition.default) != definition.default_value:
+                    raise Error(
+                        grpc.StatusCode.INVALID_ARGUMENT,
+                        f"Default value of parameter '{definition.name}' should be sent in the 'default' field or "
+                        f"in the 'default_value' field, but not in both",
+                    )
+            elif has_default:
+                definition.default_value.CopyFrom(parameters.to_value(definition.name, definition.default))
+            elif has_default_value:
+                definition.default.CopyFrom(parameters.to_any(definition.name, definition.default_value))
+
+        # Compile the definitions, so that templates with types that orders can't use are rejected now:
+        parameters.Validator(object)
+
+class ClusterOrders(_Objects, cluster_orders_service_pb2_grpc.ClusterOrdersServicer):
+
+    def __init__(self, db: store.Database):
+        super().__init__(db, db.cluster_orders, cluster_orders_service_pb2, "ClusterOrders")
+        self._catalog = catalog.Catalog(db)
+
+    def _prepare(self, object, sent, previous):
+        spec = object.spec
+        if spec.template_id == "":
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, "Template identifier is mandatory")
+
+        # Updates that don't change the specification, like the ones that only change the status, are not checked
+        # again, so that they still work if the template changed after the order was created:
+        if previous is None or spec != previous.spec:
+            validator = self._catalog.get(spec.template_id)
+            if validator is None:
+                raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Template '{spec.template_id}' doesn't exist")
+
+            # When the client sent only one of the representations of the parameters, for example in an update with a
+            # mask, the other one may contain the previous values, so it needs to be calculated again:
+            if len(sent.spec.template_parameter_values) == 0 and len(sent.spec.template_parameters) > 0:
+                spec.ClearField("template_parameter_values")
+            elif len(sent.spec.template_parameters) == 0 and len(sent.spec.template_parameter_values) > 0:
+                spec.ClearField("template_parameters")
+
+            # When it sent both, but only changed one of them, the previous values tell which one it changed:
+            if previous is None:
+                validator.complete(spec.template_parameters, spec.template_parameter_values)
+            else:
+                validator.complete(
+                    spec.template_parameters,
+                    spec.template_parameter_values,
+                    previous.spec.template_parameters,
+                    previous.spec.template_parameter_values,
+                )
+
+        if previous is None and object.status.state == cluster_order_type_pb2.CLUSTER_ORDER_STATE_UNSPECIFIED:
+            object.status.state = cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING
+
+class Clusters(_Objects, clusters_service_pb2_grpc.ClustersServicer):
+
+    def __init__(self, db: store.Database):
+        super().__init__(db, db.clusters, clusters_service_pb2, "Clusters")
+
+    def _prepare(self, object, sent, previous):
+        if previous is None and object.status.state == cluster_type_pb2.CLUSTER_STATE_UNSPECIFIED:
+            object.status.state = cluster_type_pb2.CLUSTER_STATE_PROGRESSING
+        if object.id == "":
+            # The identifier is needed to generate the Kubeconfig, so assign it here instead of in the store:
+            object.id = store.new_id()
+        object.status.kubeconfig_hash = kubeconfig_hash(object)
+
+    @_unary
+    def GetKubeconfig(self, request, context):
+        object = self._get(request.id)
+        response = clusters_service_pb2.ClustersGetKubeconfigResponse(hash=object.status.kubeconfig_hash)
+        if _optional(request, "if_none_match") == response.hash:
+            response.not_modified = True
+        else:
+            response.kubeconfig = kubeconfig(object)
+        return response
+
+    @_unary
+    def GetKubeconfigViaHttp(self, request, context):
+        object = self._get(request.id)
+        etag = object.status.kubeconfig_hash
+        if _optional(request, "if_none_match") == etag:
+            context.send_initial_metadata((("etag", etag), ("x-http-code", "304")))
+            return httpbody_pb2.HttpBody()
+        context.send_initial_metadata((("etag", etag),))
+        return httpbody_pb2.HttpBody(
+            content_type="application/yaml",
+            data=kubeconfig(object).encode("utf-8"),
+        )
+
+    @_stream
+    def BatchGetKubeconfigs(self, request, context):
+        for start in range(0, len(request.ids), _DEFAULT_CHUNK_SIZE):
+            response = clusters_service_pb2.ClustersBatchGetKubeconfigsResponse()
+            for id in request.ids[start:start + _DEFAULT_CHUNK_SIZE]:
+                result = response.results.add(id=id)
+                object = self._collection.get(id)
+                if object is None:
+                    result.status.CopyFrom(_status(self._not_found(id)))
+                    continue
+                result.status.CopyFrom(_status())
+                result.hash = object.status.kubeconfig_hash
+                if request.if_none_match.get(id) == result.hash:
+                    result.not_modified = True
+                else:
+                    result.kubeconfig = kubeconfig(object)
+            yield response
+
+def kubeconfig(cluster: cluster_type_pb2.Cluster) -> str:
+    """
+    Generates the Kubeconfig of a cluster. There are no real clusters behind the reference server, so this is synthetic
+    but deterministic: it only changes when the identifier or the API URL of the cluster change.
+    """
+    url = cluster.status.api_url or f"https://api.{cluster.id}.example.com:6443"
+    token = hashlib.sha256(f"token:{cluster.id}".encode("utf-8")).hexdigest()
+    return (
+        f"apiVersion: v1\n"
+        f"kind: Config\n"
+        f"clusters:\n"
+        f"- name: {cluster.id}\n"
+        f"  cluster:\n"
+        f"    server: {url}\n"
+        f"users:\n"
+        f"- name: admin\n"
+        f"  user:\n"
+        f"    token: {token}\n"
+        f"contexts:\n"
+        f"- name: admin\n"
+        f"  context:\n"
+        f"    cluster: {cluster.id}\n"
+        f"    user: admin\n"
+        f"current-context: admin\n"
+    )
+
+def kubeconfig_hash(cluster: cluster_type_pb2.Cluster) -> str:
+    """
+    Calculates the hash of the Kubeconfig of a cluster, as used in the 'status.kubeconfig_hash' field.
+    """
+    return hashlib.sha256(kubeconfig(cluster).encode("utf-8")).hexdigest()
+
+class Events(events_service_pb2_grpc.EventsServicer):
+
+    def __init__(self, db: store.Database):
+        self._db = db
+
+    @_stream
+    def Watch(self, request, context):
+        predicate = query.compile_cel(event_type_pb2.Event, _optional(request, "filter", ""))
+        batched = request.HasField("batch_window")
+        window = request.batch_window.ToTimedelta().total_seconds()
+        max_size = _optional(request, "max_batch_size", _DEFAULT_CHUNK_SIZE)
+        if max_size <= 0:
+            raise Error(grpc.StatusCode.INVALID_ARGUMENT, f"Maximum batch size must be positive, but it is {max_size}")
+        reduce = request.changed_fields_only
+
+        subscription = self._db.events.subscribe(_optional(request, "since_resource_version"))
+        context.add_callback(subscription.close)
+
+        # Events that don't match the filter are discarded as soon as they are received, so they aren't coalesced
+        # with the ones that match. At most one batch is taken from the queue each time, so that a client that falls
+        # behind doesn't make the server coalesce the complete queue at once:
+        def receive(timeout: float, limit: int) -> list[broadcaster.Change]:
+            changes = subscription.get(timeout=timeout, limit=limit)
+            if predicate is None:
+                return changes
+            return [change for change in changes if predicate(change[0])]
+
+        try:
+            while context.is_active():
+                changes = receive(_POLL_INTERVAL, max_size)
+                if len(changes) == 0:
+                    continue
+                if not batched:
+                    for change in changes:
+                        yield events_service_pb2.EventsWatchResponse(event=self._deliver(change, reduce))
+                    continue
+
+                # Collect events till the window expires or the batch is full, then coalesce them:
+                deadline = time.monotonic() + window
+                while len(changes) < max_size and context.is_active():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    changes.extend(receive(remaining, max_size - len(changes)))
+                changes = broadcaster.coalesce(changes)
+                for start in range(0, len(changes), max_size):
+                    yield events_service_pb2.EventsWatchResponse(
+                        events=[self._deliver(change, reduce) for change in changes[start:start + max_size]],
+                    )
+        finally:
+            subscription.close()
+
+    def _deliver(self, change: broadcaster.Change, reduce: bool):
+        if reduce:
+            return broadcaster.reduce(change)
+        return change[0]
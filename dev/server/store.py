@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+In-memory store of the reference server, with secondary indexes.
+"""
+
+import bisect
+import threading
+import typing
+import uuid
+
+import grpc
+from google.protobuf import message
+from google.protobuf import timestamp_pb2
+
+from events.v1 import event_type_pb2
+from fulfillment.v1 import cluster_order_type_pb2
+from fulfillment.v1 import cluster_template_type_pb2
+from fulfillment.v1 import cluster_type_pb2
+from shared.v1 import condition_status_type_pb2
+
+from . import broadcaster
+from .errors import Error
+
+def field(value: message.Message, path: str) -> typing.Any:
+    """
+    Returns the value of the field of the given message that has the given dot separated path. Timestamps are returned
+    as integer numbers of nanoseconds, so that they can be compared and sorted.
+    """
+    for name in path.split("."):
+        value = getattr(value, name)
+    if isinstance(value, timestamp_pb2.Timestamp):
+        return value.ToNanoseconds()
+    return value
+
+def new_id() -> str:
+    """
+    Generates a new object identifier.
+    """
+    return str(uuid.uuid4())
+
+class HashIndex:
+    """
+    Index that finds the objects that have a given value in a field.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ids: dict[typing.Any, set[str]] = {}
+
+    def add(self, object: message.Message) -> None:
+        for key in self.keys(object):
+            self._ids.setdefault(key, set()).add(object.id)
+
+    def remove(self, object: message.Message) -> None:
+        for key in self.keys(object):
+            ids = self._ids.get(key)
+            if ids is None:
+                continue
+            ids.discard(object.id)
+            if len(ids) == 0:
+                del self._ids[key]
+
+    def keys(self, object: message.Message) -> list[typing.Any]:
+        """
+        Returns the values of the object under which it is indexed.
+        """
+        return [field(object, self.path)]
+
+    def lookup(self, value: typing.Any) -> set[str]:
+        """
+        Returns the identifiers of the objects that have the given value. The returned set must not be modified.
+        """
+        return self._ids.get(value, set())
+
+    def counts(self) -> dict[typing.Any, int]:
+        """
+        Returns the number of objects that have each value.
+        """
+        return {key: len(ids) for key, ids in self._ids.items()}
+
+    def items(self) -> typing.Iterator[tuple[typing.Any, set[str]]]:
+        """
+        Generates the values and the identifiers of the objects that have them. The returned sets must not be modified.
+        """
+        yield from self._ids.items()
+
+class ConditionIndex(HashIndex):
+    """
+    Index that finds the objects that have a condition of a given type whose status is true. The path is the path of
+    the repeated field that contains the conditions followed by the name of the field that contains the type, for
+    example 'status.conditions.type'. An object is indexed once for each of its true conditions.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._conditions, self._type = path.rsplit(".", 1)
+
+    def keys(self, object: message.Message) -> list[typing.Any]:
+        return [
+            getattr(condition, self._type)
+            for condition in field(object, self._conditions)
+            if condition.status == condition_status_type_pb2.CONDITION_STATUS_TRUE
+        ]
+
+class SortedIndex:
+    """
+    Index that keeps the objects sorted by the value of a field, with the identifier as the second key so that the
+    order is total. It finds the objects with values in a range in the order of the index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: list[tuple[typing.Any, str]] = []
+
+    def add(self, object: message.Message) -> None:
+        bisect.insort(self._keys, (field(object, self.path), object.id))
+
+    def remove(self, object: message.Message) -> None:
+        key = (field(object, self.path), object.id)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def range(
+        self,
+        start: typing.Any = None,
+        stop: typing.Any = None,
+        after: tuple[typing.Any, str] | None = None,
+    ) -> typing.Iterator[tuple[typing.Any, str]]:
+        """
+        Generates the keys and identifiers of the objects whose value is greater or equal than the start and less than
+        the stop, in ascending order. When the 'after' key is given only the objects that follow it are generated.
+        """
+        if after is not None:
+            index = bisect.bisect_right(self._keys, after)
+        elif start is not None:
+            index = bisect.bisect_left(self._keys, (start,))
+        else:
+            index = 0
+        while index < len(self._keys):
+            item = self._keys[index]
+            if stop is not None and item[0] >= stop:
+                break
+            if start is not None and item[0] < start:
+                index += 1
+                continue
+            yield item
+            index += 1
+
+    def count(self, start: typing.Any = None, stop: typing.Any = None) -> int:
+        """
+        Returns the number of objects whose value is greater or equal than the start and less than the stop.
+        """
+        first = bisect.bisect_left(self._keys, (start,)) if start is not None else 0
+        last = bisect.bisect_left(self._keys, (stop,)) if stop is not None else len(self._keys)
+        return max(last - first, 0)
+
+class Collection:
+    """
+    Objects of one type, indexed by identifier and by the given secondary indexes. Objects are never modified once they
+    are added, changes replace them with new objects, so callers can read them without locking, but must not modify
+    them.
+    """
+
+    # Path of the field that defines the default order of the objects:
+    ORDER = "metadata.creation_timestamp"
+
+    def __init__(self, name: str, message_class: type, indexes: list[HashIndex | SortedIndex]):
+        self.name = name
+        self.message_class = message_class
+        self.indexes = {index.path: index for index in indexes}
+        if Collection.ORDER not in self.indexes:
+            self.indexes[Collection.ORDER] = SortedIndex(Collection.ORDER)
+        self._objects: dict[str, message.Message] = {}
+
+        # Number of changes made to the collection, so that results calculated from it can be reused till it changes:
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(self, id: str) -> message.Message | None:
+        return self._objects.get(id)
+
+    def scan(self, after: tuple[typing.Any, str] | None = None) -> typing.Iterator[message.Message]:
+        """
+        Generates the objects in the default order, optionally starting after the given key.
+        """
+        for _, id in self.indexes[Collection.ORDER].range(after=after):
+            yield self._objects[id]
+
+    def put(self, object: message.Message) -> None:
+        """
+        Adds the object, replacing the previous version if it exists.
+        """
+        previous = self._objects.get(object.id)
+        if previous is not None:
+            for index in self.indexes.values():
+                index.remove(previous)
+        self._objects[object.id] = object
+        for index in self.indexes.values():
+            index.add(object)
+        self.version += 1
+
+    def remove(self, id: str) -> message.Message | None:
+        object = self._objects.pop(id, None)
+        if object is not None:
+            for index in self.indexes.values():
+                index.remove(object)
+            self.version += 1
+        return object
+
+class Database:
+    """
+    Contains the collections of the server. All the changes are made through this object, which assigns them a
+    version from a single counter and publishes an event for each of them, while holding the lock, so that the events
+    are published in the order of their versions.
+    """
+
+    def __init__(self, retention: int, queue_size: int):
+        self.lock = threading.RLock()
+        self.version = 0
+        self.events = broadcaster.Broadcaster(retention=retention, queue_size=queue_size)
+        self.cluster_orders = Collection(
+            name="cluster_order",
+            message_class=cluster_order_type_pb2.ClusterOrder,
+            indexes=[
+                HashIndex("status.state"),
+                HashIndex("spec.template_id"),
+                ConditionIndex("status.conditions.type"),
+                SortedIndex("metadata.creation_timestamp"),
+            ],
+        )
+        self.clusters = Collection(
+            name="cluster",
+            message_class=cluster_type_pb2.Cluster,
+            indexes=[
+                HashIndex("status.state"),
+                ConditionIndex("status.conditions.type"),
+                SortedIndex("metadata.creation_timestamp"),
+            ],
+        )
+        self.cluster_templates = Collection(
+            name="cluster_template",
+            message_class=cluster_template_type_pb2.ClusterTemplate,
+            indexes=[
+                SortedIndex("metadata.creation_timestamp"),
+            ],
+        )
+
+    def create(self, collection: Collection, object: message.Message) -> message.Message:
+        """
+        Adds a new object, generating the identifier if it is empty. The store takes ownership of the object.
+        """
+        with self.lock:
+            if object.id == "":
+                object.id = new_id()
+            elif collection.get(object.id) is not None:
+                raise Error(grpc.StatusCode.ALREADY_EXISTS, f"Object '{object.id}' already exists")
+            object.metadata.creation_timestamp.GetCurrentTime()
+            self._stamp(object)
+            collection.put(object)
+            self._publish(collection, event_type_pb2.EVENT_TYPE_OBJECT_CREATED, object, None)
+        return object
+
+    def update(self, collection: Collection, object: message.Message) -> message.Message:
+        """
+        Replaces an existing object. The metadata is preserved, except the version and the entity tag. The store takes
+        ownership of the object.
+        """
+        with self.lock:
+            previous = collection.get(object.id)
+            if previous is None:
+                raise Error(grpc.StatusCode.NOT_FOUND, f"Object '{object.id}' doesn't exist")
+            object.metadata.CopyFrom(previous.metadata)
+            self._stamp(object)
+            changed = [path for path in broadcaster.diff(previous, object) if path.split(".")[0] != "metadata"]
+            collection.put(object)
+            self._publish(collection, event_type_pb2.EVENT_TYPE_OBJECT_UPDATED, object, changed)
+        return object
+
+    def delete(self, collection: Collection, id: str) -> message.Message:
+        """
+        Removes an object, and returns it with the deletion time set.
+        """
+        with self.lock:
+            previous = collection.get(id)
+            if previous is None:
+                raise Error(grpc.StatusCode.NOT_FOUND, f"Object '{id}' doesn't exist")
+            collection.remove(id)
+            object = collection.message_class()
+            object.CopyFrom(previous)
+            object.metadata.deletion_timestamp.GetCurrentTime()
+            self._stamp(object)
+            self._publish(collection, event_type_pb2.EVENT_TYPE_OBJECT_DELETED, object, None)
+        return object
+
+    def _stamp(self, object: message.Message) -> None:
+        self.version += 1
+        object.metadata.resource_version = self.version
+        object.metadata.etag = f"{self.version:x}"
+
+    def _publish(
+        self,
+        collection: Collection,
+        type: int,
+        object: message.Message,
+        changed: list[str] | None,
+    ) -> None:
+        event = event_type_pb2.Event(
+            id=str(self.version),
+            type=type,
+            resource_version=self.version,
+        )
+        getattr(event, collection.name).CopyFrom(object)
+        self.events.publish(event, changed)
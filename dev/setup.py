@@ -14,37 +14,142 @@
 # the License.
 #
 
-import hashlib
+import functools
 import logging
+import os
 import pathlib
 import platform
 import re
-import requests
 import shutil
-import tempfile
-import os
 import stat
 import textwrap
+import typing
 
 import click
 
+from . import cache
 from . import command
 from . import dirs
+from . import download
+from . import manifest
+from . import parallel
 from . import tools
 
 @click.command()
-def setup() -> None:
+@click.option(
+    "--jobs",
+    type=int,
+    default=os.cpu_count(),
+    show_default=True,
+    help="Number of tools to install concurrently.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    envvar="DEV_CACHE_DIR",
+    help="Directory where downloaded artifacts are cached.",
+)
+@click.option(
+    "--cache-size",
+    type=int,
+    envvar="DEV_CACHE_SIZE",
+    default=1024,
+    show_default=True,
+    help="Maximum size of the cache in MiB. The least recently used artifacts are removed when it is exceeded.",
+)
+@click.option(
+    "--seed-cache",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    help="Add to the cache the artifacts contained in this directory before installing.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Don't download anything, use only the artifacts that are already in the cache.",
+)
+@click.option(
+    "--skip",
+    multiple=True,
+    metavar="TOOL",
+    help="Don't install the given tool. Can be used multiple times.",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Run the installed tools to check their versions, instead of trusting the install manifest.",
+)
+def setup(
+    jobs: int,
+    cache_dir: pathlib.Path | None,
+    cache_size: int,
+    seed_cache: pathlib.Path | None,
+    offline: bool,
+    skip: tuple[str, ...],
+    verify: bool,
+) -> None:
     """
     Prepares the development environment.
     """
-    install_buf()
-    install_protoc()
-    install_protoc_gen_go()
-    install_protoc_gen_go_grpc()
-    install_protoc_gen_openapiv2()
-    install_swagger_codegen_cli()
-
-def install_buf() -> None:
+    # Prepare the cache and the downloader:
+    if cache_dir is None:
+        cache_dir = dirs.cache()
+    artifacts = cache.Cache(
+        directory=cache_dir,
+        max_size=cache_size * 1024 * 1024,
+    )
+    if seed_cache is not None:
+        artifacts.seed(seed_cache)
+    downloader = download.Downloader(
+        cache=artifacts,
+        offline=offline,
+        connections=max(jobs, 1),
+    )
+
+    # Find the tools that need to be installed. Unless verification has been requested the tools whose files haven't
+    # changed since they were installed are skipped without running them.
+    installed = manifest.Manifest(dirs.local() / "manifest.json")
+    installers = {
+        tools.BUF: install_buf,
+        tools.PROTOC: install_protoc,
+        tools.PROTOC_GEN_GO: install_protoc_gen_go,
+        tools.PROTOC_GEN_GO_GRPC: install_protoc_gen_go_grpc,
+        tools.PROTOC_GEN_OPENAPIV2: install_protoc_gen_openapiv2,
+        tools.SWAGGER_CODEGEN_CLI: install_swagger_codegen_cli,
+    }
+    for name in skip:
+        if name not in [tool.name for tool in installers]:
+            raise Exception(f"Can't skip '{name}' because it isn't one of the installed tools")
+    tasks = {}
+    for tool, installer in installers.items():
+        if tool.name in skip:
+            logging.info(f"Skipping installation of '{tool.name}'")
+            continue
+        if not verify and installed.check(tool):
+            continue
+        tasks[tool.name] = functools.partial(install, tool, installer, downloader, installed)
+
+    # Install the tools:
+    parallel.run(
+        tasks=tasks,
+        jobs=jobs,
+    )
+
+def install(
+    tool: tools.Tool,
+    installer: typing.Callable[[download.Downloader], None],
+    downloader: download.Downloader,
+    installed: manifest.Manifest,
+) -> None:
+    """
+    Runs the installer of the given tool and records the result in the manifest.
+    """
+    try:
+        installer(downloader)
+    finally:
+        downloader.release()
+    installed.record(tool)
+
+def install_buf(downloader: download.Downloader) -> None:
     """
     Installs the 'buf' tool.
     """
@@ -53,23 +158,18 @@ def install_buf() -> None:
     if is_installed(tool):
         return
 
-    # Download and check the file that contains the checksums:
+    # Download the file that contains the checksums:
     checksums_artifact = f"sha256.txt"
     checksums_url = (
         f"https://github.com"
         f"/bufbuild/buf/releases/download/v{tool.version}"
         f"/{checksums_artifact}"
     )
-    checksums_response = requests.get(checksums_url)
-    checksums_response.raise_for_status()
-    checksums_content = checksums_response.content
-    expected_checksum = tool.checksums[checksums_artifact]
-    actual_checksum = hashlib.sha256(checksums_content).hexdigest()
-    if actual_checksum != expected_checksum:
-        raise Exception(
-            f"Failed to verify checksum of '{checksums_url}', expected '{expected_checksum}' "
-            f"but got '{actual_checksum}"
-        )
+    checksums_file = downloader.download(
+        url=checksums_url,
+        checksum=tool.checksums[checksums_artifact],
+    )
+    checksums_content = checksums_file.read_text(encoding="utf-8")
 
     # Get the system and machine name:
     os_name = platform.system()
@@ -79,7 +179,7 @@ def install_buf() -> None:
     artifact_name = f"buf-{os_name}-{arch_name}.tar.gz"
     artifact_match = re.search(
         pattern=fr'^(?P<checksum>[0-9a-fA-F]+)\s+{artifact_name}$',
-        string=checksums_content.decode("utf-8"),
+        string=checksums_content,
         flags=re.MULTILINE,
     )
     if artifact_match is None:
@@ -87,53 +187,32 @@ def install_buf() -> None:
     expected_checksum = artifact_match.group("checksum")
     logging.info(f"Expected checksum for artifact '{artifact_name}' is '{expected_checksum}'")
 
-    # Create a temporary directory for the downloaded files:
-    tmp_dir = pathlib.Path(tempfile.mkdtemp())
-    try:
-        # Download the artifact and verify its checksum:
-        artifact_url = (
-            f"https://github.com"
-            f"/bufbuild/buf/releases/download/v{tool.version}"
-            f"/{artifact_name}"
-        )
-        artifact_file = tmp_dir / artifact_name
-        command.run(
-            args=[
-                "curl",
-                "--location",
-                "--silent",
-                "--fail",
-                "--output", str(artifact_file),
-                artifact_url,
-            ],
-            check=True,
-        )
-        checksum_file = tmp_dir / f"{artifact_name}.txt"
-        with open(file=checksum_file, encoding="utf-8", mode="w") as file:
-            file.write(f"{expected_checksum} {artifact_file}\n")
-        command.run(
-            args=["sha256sum", "--check", str(checksum_file)],
-            check=True,
-        )
+    # Download the artifact:
+    artifact_url = (
+        f"https://github.com"
+        f"/bufbuild/buf/releases/download/v{tool.version}"
+        f"/{artifact_name}"
+    )
+    artifact_file = downloader.download(
+        url=artifact_url,
+        checksum=expected_checksum,
+    )
 
-        # Extract the tool from the artifact:
-        local_dir = dirs.local()
-        if not local_dir.exists():
-            local_dir.mkdir(parents=True)
-        command.run(
-            args=[
-                "tar",
-                "--directory", str(local_dir),
-                "--extract",
-                "--file", str(artifact_file),
-                "--strip-components", "1",
-            ],
-            check=True,
-        )
-    finally:
-        shutil.rmtree(tmp_dir)
+    # Extract the tool from the artifact:
+    local_dir = dirs.local()
+    local_dir.mkdir(parents=True, exist_ok=True)
+    command.run(
+        args=[
+            "tar",
+            "--directory", str(local_dir),
+            "--extract",
+            "--file", str(artifact_file),
+            "--strip-components", "1",
+        ],
+        check=True,
+    )
 
-def install_protoc() -> None:
+def install_protoc(downloader: download.Downloader) -> None:
     """
     Installs the protocol buffers compiler.
     """
@@ -146,42 +225,22 @@ def install_protoc() -> None:
     logging.info(f"Installing version '{tool.version}' of '{tool.name}'")
     os_name = platform.system().lower()
     arch_name = platform.machine().lower()
-    tmp_dir = pathlib.Path(tempfile.mkdtemp())
-    try:
-        zip_name = f"protoc-{tool.version}-{os_name}-{arch_name}.zip"
-        zip_url = (
-            f"https://github.com"
-            f"/protocolbuffers/protobuf/releases/download/v{tool.version}"
-            f"/{zip_name}"
-        )
-        zip_file = tmp_dir / zip_name
-        command.run(
-            args=[
-                "curl",
-                "--location",
-                "--silent",
-                "--fail",
-                "--output", str(zip_file),
-                zip_url,
-            ],
-            check=True,
-        )
-        checksum_value = tool.checksums[zip_name]
-        checsum_file = tmp_dir / f"{zip_name}.txt"
-        with open(file=checsum_file, encoding="utf-8", mode="w") as file:
-            file.write(f"{checksum_value} {zip_file}\n")
-        command.run(
-            args=["sha256sum", "--check", str(checsum_file)],
-            check=True,
-        )
-        command.run(
-            args=["unzip", "-d", str(dirs.local()), "-o", str(zip_file)],
-            check=True,
-        )
-    finally:
-        shutil.rmtree(tmp_dir)
+    zip_name = f"protoc-{tool.version}-{os_name}-{arch_name}.zip"
+    zip_url = (
+        f"https://github.com"
+        f"/protocolbuffers/protobuf/releases/download/v{tool.version}"
+        f"/{zip_name}"
+    )
+    zip_file = downloader.download(
+        url=zip_url,
+        checksum=tool.checksums[zip_name],
+    )
+    command.run(
+        args=["unzip", "-d", str(dirs.local()), "-o", str(zip_file)],
+        check=True,
+    )
 
-def install_protoc_gen_go() -> None:
+def install_protoc_gen_go(downloader: download.Downloader) -> None:
     """
     Installs the protoc plugin that generates Go code.
     """
@@ -195,9 +254,10 @@ def install_protoc_gen_go() -> None:
     go_install(
         tool="google.golang.org/protobuf/cmd/protoc-gen-go",
         version=tool.version,
+        offline=downloader.offline,
     )
 
-def install_protoc_gen_go_grpc() -> None:
+def install_protoc_gen_go_grpc(downloader: download.Downloader) -> None:
     """
     Installs the protoc plugin that generates Go gRPC code.
     """
@@ -210,9 +270,10 @@ def install_protoc_gen_go_grpc() -> None:
     go_install(
         tool="google.golang.org/grpc/cmd/protoc-gen-go-grpc",
         version=tool.version,
+        offline=downloader.offline,
     )
 
-def install_protoc_gen_openapiv2() -> None:
+def install_protoc_gen_openapiv2(downloader: download.Downloader) -> None:
     """
     Installs the 'protoc-gen-openapiv2' tool.
     """
@@ -221,23 +282,18 @@ def install_protoc_gen_openapiv2() -> None:
     if is_installed(tool):
         return
 
-    # Download and check the file that contains the checksums:
+    # Download the file that contains the checksums:
     checksums_artifact = f"grpc-gateway_{tool.version}_checksums.txt"
     checksums_url = (
         f"https://github.com"
         f"/grpc-ecosystem/grpc-gateway/releases/download/v{tool.version}"
         f"/{checksums_artifact}"
     )
-    checksums_response = requests.get(checksums_url)
-    checksums_response.raise_for_status()
-    checksums_content = checksums_response.content
-    expected_checksum = tool.checksums[checksums_artifact]
-    actual_checksum = hashlib.sha256(checksums_content).hexdigest()
-    if actual_checksum != expected_checksum:
-        raise Exception(
-            f"Failed to verify checksum of '{checksums_url}', expected '{expected_checksum}' "
-            f"but got '{actual_checksum}"
-        )
+    checksums_file = downloader.download(
+        url=checksums_url,
+        checksum=tool.checksums[checksums_artifact],
+    )
+    checksums_content = checksums_file.read_text(encoding="utf-8")
 
     # Get the system and machine name:
     os_name = platform.system().lower()
@@ -249,7 +305,7 @@ def install_protoc_gen_openapiv2() -> None:
         artifact_name += ".exe"
     artifact_match = re.search(
         pattern=fr'^(?P<checksum>[0-9a-fA-F]+)\s+{artifact_name}$',
-        string=checksums_content.decode("utf-8"),
+        string=checksums_content,
         flags=re.MULTILINE,
     )
     if artifact_match is None:
@@ -257,49 +313,26 @@ def install_protoc_gen_openapiv2() -> None:
     expected_checksum = artifact_match.group("checksum")
     logging.info(f"Expected checksum for artifact '{artifact_name}' is '{expected_checksum}'")
 
-    # Create a temporary directory for the downloaded files:
-    tmp_dir = pathlib.Path(tempfile.mkdtemp())
-    try:
-        # Download the artifact and verify its checksum:
-        artifact_url = (
-            "https://github.com"
-            f"/grpc-ecosystem/grpc-gateway/releases/download/v{tool.version}"
-            f"/{artifact_name}"
-        )
-        artifact_file = tmp_dir / artifact_name
-        command.run(
-            args=[
-                "curl",
-                "--location",
-                "--silent",
-                "--fail",
-                "--output", str(artifact_file),
-                artifact_url,
-            ],
-            check=True,
-        )
-        checksum_file = tmp_dir / f"{artifact_name}.txt"
-        with open(file=checksum_file, encoding="utf-8", mode="w") as file:
-            file.write(f"{expected_checksum} {artifact_file}\n")
-        command.run(
-            args=["sha256sum", "--check", str(checksum_file)],
-            check=True,
-        )
+    # Download the artifact:
+    artifact_url = (
+        "https://github.com"
+        f"/grpc-ecosystem/grpc-gateway/releases/download/v{tool.version}"
+        f"/{artifact_name}"
+    )
+    artifact_file = downloader.download(
+        url=artifact_url,
+        checksum=expected_checksum,
+    )
 
-        # Move the binary to the local binaries directory:
-        bin_dir = dirs.local_bin()
-        if not bin_dir.exists():
-            bin_dir.mkdir(parents=True)
-        bin_file = bin_dir / tool.name
-        shutil.move(artifact_file, bin_file)
-        bin_stat = bin_file.stat()
-        bin_file.chmod(bin_stat.st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
-        if not os.access(bin_file, os.X_OK):
-            bin_file.chmod()
-    finally:
-        shutil.rmtree(tmp_dir)
+    # Copy the binary to the local binaries directory:
+    bin_dir = dirs.local_bin()
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    bin_file = bin_dir / tool.name
+    shutil.copyfile(artifact_file, bin_file)
+    bin_stat = bin_file.stat()
+    bin_file.chmod(bin_stat.st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
 
-def install_swagger_codegen_cli() -> None:
+def install_swagger_codegen_cli(downloader: download.Downloader) -> None:
     """
     Installs the 'swagger_codegen_cli' tool. Note that this tool is written in Java, so no binary is provided. We
     generate a wrapper shell script during the installation.
@@ -314,63 +347,41 @@ def install_swagger_codegen_cli() -> None:
     if java_path is None:
         raise Exception(f"Failed to find installed 'java'")
 
-    # Create a temporary directory for the downloaded files:
-    tmp_dir = pathlib.Path(tempfile.mkdtemp())
-    try:
-        # Download the artifact and verify its checksum:
-        jar_name = f"{tool.name}-{tool.version}.jar"
-        jar_url = (
-            f"https://repo1.maven.org/maven2"
-            f"/io/swagger/codegen/v3/{tool.name}/{tool.version}"
-            f"/{jar_name}"
-        )
-        jar_file = tmp_dir / jar_name
-        command.run(
-            args=[
-                "curl",
-                "--location",
-                "--silent",
-                "--fail",
-                "--output", str(jar_file),
-                jar_url,
-            ],
-            check=True,
-        )
-        expected_checksum = tool.checksums[jar_name]
-        checksum_file = tmp_dir / f"{jar_name}.txt"
-        with open(file=checksum_file, encoding="utf-8", mode="w") as file:
-            file.write(f"{expected_checksum} {jar_file}\n")
-        command.run(
-            args=["sha256sum", "--check", str(checksum_file)],
-            check=True,
-        )
+    # Download the artifact:
+    jar_name = f"{tool.name}-{tool.version}.jar"
+    jar_url = (
+        f"https://repo1.maven.org/maven2"
+        f"/io/swagger/codegen/v3/{tool.name}/{tool.version}"
+        f"/{jar_name}"
+    )
+    jar_file = downloader.download(
+        url=jar_url,
+        checksum=tool.checksums[jar_name],
+    )
 
-        # Move the jar file to the local libraries directory:
-        lib_dir = dirs.local_lib()
-        if not lib_dir.exists():
-            lib_dir.mkdir(parents=True)
-        lib_file = lib_dir / tool.name
-        shutil.move(jar_file, lib_file)
-
-        # Create the wrapper script:
-        script_text = textwrap.dedent(f"""\
-        #!/bin/sh
-        exec java -jar "{lib_file.absolute()}" $@
-        """)
-        bin_dir = dirs.local_bin()
-        if not bin_dir.exists():
-            bin_dir.mkdir(parents=True)
-        script_file = bin_dir / tool.name
-        with open(script_file, "w") as script_fd:
-            script_fd.write(script_text)
-        script_stat = script_file.stat()
-        script_file.chmod(script_stat.st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
-    finally:
-        shutil.rmtree(tmp_dir)
+    # Copy the jar file to the local libraries directory:
+    lib_dir = dirs.local_lib()
+    lib_dir.mkdir(parents=True, exist_ok=True)
+    lib_file = lib_dir / tool.name
+    shutil.copyfile(jar_file, lib_file)
+
+    # Create the wrapper script:
+    script_text = textwrap.dedent(f"""\
+    #!/bin/sh
+    exec java -jar "{lib_file.absolute()}" $@
+    """)
+    bin_dir = dirs.local_bin()
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script_file = bin_dir / tool.name
+    with open(script_file, "w") as script_fd:
+        script_fd.write(script_text)
+    script_stat = script_file.stat()
+    script_file.chmod(script_stat.st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
 
 def go_install(
     tool: str,
     version: str | None = None,
+    offline: bool = False,
 ) -> None:
     """
     Uses the 'go install' command to install the given tool.
@@ -382,6 +393,9 @@ def go_install(
     'mockgen' command isn't usually a dependency of the project because the mock code that it
     generates doesn't depend on the mock generation code itself. In those cases the version
     can't be extracted from the 'go.mod' file, so it needs to be provided explicitly.
+
+    When offline the Go module proxy is disabled, so the tool can only be built from the modules that are already in
+    the Go module cache.
     """
     # Find the name of the binary. Note that usually the name of the binary will be the
     # last segment of the package path, but that last segment can also be a version number like
@@ -411,8 +425,12 @@ def go_install(
             version = f"v{version}"
 
     # Try to install:
+    env = None
+    if offline:
+        env = dict(os.environ, GOPROXY="off")
     command.run(
         args=["go", "install", f"{tool}@{version}"],
+        env=env,
         check=True,
     )
 
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions that generate synthetic messages from the message definitions, for the benchmarks. The values are random but
+plausible: identifiers are UUIDs, URLs look like URLs, enumerated types never use the unspecified value, and timestamps
+are recent.
+"""
+
+import random
+import string
+import typing
+import uuid
+
+from google.protobuf import descriptor
+from google.protobuf import message
+from google.protobuf import wrappers_pb2
+
+# Messages that are packed inside fields of type 'google.protobuf.Any':
+_ANY_MESSAGES = [
+    lambda rng: wrappers_pb2.BoolValue(value=rng.random() < 0.5),
+    lambda rng: wrappers_pb2.Int32Value(value=rng.randrange(1, 100)),
+    lambda rng: wrappers_pb2.StringValue(value=_word(rng)),
+    lambda rng: wrappers_pb2.DoubleValue(value=round(rng.uniform(0, 1), 2)),
+]
+
+# Range of the timestamps, from the beginning of 2025 to the beginning of 2026:
+_TIMESTAMPS = (1735689600, 1767225600)
+
+def generate(
+    message_class: type[message.Message],
+    rng: random.Random,
+    depth: int = 3,
+    fill: typing.Callable[[message.Message], None] | None = None,
+) -> message.Message:
+    """
+    Generates a message of the given class with all the fields populated. Repeated fields and maps get between one and
+    three elements, and only one field of each 'oneof' is populated. Nested messages are populated up to the given
+    depth, so that recursive types like 'google.protobuf.Value' end. The optional 'fill' function is called with the
+    result, so that callers can replace the values that need to be consistent with other data, like the identifier of
+    the template of an order.
+    """
+    result = message_class()
+    _populate(result, rng, depth)
+    if fill is not None:
+        fill(result)
+    return result
+
+def corpus(
+    message_class: type[message.Message],
+    count: int,
+    seed: int = 0,
+    fill: typing.Callable[[message.Message], None] | None = None,
+) -> list[message.Message]:
+    """
+    Generates a list of messages of the given class. The result is always the same for the same seed.
+    """
+    rng = random.Random(seed)
+    return [generate(message_class, rng, fill=fill) for _ in range(count)]
+
+def _populate(target: message.Message, rng: random.Random, depth: int) -> None:
+    if _well_known(target, rng):
+        return
+    chosen = {
+        oneof.name: rng.choice(oneof.fields)
+        for oneof in target.DESCRIPTOR.oneofs
+        if not _synthetic_oneof(oneof)
+    }
+    for field in target.DESCRIPTOR.fields:
+        oneof = field.containing_oneof
+        if oneof is not None and not _synthetic_oneof(oneof) and chosen[oneof.name] is not field:
+            continue
+        if field.type == descriptor.FieldDescriptor.TYPE_MESSAGE and depth <= 0:
+            continue
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            _populate_map(target, field, rng, depth)
+        elif field.is_repeated:
+            container = getattr(target, field.name)
+            for _ in range(rng.randrange(1, 4)):
+                if field.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+                    _populate(container.add(), rng, depth - 1)
+                else:
+                    container.append(_scalar(field, rng))
+        elif field.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+            _populate(getattr(target, field.name), rng, depth - 1)
+        else:
+            setattr(target, field.name, _scalar(field, rng))
+
+def _populate_map(target: message.Message, field: descriptor.FieldDescriptor, rng: random.Random, depth: int) -> None:
+    container = getattr(target, field.name)
+    key_field = field.message_type.fields_by_name["key"]
+    value_field = field.message_type.fields_by_name["value"]
+    for _ in range(rng.randrange(1, 4)):
+        key = _scalar(key_field, rng)
+        if value_field.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+            _populate(container[key], rng, depth - 1)
+        else:
+            container[key] = _scalar(value_field, rng)
+
+def _well_known(target: message.Message, rng: random.Random) -> bool:
+    """
+    Populates the well known types that need special values, and returns 'True' if the message was one of them.
+    """
+    match target.DESCRIPTOR.full_name:
+        case "google.protobuf.Timestamp":
+            target.seconds = rng.randrange(*_TIMESTAMPS)
+        case "google.protobuf.Duration":
+            target.seconds = rng.randrange(1, 3600)
+        case "google.protobuf.Any":
+            target.Pack(rng.choice(_ANY_MESSAGES)(rng))
+        case "google.protobuf.FieldMask":
+            target.paths.append("status")
+        case "google.protobuf.Struct":
+            for _ in range(rng.randrange(1, 4)):
+                target[_word(rng)] = _word(rng)
+        case "google.protobuf.Value":
+            target.string_value = _word(rng)
+        case "google.protobuf.ListValue":
+            target.values.add().string_value = _word(rng)
+        case _:
+            return False
+    return True
+
+def _scalar(field: descriptor.FieldDescriptor, rng: random.Random) -> typing.Any:
+    match field.type:
+        case descriptor.FieldDescriptor.TYPE_STRING:
+            return _string(field.name, rng)
+        case descriptor.FieldDescriptor.TYPE_BOOL:
+            return rng.random() < 0.5
+        case descriptor.FieldDescriptor.TYPE_ENUM:
+            # Skip the first value, that is always the unspecified one:
+            values = field.enum_type.values
+            return rng.choice(values[1:] if len(values) > 1 else values).number
+        case descriptor.FieldDescriptor.TYPE_FLOAT | descriptor.FieldDescriptor.TYPE_DOUBLE:
+            return round(rng.uniform(0, 100), 2)
+        case descriptor.FieldDescriptor.TYPE_BYTES:
+            return rng.randbytes(16)
+        case _:
+            return rng.randrange(1, 1000)
+
+def _string(name: str, rng: random.Random) -> str:
+    if name == "id" or name.endswith("_id"):
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    if name.endswith("_url"):
+        return f"https://{name.removesuffix('_url')}.{_word(rng)}.example.com"
+    if name in ("message", "description"):
+        return " ".join(_word(rng) for _ in range(rng.randrange(4, 12))).capitalize() + "."
+    return _word(rng)
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randrange(4, 10)))
+
+def _synthetic_oneof(oneof: descriptor.OneofDescriptor) -> bool:
+    """
+    Checks if the 'oneof' is the one that the compiler generates for an 'optional' field.
+    """
+    return len(oneof.fields) == 1 and oneof.name == f"_{oneof.fields[0].name}"
@@ -14,6 +14,9 @@
 # the License.
 #
 
+import functools
+import shutil
+
 class Tool:
     def __init__(
         self,
@@ -38,6 +41,17 @@ class Tool:
             )
             self.checksums[artifact_name] = artifact_checksum
 
+    @functools.cached_property
+    def path(self) -> str:
+        """
+        Returns the full path of the tool, or just the name if it isn't in the search path. The result is cached, so
+        that long running commands don't need to search for the tool every time that they run it.
+        """
+        path = shutil.which(self.name)
+        if path is None:
+            return self.name
+        return path
+
 BUF = Tool(
     name="buf",
     version="1.50.0",
@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Load generator that drives a server that implements the API, using gRPC or the HTTP+JSON routes of the gateway, and
+measures the latency, the throughput and the payload sizes of each kind of operation.
+
+This module uses the generated Python code, so it must be imported after calling 'python.load()'.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import random
+import time
+import typing
+
+import grpc
+import httpx
+from google.protobuf import any_pb2
+from google.protobuf import descriptor_pool
+from google.protobuf import json_format
+from google.protobuf import message
+from google.protobuf import message_factory
+
+from events.v1 import event_type_pb2
+from events.v1 import events_service_pb2
+from events.v1 import events_service_pb2_grpc
+from fulfillment.v1 import cluster_order_type_pb2
+from fulfillment.v1 import cluster_orders_service_pb2
+from fulfillment.v1 import cluster_orders_service_pb2_grpc
+from fulfillment.v1 import cluster_template_type_pb2
+from fulfillment.v1 import cluster_templates_service_pb2
+from fulfillment.v1 import cluster_templates_service_pb2_grpc
+
+from . import synthetic
+from .server import parameters
+
+# Kinds of operations that the workers can run, in the order they are reported:
+OPERATIONS = ["list", "get", "create"]
+
+# Name of the pseudo operation that reports the events received by the watchers:
+WATCH = "watch"
+
+class _Stats:
+    """
+    Measurements of one kind of operation.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = {}
+        self.sent = 0
+        self.received = 0
+
+    def add(self, elapsed: float, sent: int, received: int) -> None:
+        self.latencies.append(elapsed)
+        self.sent += sent
+        self.received += received
+
+    def fail(self, code: str) -> None:
+        self.errors[code] = self.errors.get(code, 0) + 1
+
+    def summary(self, duration: float, count: int | None = None) -> dict[str, typing.Any]:
+        """
+        Returns the summary of the measurements as a dictionary that can be serialized to JSON. Latencies are in
+        milliseconds and sizes in bytes. The count is the number of latencies unless it is explicitly given, which is
+        used for watches, where the latencies are only measured for some of the events.
+        """
+        if count is None:
+            count = len(self.latencies)
+        latencies = sorted(self.latencies)
+        return {
+            "count": count,
+            "errors": sum(self.errors.values()),
+            "error_codes": dict(sorted(self.errors.items())),
+            "throughput": round(count / duration, 2) if duration > 0 else 0,
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "mean": round(1000 * sum(latencies) / len(latencies), 3) if len(latencies) > 0 else None,
+                "max": round(1000 * latencies[-1], 3) if len(latencies) > 0 else None,
+            },
+            "request_bytes": round(self.sent / count, 1) if count > 0 else 0,
+            "response_bytes": round(self.received / count, 1) if count > 0 else 0,
+        }
+
+def _percentile(latencies: list[float], percent: int) -> float | None:
+    """
+    Returns the given percentile, in milliseconds, of a sorted list of latencies, using the nearest rank method.
+    """
+    if len(latencies) == 0:
+        return None
+    rank = max(0, -(-percent * len(latencies) // 100) - 1)
+    return round(1000 * latencies[rank], 3)
+
+class _Failure(Exception):
+    """
+    Raised by the transports when a request fails, with the gRPC status code or the HTTP status as the code.
+    """
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+class _Transport(abc.ABC):
+    """
+    Base class for the ways to send requests to the server. The methods that run the measured operations return, in
+    addition to their results, the number of bytes sent and received, and the watch yields the number of bytes received
+    for each response. These are the sizes of the serialized messages for gRPC and the sizes of the bodies for HTTP,
+    without framing or headers. For HTTP the received sizes are the sizes on the wire, so they include the effect of
+    the compression, but for gRPC they are the sizes before compression, because the library doesn't expose the others.
+    The templates are only listed to prepare the orders, so that method returns just the templates.
+    """
+
+    @abc.abstractmethod
+    async def list_templates(self) -> list[cluster_template_type_pb2.ClusterTemplate]:
+        pass
+
+    @abc.abstractmethod
+    async def list_orders(self, filter: str, limit: int) -> tuple[list[str], int, int]:
+        """
+        Lists orders and returns their identifiers.
+        """
+
+    @abc.abstractmethod
+    async def get_order(self, id: str) -> tuple[int, int]:
+        pass
+
+    @abc.abstractmethod
+    async def create_order(self, order: cluster_order_type_pb2.ClusterOrder) -> tuple[str, int, int]:
+        """
+        Creates an order and returns the identifier assigned by the server.
+        """
+
+    @abc.abstractmethod
+    def watch_events(self) -> typing.AsyncIterator[tuple[list[tuple[int, str]], int]]:
+        """
+        Watches events, and for each response yields the type and the object identifier of each order event, and the
+        size of the response.
+        """
+
+    async def close(self) -> None:
+        pass
+
+class _Grpc(_Transport):
+
+    def __init__(self, address: str, token: str | None, timeout: float, compression: str):
+        # The library accepts gzip responses by default, so to disable compression the client must tell the server
+        # that it accepts only the identity encoding, which is the first bit of the set of enabled algorithms:
+        if compression == "identity":
+            options = [("grpc.compression_enabled_algorithms_bitset", 1)]
+        elif compression == "gzip":
+            options = []
+        else:
+            raise Exception(f"Compression '{compression}' isn't supported for gRPC, it should be 'identity' or 'gzip'")
+        self._channel = grpc.aio.insecure_channel(address, options=options)
+        self._metadata = [("authorization", f"Bearer {token}")] if token is not None else None
+        self._timeout = timeout
+        self._templates = cluster_templates_service_pb2_grpc.ClusterTemplatesStub(self._channel)
+        self._orders = cluster_orders_service_pb2_grpc.ClusterOrdersStub(self._channel)
+        self._events = events_service_pb2_grpc.EventsStub(self._channel)
+
+    async def _call(self, method: typing.Callable, request: message.Message) -> message.Message:
+        try:
+            return await method(request, metadata=self._metadata, timeout=self._timeout)
+        except grpc.aio.AioRpcError as error:
+            raise _Failure(error.code().name) from error
+
+    async def list_templates(self) -> list[cluster_template_type_pb2.ClusterTemplate]:
+        request = cluster_templates_service_pb2.ClusterTemplatesListRequest()
+        response = await self._call(self._templates.List, request)
+        return list(response.items)
+
+    async def list_orders(self, filter: str, limit: int) -> tuple[list[str], int, int]:
+        request = cluster_orders_service_pb2.ClusterOrdersListRequest(filter=filter, limit=limit)
+        response = await self._call(self._orders.List, request)
+        return [item.id for item in response.items], request.ByteSize(), response.ByteSize()
+
+    async def get_order(self, id: str) -> tuple[int, int]:
+        request = cluster_orders_service_pb2.ClusterOrdersGetRequest(id=id)
+        response = await self._call(self._orders.Get, request)
+        return request.ByteSize(), response.ByteSize()
+
+    async def create_order(self, order: cluster_order_type_pb2.ClusterOrder) -> tuple[str, int, int]:
+        request = cluster_orders_service_pb2.ClusterOrdersCreateRequest(object=order)
+        response = await self._call(self._orders.Create, request)
+        return response.object.id, request.ByteSize(), response.ByteSize()
+
+    async def watch_events(self) -> typing.AsyncIterator[tuple[list[tuple[int, str]], int]]:
+        request = events_service_pb2.EventsWatchRequest()
+        try:
+            async for response in self._events.Watch(request, metadata=self._metadata):
+                events = list(response.events)
+                if response.HasField("event"):
+                    events.append(response.event)
+                yield [
+                    (event.type, event.cluster_order.id)
+                    for event in events
+                    if event.HasField("cluster_order")
+                ], response.ByteSize()
+        except grpc.aio.AioRpcError as error:
+            raise _Failure(error.code().name) from error
+
+    async def close(self) -> None:
+        await self._channel.close()
+
+class _Http(_Transport):
+
+    def __init__(self, address: str, token: str | None, timeout: float, connections: int, compression: str):
+        # The HTTP client logs every request and every step of the connections, which is too much for a load generator:
+        for name in ["httpx", "httpcore"]:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        # The HTTP client accepts all the encodings that it supports by default, so the header is always sent to make
+        # sure that the server uses the requested one:
+        headers = {"Accept-Encoding": compression}
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        self._client = httpx.AsyncClient(
+            base_url=address if "://" in address else f"http://{address}",
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        )
+
+    async def _call(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, typing.Any] | None = None,
+        body: message.Message | None = None,
+    ) -> tuple[typing.Any, int, int]:
+        content = None
+        if body is not None:
+            content = json_format.MessageToJson(body, preserving_proto_field_name=True, indent=None).encode()
+        try:
+            response = await self._client.request(
+                method,
+                path,
+                params=params,
+                content=content,
+                headers={"Content-Type": "application/json"} if content is not None else None,
+            )
+        except httpx.HTTPError as error:
+            raise _Failure(type(error).__name__) from error
+        if response.status_code >= 400:
+            raise _Failure(str(response.status_code))
+        return response.json(), len(content or b""), response.num_bytes_downloaded
+
+    async def list_templates(self) -> list[cluster_template_type_pb2.ClusterTemplate]:
+        data, _, _ = await self._call("GET", "/api/fulfillment/v1/cluster_templates")
+        response = cluster_templates_service_pb2.ClusterTemplatesListResponse()
+        json_format.ParseDict(data, response, ignore_unknown_fields=True)
+        return list(response.items)
+
+    async def list_orders(self, filter: str, limit: int) -> tuple[list[str], int, int]:
+        params = {"limit": limit}
+        if filter != "":
+            params["filter"] = filter
+        data, sent, received = await self._call("GET", "/api/fulfillment/v1/cluster_orders", params=params)
+        return [item["id"] for item in data.get("items", [])], sent, received
+
+    async def get_order(self, id: str) -> tuple[int, int]:
+        _, sent, received = await self._call("GET", f"/api/fulfillment/v1/cluster_orders/{id}")
+        return sent, received
+
+    async def create_order(self, order: cluster_order_type_pb2.ClusterOrder) -> tuple[str, int, int]:
+        data, sent, received = await self._call("POST", "/api/fulfillment/v1/cluster_orders", body=order)
+        return data["id"], sent, received
+
+    async def watch_events(self) -> typing.AsyncIterator[tuple[list[tuple[int, str]], int]]:
+        try:
+            async with self._client.stream("GET", "/api/events/v1/events", timeout=None) as response:
+                if response.status_code >= 400:
+                    raise _Failure(str(response.status_code))
+                downloaded = 0
+                async for line in response.aiter_lines():
+                    if line == "":
+                        continue
+                    size = response.num_bytes_downloaded - downloaded
+                    downloaded = response.num_bytes_downloaded
+                    data = json.loads(line)
+                    if "error" in data:
+                        raise _Failure(str(data["error"].get("code")))
+                    result = data["result"]
+                    events = result.get("events", [])
+                    if "event" in result:
+                        events.append(result["event"])
+                    yield [
+                        (event_type_pb2.EventType.Value(event["type"]), event["cluster_order"]["id"])
+                        for event in events
+                        if "cluster_order" in event
+                    ], size
+        except httpx.HTTPError as error:
+            raise _Failure(type(error).__name__) from error
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+class _Run:
+    """
+    State of one run of the load generator against one transport.
+    """
+
+    def __init__(
+        self,
+        transport: _Transport,
+        concurrency: int,
+        duration: float,
+        warmup: float,
+        mix: dict[str, int],
+        watchers: int,
+        filters: list[str],
+        page_size: int,
+        seed: int,
+    ):
+        self._transport = transport
+        self._concurrency = concurrency
+        self._duration = duration
+        self._warmup = warmup
+        self._operations = [operation for operation in OPERATIONS if mix.get(operation, 0) > 0]
+        self._weights = [mix[operation] for operation in self._operations]
+        self._watchers = watchers
+        self._filters = filters
+        self._page_size = page_size
+        self._rng = random.Random(seed)
+        self._stats = {operation: _Stats() for operation in self._operations + [WATCH]}
+        self._ids = []
+        self._templates = []
+        self._created = {}
+        self._arrivals = []
+        self._events = 0
+        self._measuring = False
+        self._begin = 0.0
+        self._end = 0.0
+
+    async def run(self) -> dict[str, typing.Any]:
+        # Retrieve the templates, for creating valid orders, and some identifiers, for getting existing orders:
+        self._templates = await self._transport.list_templates()
+        self._ids, _, _ = await self._transport.list_orders("", 1000)
+        if "create" in self._operations and len(self._templates) == 0:
+            raise Exception("Can't create orders because the server doesn't have templates")
+        if "get" in self._operations and len(self._ids) == 0 and "create" not in self._operations:
+            raise Exception("Can't get orders because the server doesn't have orders")
+
+        watchers = [asyncio.create_task(self._watch()) for _ in range(self._watchers)]
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self._begin = start + self._warmup
+        self._end = self._begin + self._duration
+        if self._warmup > 0:
+            logging.info(f"Warming up for {self._warmup} seconds")
+        workers = [asyncio.create_task(self._work()) for _ in range(self._concurrency)]
+        await asyncio.sleep(self._warmup)
+        self._measuring = True
+        logging.info(f"Measuring for {self._duration} seconds")
+        await asyncio.gather(*workers)
+        self._measuring = False
+
+        # Give the watchers some time to receive the events of the last orders created:
+        if len(watchers) > 0 and len(self._created) > 0:
+            await asyncio.sleep(1)
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+
+        results = {
+            operation: self._stats[operation].summary(self._duration)
+            for operation in self._operations
+        }
+        if self._watchers > 0:
+            watch = self._stats[WATCH]
+            watch.latencies = [
+                arrival - self._created[id]
+                for id, arrival in self._arrivals
+                if id in self._created
+            ]
+            results[WATCH] = watch.summary(self._duration, count=self._events)
+        return results
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while loop.time() < self._end:
+            operation = self._rng.choices(self._operations, weights=self._weights)[0]
+            measured = loop.time() >= self._begin
+            start = time.perf_counter()
+            try:
+                match operation:
+                    case "list":
+                        filter = self._rng.choice(self._filters)
+                        _, sent, received = await self._transport.list_orders(filter, self._page_size)
+                    case "get":
+                        sent, received = await self._transport.get_order(self._rng.choice(self._ids))
+                    case "create":
+                        id, sent, received = await self._transport.create_order(self._order())
+                        if measured:
+                            self._created[id] = start
+                        self._ids.append(id)
+            except _Failure as failure:
+                if measured:
+                    self._stats[operation].fail(failure.code)
+                continue
+            if measured:
+                self._stats[operation].add(time.perf_counter() - start, sent, received)
+
+    async def _watch(self) -> None:
+        stats = self._stats[WATCH]
+        try:
+            async for events, size in self._transport.watch_events():
+                arrival = time.perf_counter()
+                if not self._measuring:
+                    continue
+                self._events += len(events)
+                stats.received += size
+                for type, id in events:
+                    if type == event_type_pb2.EVENT_TYPE_OBJECT_CREATED:
+                        self._arrivals.append((id, arrival))
+        except _Failure as failure:
+            stats.fail(failure.code)
+
+    def _order(self) -> cluster_order_type_pb2.ClusterOrder:
+        """
+        Generates an order for one of the templates, with values of the right types for all its parameters.
+        """
+        template = self._rng.choice(self._templates)
+
+        def fill(order: cluster_order_type_pb2.ClusterOrder) -> None:
+            order.ClearField("id")
+            order.ClearField("metadata")
+            order.ClearField("status")
+            order.spec.template_id = template.id
+            order.spec.ClearField("template_parameters")
+            order.spec.ClearField("template_parameter_values")
+            for definition in template.parameters:
+                value = any_pb2.Any()
+                value.Pack(synthetic.generate(_message_class(definition.type), self._rng))
+                order.spec.template_parameter_values[definition.name].CopyFrom(
+                    parameters.to_value(definition.name, value)
+                )
+
+        return synthetic.generate(cluster_order_type_pb2.ClusterOrder, self._rng, fill=fill)
+
+def _message_class(type_url: str) -> type[message.Message]:
+    type_name = type_url.split("/")[-1]
+    return message_factory.GetMessageClass(descriptor_pool.Default().FindMessageTypeByName(type_name))
+
+def run(
+    transport: str,
+    address: str,
+    token: str | None = None,
+    concurrency: int = 10,
+    duration: float = 10,
+    warmup: float = 1,
+    mix: dict[str, int] | None = None,
+    watchers: int = 0,
+    filters: list[str] | None = None,
+    page_size: int = 100,
+    timeout: float = 10,
+    seed: int = 0,
+    compression: str = "identity",
+) -> dict[str, typing.Any]:
+    """
+    Runs the load generator against the server with the given address, using the given transport, that can be 'grpc'
+    or 'http'. The given number of workers send requests one after the other, choosing the kind of operation randomly
+    according to the weights of the mix, during the warm up period, that isn't measured, and then during the given
+    duration. The watchers are subscribed to the events during the complete run, and the latency reported for them is
+    the time from the start of the creation of an order to the arrival of the corresponding event. The compression is
+    the encoding that the client accepts for the responses, and can be 'identity', 'gzip' or, only for HTTP, 'zstd'.
+
+    Returns a dictionary, that can be serialized to JSON, containing the summary of each kind of operation.
+    """
+    if mix is None:
+        mix = {"list": 20, "get": 70, "create": 10}
+    if filters is None:
+        filters = [""]
+
+    async def main() -> dict[str, typing.Any]:
+        if transport == "grpc":
+            client = _Grpc(address, token, timeout, compression)
+        elif transport == "http":
+            client = _Http(address, token, timeout, concurrency + watchers, compression)
+        else:
+            raise Exception(f"Transport '{transport}' isn't supported, it should be 'grpc' or 'http'")
+        try:
+            return await _Run(
+                transport=client,
+                concurrency=concurrency,
+                duration=duration,
+                warmup=warmup,
+                mix=mix,
+                watchers=watchers,
+                filters=filters,
+                page_size=page_size,
+                seed=seed,
+            ).run()
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
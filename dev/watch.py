@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Functions to watch the specification files and check and regenerate them when they change.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import pathlib
+import select
+import shutil
+import struct
+import tempfile
+import time
+import typing
+
+import click
+
+from . import command
+from . import dirs
+from . import fingerprint
+from . import tools
+from .generate import openapi
+
+# Configuration files, relative to the project directory, that affect all the stages:
+_CONFIG_FILES = ["buf.yaml", "buf.lock"]
+
+@click.command()
+@click.option(
+    "--debounce",
+    type=float,
+    default=0.3,
+    show_default=True,
+    help="Seconds to wait for more changes before running the stages.",
+)
+@click.option(
+    "--poll",
+    is_flag=True,
+    help="Check modification times periodically instead of using inotify.",
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks when polling.",
+)
+@click.option(
+    "--converter",
+    "converter_name",
+    type=click.Choice(["swagger-codegen", "native"]),
+    default="native",
+    show_default=True,
+    help="Tool used to convert OpenAPI version 2 to version 3.",
+)
+def watch(debounce: float, poll: bool, interval: float, converter_name: str) -> None:
+    """
+    Watches the specification and checks and regenerates it when it changes.
+    """
+    project_dir = dirs.project()
+    proto_dir = project_dir / "proto"
+    watcher = None
+    if not poll:
+        try:
+            watcher = _InotifyWatcher(project_dir, proto_dir)
+        except Exception as err:
+            logging.warning(f"Failed to use inotify, will use polling instead: {err}")
+    if watcher is None:
+        watcher = _PollingWatcher(project_dir, proto_dir, interval)
+    session = _Session(converter_name)
+    try:
+        # Run all the stages once, so that the initial state is known:
+        session.run(changed=None)
+
+        # Wait for changes, collecting them till there is a quiet period:
+        logging.info(f"Watching '{proto_dir.relative_to(project_dir)}' for changes, press Ctrl+C to stop")
+        while True:
+            changed = watcher.wait(timeout=None)
+            while more := watcher.wait(timeout=debounce):
+                changed |= more
+            session.run(changed=changed)
+    except KeyboardInterrupt:
+        logging.info("Stopped watching")
+    finally:
+        watcher.close()
+        session.close()
+
+class _Session:
+    """
+    Keeps the state that can be reused between runs: the resolved paths of the tools, the fingerprints of the
+    generated files, and a work directory with a fixed path, so that the 'buf' template is rendered only once.
+    """
+
+    def __init__(self, converter_name: str):
+        self._converter_name = converter_name
+        self._state = fingerprint.State("generate")
+        self._work_dir = pathlib.Path(tempfile.mkdtemp())
+        self._buf = tools.BUF.path
+
+    def close(self) -> None:
+        shutil.rmtree(self._work_dir)
+
+    def run(self, changed: set[pathlib.Path] | None) -> None:
+        """
+        Runs the stages affected by the given changed files. If the set is None, or if a configuration file has
+        changed, or if a file has been removed, then the stages run for all the files.
+        """
+        project_dir = dirs.project()
+        paths = None
+        if changed is not None:
+            names = sorted(str(path.relative_to(project_dir)) for path in changed)
+            logging.info(f"Detected changes in {', '.join(names)}")
+            full = any(name in _CONFIG_FILES for name in names) or any(not path.exists() for path in changed)
+            if not full:
+                paths = [str(path.relative_to(project_dir)) for path in sorted(changed)]
+
+        # Check the format and the lint rules only for the files that changed, and then generate. The generation
+        # stages decide by themselves what needs to be regenerated.
+        start = time.monotonic()
+        self._stage("format", self._format, paths)
+        self._stage("lint", self._lint, paths)
+        self._stage("generate", self._generate)
+        logging.info(f"Finished in {time.monotonic() - start:.2f} s")
+
+    def _stage(self, name: str, function: typing.Callable, *args) -> None:
+        start = time.monotonic()
+        try:
+            function(*args)
+        except Exception as err:
+            logging.error(f"Stage '{name}' failed after {time.monotonic() - start:.2f} s: {err}")
+            return
+        logging.info(f"Stage '{name}' finished in {time.monotonic() - start:.2f} s")
+
+    def _format(self, paths: list[str] | None) -> None:
+        args = [self._buf, "format", "--diff", "--exit-code"]
+        if paths is not None:
+            for path in paths:
+                args.extend(["--path", path])
+        command.run(args=args, check=True)
+
+    def _lint(self, paths: list[str] | None) -> None:
+        args = [self._buf, "lint"]
+        if paths is not None:
+            for path in paths:
+                args.extend(["--path", path])
+        command.run(args=args, check=True)
+
+    def _generate(self) -> None:
+        openapi(
+            converter_name=self._converter_name,
+            state=self._state,
+            work_dir=self._work_dir,
+        )
+
+def _is_relevant(project_dir: pathlib.Path, path: pathlib.Path) -> bool:
+    """
+    Checks if a change in the given file is relevant, ignoring the temporary files created by editors.
+    """
+    if path.suffix == ".proto":
+        return True
+    return path.parent == project_dir and path.name in _CONFIG_FILES
+
+class _PollingWatcher:
+    """
+    Detects changes comparing the sizes and modification times of the files periodically.
+    """
+
+    def __init__(self, project_dir: pathlib.Path, proto_dir: pathlib.Path, interval: float):
+        self._project_dir = project_dir
+        self._proto_dir = proto_dir
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def close(self) -> None:
+        pass
+
+    def wait(self, timeout: float | None) -> set[pathlib.Path]:
+        """
+        Waits till some file changes, or till the timeout expires, and returns the set of changed files.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if len(changed) > 0:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self._interval
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+
+    def _scan(self) -> dict[pathlib.Path, tuple[int, int]]:
+        result = {}
+        files = list(self._proto_dir.rglob("*.proto"))
+        files.extend(self._project_dir / name for name in _CONFIG_FILES)
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            result[file] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+# Constants from the 'sys/inotify.h' header:
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+
+# Layout of the header of the events: watch descriptor, mask, cookie and length of the name.
+_EVENT_HEADER = struct.Struct("iIII")
+
+class _InotifyWatcher:
+    """
+    Detects changes using the Linux inotify mechanism, called directly from the C library so that no additional
+    Python package is needed. A watch is added for each directory under the 'proto' directory, and for the project
+    directory itself, to detect changes in the configuration files.
+    """
+
+    def __init__(self, project_dir: pathlib.Path, proto_dir: pathlib.Path):
+        self._project_dir = project_dir
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise Exception("Failed to find the C library")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise Exception("The C library doesn't support inotify")
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._dirs = {}
+        self._add(project_dir)
+        for directory in [proto_dir, *proto_dir.rglob("*")]:
+            if directory.is_dir():
+                self._add(directory)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def wait(self, timeout: float | None) -> set[pathlib.Path]:
+        """
+        Waits till some file changes, or till the timeout expires, and returns the set of changed files.
+        """
+        changed = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(changed) == 0:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if len(readable) == 0:
+                break
+            changed |= self._read()
+        return changed
+
+    def _read(self) -> set[pathlib.Path]:
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="surrogateescape")
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = directory / name
+            if mask & _IN_ISDIR:
+                # New directories need their own watch, and the files that were created before the watch was added
+                # need to be reported:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    for subdir in [path, *path.rglob("*")]:
+                        if subdir.is_dir():
+                            self._add(subdir)
+                        elif _is_relevant(self._project_dir, subdir):
+                            changed.add(subdir)
+                continue
+            if _is_relevant(self._project_dir, path):
+                changed.add(path)
+        return changed
+
+    def _add(self, directory: pathlib.Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()), str(directory))
+        self._dirs[wd] = directory
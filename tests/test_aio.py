@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Checks the retries, the deadlines, the hedging and the coalescing of the calls of the asynchronous client, using a
+transport that doesn't send the requests to a server.
+"""
+
+import asyncio
+import typing
+import unittest
+from unittest import mock
+
+import grpc
+from google.protobuf import descriptor
+from google.protobuf import message
+from google.protobuf import message_factory
+
+from dev.client import aio
+from dev.client.errors import Error
+
+# Function that receives the number of the attempt, starting with zero, the method and the request, and returns the
+# response or raises an error:
+_Handler = typing.Callable[[int, descriptor.MethodDescriptor, message.Message], typing.Awaitable[message.Message]]
+
+def _response(method: descriptor.MethodDescriptor, request: message.Message) -> message.Message:
+    """
+    Returns the response for a request to a 'Get' or 'GetKubeconfig' method, containing the identifier of the request.
+    """
+    result = message_factory.GetMessageClass(method.output_type)()
+    if method.name == "GetKubeconfig":
+        result.kubeconfig = f"cluster: {request.id}"
+    elif "object" in result.DESCRIPTOR.fields_by_name:
+        result.object.id = request.id
+    return result
+
+async def _succeed(attempt: int, method: descriptor.MethodDescriptor, request: message.Message) -> message.Message:
+    return _response(method, request)
+
+def _fail(code: grpc.StatusCode, successes: typing.Container[int] = ()) -> _Handler:
+    """
+    Returns a handler that fails with the given code, except for the given attempts.
+    """
+    async def handler(attempt: int, method: descriptor.MethodDescriptor, request: message.Message) -> message.Message:
+        if attempt in successes:
+            return _response(method, request)
+        raise Error(code, f"Attempt {attempt} failed")
+    return handler
+
+class _Transport(aio._Transport):
+    """
+    Transport that passes the requests to a handler, and records the attempts, when they started, the timeouts that
+    they were given, and the ones that were cancelled.
+    """
+
+    def __init__(self, handler: _Handler):
+        self.handler = handler
+        self.calls: list[tuple[str, float]] = []
+        self.starts: list[float] = []
+        self.cancelled: list[int] = []
+
+    async def call(
+        self,
+        method: descriptor.MethodDescriptor,
+        request: message.Message,
+        timeout: float,
+    ) -> message.Message:
+        attempt = len(self.calls)
+        self.calls.append((method.name, timeout))
+        self.starts.append(asyncio.get_running_loop().time())
+        try:
+            return await self.handler(attempt, method, request)
+        except asyncio.CancelledError:
+            self.cancelled.append(attempt)
+            raise
+
+class _Base(unittest.IsolatedAsyncioTestCase):
+
+    async def _client(self, handler: _Handler = _succeed, **kwargs) -> aio.Client:
+        """
+        Creates a client that uses a fake transport with the given handler. The transport is available in the
+        'transport' attribute of the test.
+        """
+        client = aio.Client("localhost:1", **kwargs)
+        await client.close()
+        self.transport = _Transport(handler)
+        client._transport = self.transport
+        return client
+
+class RetryTest(_Base):
+
+    def setUp(self):
+        # Use the longest possible delays, so that the backoff can be checked:
+        patcher = mock.patch("dev.client.aio.random.uniform", side_effect=lambda low, high: high)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_backoff(self):
+        """
+        Checks that idempotent calls that fail with a transient error are retried, doubling the delay each time till
+        the maximum.
+        """
+        retry = aio.RetryPolicy(max_attempts=4, initial_backoff=0.05, max_backoff=0.15)
+        client = await self._client(_fail(grpc.StatusCode.UNAVAILABLE, successes={3}), retry=retry)
+        object = await client.cluster_orders.get("a")
+        self.assertEqual(object.id, "a")
+        self.assertEqual(len(self.transport.calls), 4)
+        starts = self.transport.starts
+        delays = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        for delay, expected in zip(delays, [0.05, 0.1, 0.15]):
+            self.assertGreaterEqual(delay, expected)
+            self.assertLess(delay, expected + 0.04)
+
+    async def test_max_attempts(self):
+        """
+        Checks that the error of the last attempt is returned when all the attempts fail.
+        """
+        retry = aio.RetryPolicy(max_attempts=3, initial_backoff=0.001)
+        client = await self._client(_fail(grpc.StatusCode.RESOURCE_EXHAUSTED), retry=retry)
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.list()
+        self.assertEqual(context.exception.code, grpc.StatusCode.RESOURCE_EXHAUSTED)
+        self.assertEqual(context.exception.message, "Attempt 2 failed")
+        self.assertEqual([name for name, _ in self.transport.calls], ["List"] * 3)
+
+    async def test_not_retried(self):
+        """
+        Checks that errors that aren't transient, and errors of methods that change the state of the server, aren't
+        retried.
+        """
+        client = await self._client(_fail(grpc.StatusCode.NOT_FOUND, successes={1}))
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.get("a")
+        self.assertEqual(context.exception.code, grpc.StatusCode.NOT_FOUND)
+        self.assertEqual(len(self.transport.calls), 1)
+
+        client = await self._client(_fail(grpc.StatusCode.UNAVAILABLE, successes={1}))
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.delete("a")
+        self.assertEqual(context.exception.code, grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(len(self.transport.calls), 1)
+
+    async def test_deadline(self):
+        """
+        Checks that each attempt gets the time that remains till the deadline of the call, and that there are no more
+        retries when the delay would exceed the deadline.
+        """
+        retry = aio.RetryPolicy(max_attempts=10, initial_backoff=0.1, max_backoff=0.1)
+        client = await self._client(_fail(grpc.StatusCode.UNAVAILABLE), retry=retry, timeout=5)
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.get("a", timeout=0.25)
+        self.assertEqual(context.exception.code, grpc.StatusCode.UNAVAILABLE)
+        timeouts = [timeout for _, timeout in self.transport.calls]
+        self.assertEqual(len(timeouts), 3)
+        self.assertLessEqual(timeouts[0], 0.25)
+        self.assertLessEqual(timeouts[1], 0.15)
+        self.assertLessEqual(timeouts[2], 0.05)
+
+    async def test_default_timeout(self):
+        """
+        Checks that calls without a timeout use the default of the client, and that calls whose deadline already
+        expired aren't sent.
+        """
+        client = await self._client(timeout=3)
+        await client.cluster_orders.get("a")
+        self.assertLessEqual(self.transport.calls[0][1], 3)
+        self.assertGreater(self.transport.calls[0][1], 2.9)
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.get("b", timeout=0)
+        self.assertEqual(context.exception.code, grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(len(self.transport.calls), 1)
+
+class HedgingTest(_Base):
+
+    async def test_first_response_wins(self):
+        """
+        Checks that a request that doesn't get a response after the delay is sent again, that the first response is
+        used, and that the attempts that are still running are cancelled.
+        """
+        async def handler(attempt: int, method: descriptor.MethodDescriptor, request: message.Message):
+            if attempt == 0:
+                await asyncio.sleep(10)
+            return _response(method, request)
+
+        client = await self._client(handler, hedging=aio.HedgingPolicy(delay=0.01, max_attempts=3))
+        object = await client.cluster_orders.get("a")
+        await asyncio.sleep(0)
+        self.assertEqual(object.id, "a")
+        self.assertEqual(len(self.transport.calls), 2)
+        self.assertGreaterEqual(self.transport.starts[1] - self.transport.starts[0], 0.01)
+        self.assertEqual(self.transport.cancelled, [0])
+
+    async def test_transient_failure(self):
+        """
+        Checks that an attempt that fails with a transient error starts the next one without waiting for the delay.
+        """
+        client = await self._client(
+            _fail(grpc.StatusCode.UNAVAILABLE, successes={1}),
+            hedging=aio.HedgingPolicy(delay=10, max_attempts=2),
+        )
+        object = await client.cluster_orders.get("a")
+        self.assertEqual(object.id, "a")
+        self.assertLess(self.transport.starts[1] - self.transport.starts[0], 1)
+
+    async def test_permanent_failure(self):
+        """
+        Checks that an attempt that fails with an error that isn't transient ends the call and cancels the other
+        attempts.
+        """
+        async def handler(attempt: int, method: descriptor.MethodDescriptor, request: message.Message):
+            if attempt == 0:
+                await asyncio.sleep(10)
+            raise Error(grpc.StatusCode.PERMISSION_DENIED, "Not allowed")
+
+        client = await self._client(handler, hedging=aio.HedgingPolicy(delay=0.01, max_attempts=2))
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.get("a")
+        await asyncio.sleep(0)
+        self.assertEqual(context.exception.code, grpc.StatusCode.PERMISSION_DENIED)
+        self.assertEqual(self.transport.cancelled, [0])
+
+    async def test_all_attempts_fail(self):
+        """
+        Checks that the last error is returned when all the attempts fail with transient errors.
+        """
+        client = await self._client(
+            _fail(grpc.StatusCode.UNAVAILABLE),
+            hedging=aio.HedgingPolicy(delay=0.01, max_attempts=3),
+        )
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.get("a")
+        self.assertEqual(context.exception.message, "Attempt 2 failed")
+        self.assertEqual(len(self.transport.calls), 3)
+
+class CoalesceTest(_Base):
+
+    async def asyncSetUp(self):
+        self.release = asyncio.Event()
+
+    async def _wait(self, attempt: int, method: descriptor.MethodDescriptor, request: message.Message):
+        await self.release.wait()
+        return _response(method, request)
+
+    async def test_shared_call(self):
+        """
+        Checks that concurrent identical calls share one request, and that each caller gets its own copy of the
+        response.
+        """
+        client = await self._client(self._wait)
+        tasks = [asyncio.ensure_future(client.cluster_orders.get("a")) for _ in range(3)]
+        tasks.append(asyncio.ensure_future(client.cluster_orders.get("b")))
+        await asyncio.sleep(0.01)
+        self.release.set()
+        objects = await asyncio.gather(*tasks)
+        self.assertEqual([object.id for object in objects], ["a", "a", "a", "b"])
+        self.assertEqual(len(self.transport.calls), 2)
+        objects[0].id = "changed"
+        self.assertEqual(objects[1].id, "a")
+        self.assertEqual(client._inflight, {})
+
+    async def test_cancelled_caller(self):
+        """
+        Checks that cancelling the caller that started the shared request doesn't cancel it for the other callers.
+        """
+        client = await self._client(self._wait)
+        first = asyncio.ensure_future(client.cluster_orders.get("a"))
+        second = asyncio.ensure_future(client.cluster_orders.get("a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        self.release.set()
+        object = await second
+        self.assertEqual(object.id, "a")
+        self.assertTrue(first.cancelled())
+        self.assertEqual(len(self.transport.calls), 1)
+        self.assertEqual(self.transport.cancelled, [])
+
+    async def test_kubeconfig(self):
+        """
+        Checks that concurrent calls to retrieve the same Kubeconfig are coalesced too.
+        """
+        client = await self._client(self._wait)
+        tasks = [asyncio.ensure_future(client.clusters.get_kubeconfig("a")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        self.release.set()
+        responses = await asyncio.gather(*tasks)
+        self.assertEqual([response.kubeconfig for response in responses], ["cluster: a"] * 2)
+        self.assertEqual(self.transport.calls, [("GetKubeconfig", mock.ANY)])
+        with self.assertRaises(Error) as context:
+            await client.cluster_orders.get_kubeconfig("a")
+        self.assertEqual(context.exception.code, grpc.StatusCode.UNIMPLEMENTED)
+
+    async def test_disabled(self):
+        """
+        Checks that calls aren't coalesced when it is disabled, or when the method isn't a 'Get' method.
+        """
+        client = await self._client(self._wait, coalesce=False)
+        tasks = [asyncio.ensure_future(client.cluster_orders.get("a")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(len(self.transport.calls), 2)
+
+        client = await self._client(self._wait)
+        tasks = [asyncio.ensure_future(client.cluster_orders.list(filter="state = 'FAILED'")) for _ in range(2)]
+        await asyncio.gather(*tasks)
+        self.assertEqual(len(self.transport.calls), 2)
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Checks the delivery of events by the reference server: the subscriptions of the broadcaster, the coalescing and
+reduction of changes, and the batches sent by the 'Watch' method.
+"""
+
+import datetime
+import time
+import typing
+import unittest
+
+import grpc
+
+from events.v1 import event_type_pb2
+from events.v1 import events_service_pb2
+from fulfillment.v1 import cluster_order_type_pb2
+
+from dev.server import broadcaster
+from dev.server import services
+from dev.server import store
+from dev.server.errors import Error
+
+_CREATED = event_type_pb2.EVENT_TYPE_OBJECT_CREATED
+_UPDATED = event_type_pb2.EVENT_TYPE_OBJECT_UPDATED
+_DELETED = event_type_pb2.EVENT_TYPE_OBJECT_DELETED
+
+class _Context:
+    """
+    Replaces the context of a call to a server streaming method, with the methods that the 'Watch' method uses. The
+    call stops being active after a few seconds, so that a test that waits for events that never arrive fails instead
+    of blocking.
+    """
+
+    def __init__(self):
+        self.callbacks = []
+        self.deadline = time.monotonic() + 5
+
+    def is_active(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    def add_callback(self, callback) -> bool:
+        self.callbacks.append(callback)
+        return True
+
+    def abort(self, code: grpc.StatusCode, details: str) -> None:
+        raise Error(code, details)
+
+    def disable_next_message_compression(self) -> None:
+        pass
+
+class _Base(unittest.TestCase):
+
+    def setUp(self):
+        self.db = store.Database(retention=5, queue_size=10)
+
+    def _create(self, id: str, template_id: str = "small") -> cluster_order_type_pb2.ClusterOrder:
+        object = cluster_order_type_pb2.ClusterOrder(id=id)
+        object.spec.template_id = template_id
+        object.status.state = cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING
+        return self.db.create(self.db.cluster_orders, object)
+
+    def _update(self, id: str, **changes) -> cluster_order_type_pb2.ClusterOrder:
+        object = cluster_order_type_pb2.ClusterOrder()
+        object.CopyFrom(self.db.cluster_orders.get(id))
+        for name, value in changes.items():
+            if name == "template_id":
+                object.spec.template_id = value
+            else:
+                object.status.state = value
+        return self.db.update(self.db.cluster_orders, object)
+
+    def _delete(self, id: str) -> None:
+        self.db.delete(self.db.cluster_orders, id)
+
+    def _summary(self, changes: list[broadcaster.Change]) -> list[tuple[int, str, int, list[str] | None]]:
+        """
+        Returns the version, object identifier, type and changed fields of each change, which is easier to compare.
+        """
+        return [
+            (event.resource_version, event.cluster_order.id, event.type, changed)
+            for event, changed in changes
+        ]
+
+class SubscriptionTest(_Base):
+
+    def test_receives_published(self):
+        """
+        Checks that a subscription receives the events published after it was created, with the paths of the fields
+        that changed in updates, excluding the metadata.
+        """
+        subscription = self.db.events.subscribe()
+        self._create("a")
+        self._update("a", template_id="large")
+        self._delete("a")
+        self.assertEqual(
+            self._summary(subscription.get(timeout=0)),
+            [(1, "a", _CREATED, None), (2, "a", _UPDATED, ["spec.template_id"]), (3, "a", _DELETED, None)],
+        )
+        self.assertEqual(subscription.get(timeout=0), [])
+
+    def test_limit(self):
+        """
+        Checks that the events that exceed the limit stay in the queue for the next call.
+        """
+        subscription = self.db.events.subscribe()
+        for id in "abc":
+            self._create(id)
+        self.assertEqual([event.resource_version for event, _ in subscription.get(timeout=0, limit=2)], [1, 2])
+        self.assertEqual([event.resource_version for event, _ in subscription.get(timeout=0, limit=2)], [3])
+
+    def test_since(self):
+        """
+        Checks that a subscription created with a version first receives the retained events newer than that
+        version.
+        """
+        for id in "abcd":
+            self._create(id)
+        subscription = self.db.events.subscribe(since=2)
+        self._create("e")
+        self.assertEqual([event.resource_version for event, _ in subscription.get(timeout=0)], [3, 4, 5])
+
+    def test_since_discarded(self):
+        """
+        Checks that a version older than the retained events is rejected with the 'OUT_OF_RANGE' code, and that the
+        oldest retained version is still accepted.
+        """
+        for id in "abcdefg":
+            self._create(id)
+        with self.assertRaises(Error) as context:
+            self.db.events.subscribe(since=1)
+        self.assertEqual(context.exception.code, grpc.StatusCode.OUT_OF_RANGE)
+        subscription = self.db.events.subscribe(since=2)
+        self.assertEqual([event.resource_version for event, _ in subscription.get(timeout=0)], [3, 4, 5, 6, 7])
+
+    def test_overflow(self):
+        """
+        Checks that a subscription fails with the 'RESOURCE_EXHAUSTED' code when more events than the size of the queue
+        are published without reading them, and that it stays failed.
+        """
+        subscription = self.db.events.subscribe()
+        for number in range(11):
+            self._create(f"order-{number}")
+        for _ in range(2):
+            with self.assertRaises(Error) as context:
+                subscription.get(timeout=0)
+            self.assertEqual(context.exception.code, grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+    def test_close(self):
+        """
+        Checks that a closed subscription doesn't receive more events.
+        """
+        subscription = self.db.events.subscribe()
+        subscription.close()
+        self._create("a")
+        self.assertEqual(subscription.get(timeout=0), [])
+
+class CoalesceTest(_Base):
+
+    def _changes(self) -> typing.Callable[[], list[broadcaster.Change]]:
+        """
+        Subscribes to the events and returns a function that returns the changes received since the previous call.
+        """
+        subscription = self.db.events.subscribe()
+        self.addCleanup(subscription.close)
+        return lambda: subscription.get(timeout=0)
+
+    def test_create_and_updates(self):
+        """
+        Checks that a creation followed by updates is replaced by a creation with the last version of the object.
+        """
+        changes = self._changes()
+        self._create("a")
+        self._update("a", template_id="medium")
+        self._update("a", template_id="large")
+        result = broadcaster.coalesce(changes())
+        self.assertEqual(self._summary(result), [(3, "a", _CREATED, None)])
+        self.assertEqual(result[0][0].cluster_order.spec.template_id, "large")
+
+    def test_updates(self):
+        """
+        Checks that several updates are replaced by one update with the union of the changed fields.
+        """
+        self._create("a")
+        changes = self._changes()
+        self._update("a", template_id="large")
+        self._update("a", state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED)
+        self._update("a", template_id="medium")
+        self.assertEqual(
+            self._summary(broadcaster.coalesce(changes())),
+            [(4, "a", _UPDATED, ["spec.template_id", "status.state"])],
+        )
+
+    def test_deletion(self):
+        """
+        Checks that changes followed by a deletion are replaced by the deletion, and that a new object with the same
+        identifier created after the deletion is kept.
+        """
+        self._create("a")
+        changes = self._changes()
+        self._create("b")
+        self._update("a", template_id="large")
+        self._delete("a")
+        self._create("a")
+        self.assertEqual(
+            self._summary(broadcaster.coalesce(changes())),
+            [(2, "b", _CREATED, None), (4, "a", _DELETED, None), (5, "a", _CREATED, None)],
+        )
+
+    def test_shared_events(self):
+        """
+        Checks that coalescing doesn't modify the events, as they are shared by all the subscriptions.
+        """
+        changes = self._changes()
+        self._create("a")
+        self._update("a", template_id="large")
+        events = changes()
+        broadcaster.coalesce(events)
+        self.assertEqual(events[1][0].type, _UPDATED)
+
+    def test_reduce(self):
+        """
+        Checks that reduced updates contain only the identifier, the metadata and the changed fields, and the paths of
+        those fields, and that other events aren't reduced.
+        """
+        changes = self._changes()
+        self._create("a")
+        self._update("a", template_id="large")
+        created, updated = changes()
+        self.assertIs(broadcaster.reduce(created), created[0])
+        event = broadcaster.reduce(updated)
+        self.assertEqual(list(event.changed_fields.paths), ["spec.template_id"])
+        self.assertEqual(event.cluster_order.id, "a")
+        self.assertEqual(event.cluster_order.metadata.resource_version, 2)
+        self.assertEqual(event.cluster_order.spec.template_id, "large")
+        self.assertFalse(event.cluster_order.HasField("status"))
+
+    def test_diff(self):
+        """
+        Checks that nested messages are compared field by field, and the well known types as a whole.
+        """
+        old = cluster_order_type_pb2.ClusterOrder(id="a")
+        new = cluster_order_type_pb2.ClusterOrder(id="a")
+        new.spec.template_id = "large"
+        new.metadata.creation_timestamp.FromSeconds(1)
+        self.assertEqual(broadcaster.diff(old, new), ["metadata.creation_timestamp", "spec.template_id"])
+
+class WatchTest(_Base):
+
+    def _watch(self, **fields) -> typing.Iterator[events_service_pb2.EventsWatchResponse]:
+        """
+        Starts a call to the 'Watch' method and returns the generator of the responses, which is closed when the test
+        finishes. The method doesn't subscribe till the first response is requested, so tests that publish events
+        before that need to watch from a version.
+        """
+        request = events_service_pb2.EventsWatchRequest(**fields)
+        responses = services.Events(self.db).Watch(request, _Context())
+        self.addCleanup(responses.close)
+        return responses
+
+    def _versions(self, response: events_service_pb2.EventsWatchResponse) -> list[int]:
+        return [event.resource_version for event in response.events]
+
+    def test_unbatched(self):
+        """
+        Checks that without a batch window each event is sent in its own response.
+        """
+        self._create("a")
+        responses = self._watch(since_resource_version=0)
+        self._update("a", template_id="large")
+        first, second = next(responses), next(responses)
+        self.assertEqual((first.event.resource_version, first.event.type), (1, _CREATED))
+        self.assertEqual((second.event.resource_version, second.event.type), (2, _UPDATED))
+        self.assertEqual(len(second.event.changed_fields.paths), 0)
+
+    def test_batch_window(self):
+        """
+        Checks that the events received within the batch window are coalesced and sent in one response.
+        """
+        responses = self._watch(since_resource_version=0, batch_window=datetime.timedelta(milliseconds=100))
+        self._create("a")
+        self._update("a", template_id="large")
+        self._create("b")
+        self._update("a", state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED)
+        response = next(responses)
+        self.assertEqual(self._versions(response), [3, 4])
+        self.assertEqual([event.type for event in response.events], [_CREATED, _CREATED])
+        self.assertEqual(response.events[1].cluster_order.spec.template_id, "large")
+
+    def test_max_batch_size(self):
+        """
+        Checks that batches don't contain more events than the maximum size, even if the window hasn't expired.
+        """
+        for id in "abcde":
+            self._create(id)
+        responses = self._watch(
+            since_resource_version=0,
+            batch_window=datetime.timedelta(milliseconds=100),
+            max_batch_size=2,
+        )
+        self.assertEqual([self._versions(next(responses)) for _ in range(3)], [[1, 2], [3, 4], [5]])
+
+    def test_changed_fields(self):
+        """
+        Checks that when only the changed fields are requested the coalesced updates contain the union of the
+        changed fields, and nothing else.
+        """
+        self._create("a")
+        responses = self._watch(
+            since_resource_version=1,
+            batch_window=datetime.timedelta(milliseconds=100),
+            changed_fields_only=True,
+        )
+        self._update("a", template_id="large")
+        self._update("a", state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED)
+        [event] = next(responses).events
+        self.assertEqual(list(event.changed_fields.paths), ["spec.template_id", "status.state"])
+        self.assertEqual(event.cluster_order.spec.template_id, "large")
+        self.assertEqual(event.cluster_order.status.state, cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED)
+
+    def test_filter(self):
+        """
+        Checks that events that don't match the filter aren't sent.
+        """
+        responses = self._watch(since_resource_version=0, filter="event.type == EVENT_TYPE_OBJECT_DELETED")
+        self._create("a")
+        self._create("b")
+        self._delete("b")
+        response = next(responses)
+        self.assertEqual((response.event.resource_version, response.event.cluster_order.id), (3, "b"))
+
+    def test_errors(self):
+        """
+        Checks that the errors of the subscription are sent as the status of the call.
+        """
+        for id in "abcdefg":
+            self._create(id)
+        cases = [
+            ({"since_resource_version": 1}, grpc.StatusCode.OUT_OF_RANGE),
+            ({"max_batch_size": 0}, grpc.StatusCode.INVALID_ARGUMENT),
+            ({"filter": "event.type =="}, grpc.StatusCode.INVALID_ARGUMENT),
+        ]
+        for fields, code in cases:
+            with self.subTest(fields=fields):
+                with self.assertRaises(Error) as context:
+                    next(self._watch(**fields))
+                self.assertEqual(context.exception.code, code)
+
+    def test_overflow(self):
+        """
+        Checks that a client that doesn't read the events fast enough gets the 'RESOURCE_EXHAUSTED' code.
+        """
+        responses = self._watch(since_resource_version=0, max_batch_size=1)
+        self._create("a")
+        self.assertEqual(next(responses).event.resource_version, 1)
+        for number in range(11):
+            self._create(f"order-{number}")
+        with self.assertRaises(Error) as context:
+            list(responses)
+        self.assertEqual(context.exception.code, grpc.StatusCode.RESOURCE_EXHAUSTED)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Checks that the native converter generates exactly the same OpenAPI version 3 specification than the
+'swagger-codegen-cli' tool.
+"""
+
+import json
+import pathlib
+import unittest
+
+from dev import converter
+from dev import dirs
+
+# Directory containing a version 2 specification and the version 3 specification that 'swagger-codegen-cli' generated
+# from it. These files are only generated with './dev.py generate converter-fixtures', which uses the Java tool, so they
+# are a reference that doesn't depend on the native converter:
+_DATA_DIR = pathlib.Path(__file__).parent / "data" / "converter"
+
+class ConverterTest(unittest.TestCase):
+
+    def test_matches_swagger_codegen(self):
+        """
+        Checks that converting the reference input gives byte for byte the output of 'swagger-codegen-cli'.
+        """
+        self._check(
+            _DATA_DIR / "swagger-codegen-input.json",
+            _DATA_DIR / "swagger-codegen-output.yaml",
+        )
+
+    def test_matches_committed_specification(self):
+        """
+        Checks that converting the committed version 2 specification gives byte for byte the committed version 3
+        specification.
+        """
+        openapi_dir = dirs.project() / "openapi"
+        self._check(
+            openapi_dir / "v2" / "openapi.json",
+            openapi_dir / "v3" / "openapi.yaml",
+        )
+
+    def _check(self, v2_file: pathlib.Path, v3_file: pathlib.Path) -> None:
+        v2 = json.loads(v2_file.read_text(encoding="utf-8"))
+        actual = converter.dump(converter.convert(v2))
+        expected = v3_file.read_text(encoding="utf-8")
+        self.maxDiff = None
+        self.assertEqual(actual, expected, f"Conversion of '{v2_file.name}' is different from '{v3_file}'")
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Checks the compiler of the filter and order expressions.
+"""
+
+import unittest
+
+from events.v1 import event_type_pb2
+from fulfillment.v1 import cluster_order_type_pb2
+from shared.v1 import condition_status_type_pb2
+
+from dev import expressions
+
+def _order(
+    template_id: str = "ocp_4.16",
+    state: int = cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING,
+    created: str = "2025-01-01T00:00:00Z",
+) -> cluster_order_type_pb2.ClusterOrder:
+    result = cluster_order_type_pb2.ClusterOrder(id="123")
+    result.spec.template_id = template_id
+    result.status.state = state
+    result.metadata.creation_timestamp.FromJsonString(created)
+    return result
+
+class FilterTest(unittest.TestCase):
+
+    def _matches(self, filter: str, object: cluster_order_type_pb2.ClusterOrder) -> bool:
+        return expressions.predicate(cluster_order_type_pb2.ClusterOrder, filter)(object)
+
+    def _assert_error(self, filter: str, message: str, dialect: str = expressions.SQL) -> None:
+        message_class = cluster_order_type_pb2.ClusterOrder if dialect == expressions.SQL else event_type_pb2.Event
+        with self.assertRaises(expressions.Error) as context:
+            expressions.predicate(message_class, filter, dialect)
+        self.assertEqual(str(context.exception), message)
+
+    def test_empty_filter(self):
+        """
+        Checks that an empty filter doesn't need a predicate.
+        """
+        self.assertIsNone(expressions.predicate(cluster_order_type_pb2.ClusterOrder, "  "))
+
+    def test_grammar_errors(self):
+        """
+        Checks that expressions that don't match the grammar are rejected with the position of the problem.
+        """
+        self._assert_error("state =", "Filter 'state =' isn't valid: expected a value at position 7")
+        self._assert_error(
+            "state = 'FAILED' and",
+            "Filter 'state = 'FAILED' and' isn't valid: expected a field name at position 20",
+        )
+        self._assert_error(
+            "(state = 'FAILED'",
+            "Filter '(state = 'FAILED'' isn't valid: expected ')' at position 17",
+        )
+        self._assert_error(
+            "state ~ 'FAILED'",
+            "Filter 'state ~ 'FAILED'' isn't valid: unexpected character '~' at position 6",
+        )
+        self._assert_error(
+            "state not = 'FAILED'",
+            "Filter 'state not = 'FAILED'' isn't valid: expected 'in' or 'like' after 'not' at position 10",
+        )
+        self._assert_error(
+            "template_id like 1",
+            "Filter 'template_id like 1' isn't valid: expected a string after 'like' at position 17",
+        )
+        self._assert_error(
+            "state = 'FAILED' state",
+            "Filter 'state = 'FAILED' state' isn't valid: unexpected text at position 17",
+        )
+
+    def test_field_errors(self):
+        """
+        Checks that fields that don't exist or that can't be compared are rejected.
+        """
+        self._assert_error("color = 'red'", "Field 'color' used in filter doesn't exist")
+        self._assert_error("status.conditions = 'x'", "Field 'status.conditions' used in filter can't be compared")
+        self._assert_error(
+            "state like 'F%'",
+            "Field 'state' used in filter isn't a string, so it can't be used with 'like'",
+        )
+        self._assert_error("template_id = 1", "Value '1' used in filter isn't valid for field 'spec.template_id'")
+
+    def test_enum_names(self):
+        """
+        Checks that values of enumerated types can be written with the complete name, without the prefix of the type, or
+        with the number.
+        """
+        object = _order(state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED)
+        self.assertTrue(self._matches("state = 'CLUSTER_ORDER_STATE_FULFILLED'", object))
+        self.assertTrue(self._matches("state = 'FULFILLED'", object))
+        self.assertTrue(self._matches("status.state = 2", object))
+        self.assertFalse(self._matches("state = 'FAILED'", object))
+        self._assert_error("state = 'DONE'", "Value 'DONE' used in filter isn't valid for field 'status.state'")
+
+    def test_in(self):
+        """
+        Checks the 'in' and 'not in' conditions.
+        """
+        object = _order(state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED)
+        self.assertTrue(self._matches("state in ('FAILED', 'FULFILLED')", object))
+        self.assertFalse(self._matches("state not in ('FAILED', 'FULFILLED')", object))
+        self.assertTrue(self._matches("state not in ('PROGRESSING')", object))
+        self.assertFalse(self._matches("state in ('PROGRESSING')", object))
+
+    def test_like(self):
+        """
+        Checks the 'like' and 'not like' conditions, where '%' matches any sequence of characters and '_' any single
+        character.
+        """
+        object = _order(template_id="ocp_4.16")
+        self.assertTrue(self._matches("template_id like 'ocp%'", object))
+        self.assertTrue(self._matches("template_id like 'ocp_4.1_'", object))
+        self.assertTrue(self._matches("template_id like 'OCP%' or template_id like '%.16'", object))
+        self.assertFalse(self._matches("template_id like 'OCP%'", object))
+        self.assertFalse(self._matches("template_id like 'ocp'", object))
+        self.assertTrue(self._matches("template_id not like 'ocp'", object))
+        self.assertFalse(self._matches("template_id not like 'ocp%'", object))
+        self.assertTrue(self._matches("template_id like 'ocpx4%'", _order(template_id="ocpx4.16")))
+
+    def test_like_escapes(self):
+        """
+        Checks that a backslash matches the next character literally in 'like' patterns.
+        """
+        self.assertTrue(self._matches(r"template_id like 'ocp\_4%'", _order(template_id="ocp_4.16")))
+        self.assertFalse(self._matches(r"template_id like 'ocp\_4%'", _order(template_id="ocpx4.16")))
+        self.assertTrue(self._matches(r"template_id like '100\%'", _order(template_id="100%")))
+        self.assertFalse(self._matches(r"template_id like '100\%'", _order(template_id="1000")))
+        self.assertTrue(self._matches(r"template_id like 'a\\b%'", _order(template_id="a\\bc")))
+        self.assertTrue(self._matches(r"template_id like 'a\b'", _order(template_id="ab")))
+        self._assert_error(
+            "template_id like 'ocp\\'",
+            "Pattern 'ocp\\' used in filter ends with an escape character",
+        )
+
+    def test_quotes(self):
+        """
+        Checks that two single quotes inside a string are one single quote.
+        """
+        object = _order(template_id="o'brien")
+        self.assertTrue(self._matches("template_id = 'o''brien'", object))
+        self.assertTrue(self._matches("template_id like '%''%'", object))
+        self.assertFalse(self._matches("template_id = 'obrien'", object))
+        self.assertTrue(self._matches("template_id = ''", _order(template_id="")))
+
+    def test_timestamps(self):
+        """
+        Checks that timestamps are compared with strings in RFC 3339 format.
+        """
+        object = _order(created="2025-06-01T12:00:00Z")
+        self.assertTrue(self._matches("metadata.creation_timestamp > '2025-01-01T00:00:00Z'", object))
+        self.assertTrue(self._matches("metadata.creation_timestamp = '2025-06-01T12:00:00Z'", object))
+        self.assertTrue(self._matches("metadata.creation_timestamp <= '2025-06-01T12:00:00Z'", object))
+        self.assertFalse(self._matches("metadata.creation_timestamp < '2025-06-01T12:00:00Z'", object))
+        self.assertTrue(self._matches("metadata.creation_timestamp >= '2025-06-01T13:00:00+01:00'", object))
+        self._assert_error(
+            "metadata.creation_timestamp > 'yesterday'",
+            "Value 'yesterday' used in filter isn't valid for field 'metadata.creation_timestamp'",
+        )
+
+    def test_boolean_operators(self):
+        """
+        Checks the precedence of 'not', 'and' and 'or', and that keywords aren't case sensitive.
+        """
+        object = _order(state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED, template_id="a")
+        self.assertTrue(self._matches("state = 'FAILED' or state = 'FULFILLED' and template_id = 'b'", object))
+        self.assertFalse(self._matches("(state = 'FAILED' or state = 'FULFILLED') and template_id = 'b'", object))
+        self.assertTrue(self._matches("NOT template_id = 'b' AND state <> 'PROGRESSING'", object))
+        self.assertFalse(self._matches("not not template_id = 'b'", object))
+
+    def test_cel(self):
+        """
+        Checks the dialect used by the filters of the 'Watch' method.
+        """
+        event = event_type_pb2.Event(type=event_type_pb2.EVENT_TYPE_OBJECT_UPDATED)
+        event.cluster_order.status.state = cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED
+        condition = event.cluster_order.status.conditions.add()
+        condition.status = condition_status_type_pb2.CONDITION_STATUS_TRUE
+
+        def matches(filter: str) -> bool:
+            return expressions.predicate(event_type_pb2.Event, filter, expressions.CEL)(event)
+
+        self.assertTrue(matches("event.type == EVENT_TYPE_OBJECT_UPDATED"))
+        self.assertTrue(matches("event.type == 'OBJECT_UPDATED' && event.cluster_order.status.state == 'FAILED'"))
+        self.assertTrue(matches("event.type in [EVENT_TYPE_OBJECT_CREATED, EVENT_TYPE_OBJECT_UPDATED]"))
+        self.assertTrue(matches('!(event.cluster_order.spec.template_id == "it\\"s")'))
+        self.assertFalse(matches("event.type == EVENT_TYPE_OBJECT_DELETED || event.cluster_order.status.state == 1"))
+        self._assert_error(
+            "type == EVENT_TYPE_OBJECT_UPDATED",
+            "Filter 'type == EVENT_TYPE_OBJECT_UPDATED' isn't valid: fields must start with 'event.' at position 5",
+            expressions.CEL,
+        )
+        self._assert_error(
+            "event.type = EVENT_TYPE_OBJECT_UPDATED",
+            "Filter 'event.type = EVENT_TYPE_OBJECT_UPDATED' isn't valid: unexpected character '=' at position 11",
+            expressions.CEL,
+        )
+
+class OrderTest(unittest.TestCase):
+
+    def test_keys(self):
+        """
+        Checks that order expressions are parsed into the paths and directions of the keys.
+        """
+        keys = expressions.Parser("state desc, metadata.creation_timestamp ASC, id", expressions.SQL, "order").order()
+        self.assertEqual(keys, [("state", True), ("metadata.creation_timestamp", False), ("id", False)])
+
+    def test_errors(self):
+        """
+        Checks that order expressions that don't match the grammar are rejected.
+        """
+        with self.assertRaises(expressions.Error) as context:
+            expressions.Parser("state down", expressions.SQL, "order").order()
+        self.assertEqual(str(context.exception), "Order 'state down' isn't valid: unexpected text at position 6")
+
+    def test_getter(self):
+        """
+        Checks that the values used to sort are the same that the filters compare: numbers of enumerated values and
+        nanoseconds of timestamps.
+        """
+        object = _order(
+            state=cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED,
+            created="1970-01-01T00:00:01Z",
+        )
+        self.assertEqual(expressions.getter(cluster_order_type_pb2.ClusterOrder, "state")(object), 3)
+        self.assertEqual(
+            expressions.getter(cluster_order_type_pb2.ClusterOrder, "metadata.creation_timestamp")(object),
+            1_000_000_000,
+        )
+        with self.assertRaises(expressions.Error) as context:
+            expressions.getter(cluster_order_type_pb2.ClusterOrder, "conditions")
+        self.assertEqual(str(context.exception), "Field 'conditions' used in order can't be compared")
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Checks that the informer keeps its cache consistent with the objects of the server: the differences found when listing
+again, the changes applied from events, the objects that stop matching the filter and the limit of objects. The last
+test runs the informer against the reference server.
+"""
+
+import queue
+import socket
+import unittest
+
+import grpc
+
+from events.v1 import event_type_pb2
+from fulfillment.v1 import cluster_order_type_pb2
+from fulfillment.v1 import cluster_orders_service_pb2
+
+from dev.client import informer
+from dev.server import app
+
+_PROGRESSING = cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING
+_FAILED = cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED
+
+def _order(
+    id: str,
+    version: int,
+    template_id: str = "small",
+    state: int = _PROGRESSING,
+) -> cluster_order_type_pb2.ClusterOrder:
+    result = cluster_order_type_pb2.ClusterOrder(id=id)
+    result.metadata.resource_version = version
+    result.spec.template_id = template_id
+    result.status.state = state
+    return result
+
+def _free_port() -> int:
+    """
+    Returns a port that is free at the moment, for the servers started by the tests.
+    """
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+class _Call:
+    """
+    Replaces the call of a server streaming method, returning the given responses.
+    """
+
+    def __init__(self, responses: list):
+        self._responses = responses
+
+    def __iter__(self):
+        return iter(self._responses)
+
+    def cancel(self) -> bool:
+        return False
+
+class InformerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.channel = grpc.insecure_channel("localhost:1")
+        self.addCleanup(self.channel.close)
+        self.calls = []
+
+    def _informer(self, **kwargs) -> informer.Informer:
+        """
+        Creates an informer of orders that records the calls to its handlers in the 'calls' list.
+        """
+        result = informer.Informer(self.channel, "cluster_orders", **kwargs)
+        result.add_handler(
+            on_add=lambda object: self.calls.append(("add", object.id)),
+            on_update=lambda old, new: self.calls.append(("update", new.id)),
+            on_delete=lambda object: self.calls.append(("delete", object.id)),
+        )
+        return result
+
+    def _relist(self, target: informer.Informer, version: int, *objects: cluster_order_type_pb2.ClusterOrder) -> None:
+        """
+        Makes the informer list the objects again, receiving the given ones in two chunks.
+        """
+        middle = len(objects) // 2
+        responses = [
+            cluster_orders_service_pb2.ClusterOrdersListStreamResponse(items=chunk, resource_version=version)
+            for chunk in [objects[:middle], objects[middle:]]
+        ]
+        target._list_stream = lambda request: _Call(responses)
+        target._relist()
+
+    def _event(
+        self,
+        type: int,
+        object: cluster_order_type_pb2.ClusterOrder,
+        changed: list[str] | None = None,
+    ) -> event_type_pb2.Event:
+        result = event_type_pb2.Event(type=type, resource_version=object.metadata.resource_version)
+        result.cluster_order.CopyFrom(object)
+        if changed is not None:
+            result.changed_fields.paths.extend(changed)
+        return result
+
+    def test_relist(self):
+        """
+        Checks that listing again calls the handlers only for the objects that were added, changed or deleted since
+        the previous list.
+        """
+        target = self._informer()
+        self._relist(target, 3, _order("a", 1), _order("b", 2), _order("c", 3))
+        self.assertTrue(target.synced)
+        self.assertEqual(target.resource_version, 3)
+        self.assertEqual(self.calls, [("add", "a"), ("add", "b"), ("add", "c")])
+        self.calls.clear()
+        self._relist(target, 6, _order("b", 5, state=_FAILED), _order("c", 3), _order("d", 6))
+        self.assertEqual(self.calls, [("delete", "a"), ("update", "b"), ("add", "d")])
+        self.assertEqual(sorted(object.id for object in target.objects()), ["b", "c", "d"])
+        self.assertEqual([object.id for object in target.index("status.state", _FAILED)], ["b"])
+        self.assertEqual(target.counts("status.state"), {_PROGRESSING: 2, _FAILED: 1})
+        self.assertEqual(target.resource_version, 6)
+
+    def test_changed_fields(self):
+        """
+        Checks that updates that contain only the changed fields are merged into the cached object, replacing the
+        repeated fields instead of appending to them.
+        """
+        target = self._informer()
+        cached = _order("a", 1)
+        for type in [
+            cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_ACCEPTED,
+            cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_FULFILLED,
+        ]:
+            cached.status.conditions.add(type=type)
+        self._relist(target, 1, cached)
+        changes = cluster_order_type_pb2.ClusterOrder(id="a")
+        changes.metadata.resource_version = 2
+        changes.status.conditions.add(type=cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_FAILED)
+        target._apply(self._event(event_type_pb2.EVENT_TYPE_OBJECT_UPDATED, changes, ["status.conditions"]))
+        object = target.get("a")
+        self.assertEqual(
+            [condition.type for condition in object.status.conditions],
+            [cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_FAILED],
+        )
+        self.assertEqual(object.spec.template_id, "small")
+        self.assertEqual(object.metadata.resource_version, 2)
+        self.assertEqual(target.resource_version, 2)
+        self.assertEqual(self.calls[-1], ("update", "a"))
+
+    def test_changes_of_unknown_object(self):
+        """
+        Checks that changes of an object that isn't in the cache make the informer list the objects again.
+        """
+        target = self._informer()
+        self._relist(target, 1, _order("a", 1))
+        event = self._event(event_type_pb2.EVENT_TYPE_OBJECT_UPDATED, _order("b", 2), ["spec.template_id"])
+        with self.assertRaises(informer._Relist):
+            target._apply(event)
+
+    def test_filter(self):
+        """
+        Checks that objects that stop matching the filter are removed from the cache as if they had been deleted, and
+        that objects that start matching it are added.
+        """
+        target = self._informer(filter="state = 'PROGRESSING'")
+        self._relist(target, 2, _order("a", 1), _order("b", 2))
+        self.calls.clear()
+        target._apply(self._event(event_type_pb2.EVENT_TYPE_OBJECT_UPDATED, _order("a", 3, state=_FAILED)))
+        target._apply(self._event(event_type_pb2.EVENT_TYPE_OBJECT_CREATED, _order("c", 4, state=_FAILED)))
+        target._apply(self._event(event_type_pb2.EVENT_TYPE_OBJECT_UPDATED, _order("d", 5)))
+        self.assertEqual(self.calls, [("delete", "a"), ("add", "d")])
+        self.assertEqual(sorted(object.id for object in target.objects()), ["b", "d"])
+        self.assertEqual(target.resource_version, 5)
+
+    def test_fields(self):
+        """
+        Checks that only the requested fields are kept, in addition to the identifier, the metadata and the indexed
+        fields.
+        """
+        target = self._informer(fields=["spec"], indexes=["status.state"])
+        object = _order("a", 1)
+        object.status.conditions.add(type=cluster_order_type_pb2.CLUSTER_ORDER_CONDITION_TYPE_ACCEPTED)
+        target._apply(self._event(event_type_pb2.EVENT_TYPE_OBJECT_CREATED, object))
+        cached = target.get("a")
+        self.assertEqual(cached.spec.template_id, "small")
+        self.assertEqual(cached.status.state, _PROGRESSING)
+        self.assertEqual(len(cached.status.conditions), 0)
+
+    def test_max_objects(self):
+        """
+        Checks that exceeding the limit of objects, either when listing or when receiving events, stops the informer
+        with an error instead of keeping an incomplete cache.
+        """
+        target = self._informer(max_objects=2)
+        target._list_stream = lambda request: _Call([
+            cluster_orders_service_pb2.ClusterOrdersListStreamResponse(
+                items=[_order("a", 1), _order("b", 2), _order("c", 3)],
+                resource_version=3,
+            ),
+        ])
+        with self.assertLogs(level="ERROR"):
+            target.start()
+            self.addCleanup(target.stop)
+            with self.assertRaises(Exception) as context:
+                target.wait_for_sync(timeout=5)
+        self.assertIn("exceeds the limit of 2", str(context.exception))
+        self.assertEqual(len(target), 0)
+
+        target = self._informer(max_objects=2)
+        self._relist(target, 2, _order("a", 1), _order("b", 2))
+        with self.assertRaises(Exception) as context:
+            target._apply(self._event(event_type_pb2.EVENT_TYPE_OBJECT_CREATED, _order("c", 3)))
+        self.assertIn("exceeds the limit of 2", str(context.exception))
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        grpc_address = f"localhost:{_free_port()}"
+        self.server = app.Server(
+            grpc_address=grpc_address,
+            http_address=f"localhost:{_free_port()}",
+            workers=4,
+            retention=1000,
+            queue_size=1000,
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.channel = grpc.insecure_channel(grpc_address)
+        self.addCleanup(self.channel.close)
+
+    def test_sync_and_watch(self):
+        """
+        Checks that the informer loads the objects of the server, and then applies the updates and deletions made in
+        the server.
+        """
+        db = self.server.db
+        for number in range(50):
+            object = cluster_order_type_pb2.ClusterOrder(id=f"order-{number:02d}")
+            object.spec.template_id = "small"
+            object.status.state = _PROGRESSING
+            db.create(db.cluster_orders, object)
+
+        calls = queue.Queue()
+        target = informer.Informer(self.channel, "cluster_orders", batch_window=0.01)
+        target.add_handler(
+            on_update=lambda old, new: calls.put(("update", new.id, old.status.state, new.status.state)),
+            on_delete=lambda object: calls.put(("delete", object.id)),
+        )
+        target.start()
+        self.addCleanup(target.stop)
+        self.assertTrue(target.wait_for_sync(timeout=10))
+        self.assertEqual(len(target), 50)
+        self.assertEqual(target.resource_version, 50)
+        self.assertEqual(target.counts("status.state"), {_PROGRESSING: 50})
+
+        object = cluster_order_type_pb2.ClusterOrder()
+        object.CopyFrom(db.cluster_orders.get("order-07"))
+        object.status.state = _FAILED
+        db.update(db.cluster_orders, object)
+        db.delete(db.cluster_orders, "order-08")
+        self.assertEqual(calls.get(timeout=10), ("update", "order-07", _PROGRESSING, _FAILED))
+        self.assertEqual(calls.get(timeout=10), ("delete", "order-08"))
+
+        self.assertEqual(len(target), 49)
+        self.assertIsNone(target.get("order-08"))
+        self.assertEqual(target.get("order-07").metadata.resource_version, 51)
+        self.assertEqual(target.get("order-07").spec.template_id, "small")
+        self.assertEqual([object.id for object in target.index("status.state", _FAILED)], ["order-07"])
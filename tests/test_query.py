@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2025 Red Hat Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License
+# is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+# or implied. See the License for the specific language governing permissions and limitations under
+# the License.
+#
+
+"""
+Checks that the queries of the reference server return, using the indexes, the same results than a full scan of the
+objects.
+"""
+
+import collections
+import unittest
+
+import grpc
+
+from fulfillment.v1 import cluster_order_type_pb2
+
+from dev import expressions
+from dev.server import query
+from dev.server import store
+from dev.server.errors import Error
+
+_STATES = [
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_PROGRESSING,
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED,
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED,
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_FULFILLED,
+    cluster_order_type_pb2.CLUSTER_ORDER_STATE_FAILED,
+]
+
+_TEMPLATES = ["ocp_4.16", "ocp_4.17", "ocpx4", "o'brien", "small"]
+
+# Filters and orders that exercise the different ways to select the objects:
+_FILTERS = {
+    "": "full scan",
+    "state = 'FAILED'": "hash index on 'status.state'",
+    "state in ('FAILED', 'PROGRESSING') and template_id like 'ocp%'": "hash index on 'status.state'",
+    "state = 'FULFILLED' or state = 'FAILED'": "hash index on 'status.state'",
+    "spec.template_id = 'o''brien'": "hash index on 'spec.template_id'",
+    "template_id = 'small' and state = 'FULFILLED'": "hash index on 'spec.template_id'",
+    "id in ('order-007', 'order-100', 'missing')": "identifier lookup",
+    (
+        "metadata.creation_timestamp >= '2025-01-01T01:00:00Z' and "
+        "metadata.creation_timestamp < '2025-01-01T02:00:00Z'"
+    ): "range of sorted index on 'metadata.creation_timestamp'",
+    "metadata.creation_timestamp > '2025-01-01T03:00:00Z'": "range of sorted index on 'metadata.creation_timestamp'",
+    "state not in ('FULFILLED')": "full scan",
+    "template_id not like 'ocp\\_%'": "full scan",
+    "not state = 'FULFILLED' or template_id = 'small'": "full scan",
+}
+
+_ORDERS = [
+    "",
+    "state",
+    "state desc",
+    "template_id desc, metadata.creation_timestamp",
+    "metadata.creation_timestamp desc",
+]
+
+class QueryTest(unittest.TestCase):
+
+    def setUp(self):
+        database = store.Database(retention=10, queue_size=10)
+        self.collection = database.cluster_orders
+        for number in range(200):
+            object = cluster_order_type_pb2.ClusterOrder(id=f"order-{number:03d}")
+            object.spec.template_id = _TEMPLATES[number % len(_TEMPLATES)]
+            object.status.state = _STATES[number % len(_STATES)]
+            object.metadata.creation_timestamp.FromSeconds(1735689600 + number * 60)
+            self.collection.put(object)
+
+    def _scan(self, compiled: query.Query, filter: str) -> list[cluster_order_type_pb2.ClusterOrder]:
+        """
+        Returns the objects that match the filter, checking all of them, sorted in the order of the query.
+        """
+        predicate = expressions.predicate(cluster_order_type_pb2.ClusterOrder, filter)
+        objects = [object for object in self.collection.scan() if predicate is None or predicate(object)]
+        return sorted(objects, key=compiled.sort_key)
+
+    def _ids(self, objects) -> list[str]:
+        return [object.id for object in objects]
+
+    def test_plans(self):
+        """
+        Checks that each filter uses the expected index.
+        """
+        for filter, plan in _FILTERS.items():
+            with self.subTest(filter=filter):
+                compiled = query.compile(cluster_order_type_pb2.ClusterOrder, filter, "")
+                self.assertEqual(compiled.plan(self.collection), plan)
+
+    def test_select(self):
+        """
+        Checks that selecting with the indexes gives the same objects, in the same order, than a full scan.
+        """
+        for filter in _FILTERS:
+            for order in _ORDERS:
+                with self.subTest(filter=filter, order=order):
+                    compiled = query.compile(cluster_order_type_pb2.ClusterOrder, filter, order)
+                    expected = self._ids(self._scan(compiled, filter))
+                    self.assertEqual(self._ids(compiled.select(self.collection)), expected)
+
+    def test_pages(self):
+        """
+        Checks that reading the results in pages, starting each page after the key of the last object of the previous
+        one, gives the same objects than reading them at once.
+        """
+        for filter in _FILTERS:
+            for order in _ORDERS:
+                with self.subTest(filter=filter, order=order):
+                    compiled = query.compile(cluster_order_type_pb2.ClusterOrder, filter, order)
+                    expected = self._ids(self._scan(compiled, filter))
+                    actual = []
+                    after = None
+                    while True:
+                        page = []
+                        for object in compiled.select(self.collection, after):
+                            page.append(object)
+                            if len(page) == 7:
+                                break
+                        actual.extend(self._ids(page))
+                        if len(page) < 7:
+                            break
+                        after = compiled.key(page[-1])
+                    self.assertEqual(actual, expected)
+
+    def test_pages_after_changes(self):
+        """
+        Checks that removing the last object of a page doesn't change where the next page starts.
+        """
+        compiled = query.compile(cluster_order_type_pb2.ClusterOrder, "state = 'FULFILLED'", "template_id desc")
+        objects = list(compiled.select(self.collection))
+        after = compiled.key(objects[9])
+        self.collection.remove(objects[9].id)
+        self.assertEqual(self._ids(compiled.select(self.collection, after)), self._ids(objects[10:]))
+
+    def test_wrong_page_token(self):
+        """
+        Checks that a key that doesn't match the order is rejected.
+        """
+        compiled = query.compile(cluster_order_type_pb2.ClusterOrder, "", "state")
+        with self.assertRaises(Error) as context:
+            list(compiled.select(self.collection, ["order-001"]))
+        self.assertEqual(context.exception.code, grpc.StatusCode.INVALID_ARGUMENT)
+        with self.assertRaises(Error) as context:
+            list(compiled.select(self.collection, ["FAILED", "order-001"]))
+        self.assertEqual(context.exception.code, grpc.StatusCode.INVALID_ARGUMENT)
+
+    def test_count(self):
+        """
+        Checks that counting with the indexes gives the number of objects of a full scan.
+        """
+        for filter in _FILTERS:
+            with self.subTest(filter=filter):
+                compiled = query.compile(cluster_order_type_pb2.ClusterOrder, filter, "")
+                self.assertEqual(compiled.count(self.collection), len(self._scan(compiled, filter)))
+
+    def test_summarize(self):
+        """
+        Checks that the counts by state and by template are the ones of a full scan.
+        """
+        paths = ["status.state", "spec.template_id"]
+        for filter in _FILTERS:
+            with self.subTest(filter=filter):
+                compiled = query.compile(cluster_order_type_pb2.ClusterOrder, filter, "")
+                objects = self._scan(compiled, filter)
+                total, counts = compiled.summarize(self.collection, paths)
+                self.assertEqual(total, len(objects))
+                self.assertEqual(counts[0], collections.Counter(object.status.state for object in objects))
+                self.assertEqual(counts[1], collections.Counter(object.spec.template_id for object in objects))
+
+    def test_invalid_expressions(self):
+        """
+        Checks that invalid filters and orders are rejected with the 'INVALID_ARGUMENT' code.
+        """
+        for filter, order in [("state =", ""), ("", "state sideways"), ("color = 'red'", ""), ("", "conditions")]:
+            with self.subTest(filter=filter, order=order):
+                with self.assertRaises(Error) as context:
+                    query.compile(cluster_order_type_pb2.ClusterOrder, filter, order)
+                self.assertEqual(context.exception.code, grpc.StatusCode.INVALID_ARGUMENT)